@@ -39,11 +39,16 @@ SQLModel.metadata.clear()
 
 # Core
 from models import *
-from sync_manager import sincronizar_bases_de_datos, sincronizar_local_a_remoto
+from sync_manager import (
+    sincronizar_bases_de_datos, sincronizar_local_a_remoto, sembrar_remoto,
+    leer_estado_sincronizador, sincronizador_activo, iniciar_replicador
+)
 
 # Database
 from database import local as database_local
 from database import remote as database_remote
+from database import remote_async as database_remote_async
+from database.instrumentacion import instrumentar, iniciar_medicion, terminar_medicion, UMBRAL_N_MAS_1
 
 # Módulos: Feligreses (⚠️ CAMBIO: antes Personas)
 from modules.feligreses import crud_feligreses, crud_contacto, crud_catecumenos
@@ -82,12 +87,44 @@ def st_display_func(message, is_error=False, is_warning=False):
         st.success(message)
 
 
-@st.cache_resource(ttl=300)
+@st.cache_resource
+def get_local_engine():
+    """Engine local con caché (no depende de la red)"""
+    return instrumentar(database_local.get_engine())
+
+
 def get_database_engines():
-    """Obtiene engines con caché para mejor rendimiento"""
-    local_engine = database_local.get_engine()
-    remote_engine = database_remote.get_engine()
-    return local_engine, remote_engine
+    """
+    Engine local y, si el circuito está cerrado, el remoto. La conexión a
+    Supabase se hace en segundo plano: el arranque nunca espera a la red.
+    """
+    conexion = database_remote.conexion_en_segundo_plano()
+    return get_local_engine(), instrumentar(conexion.engine_disponible()), conexion
+
+
+def mostrar_panel_consultas(medicion):
+    """Panel de depuración: sentencias SQL de esta ejecución de la página"""
+    st.markdown("### 🐞 Consultas de esta página")
+    col1, col2 = st.columns(2)
+    col1.metric("Sentencias", medicion.sentencias)
+    col2.metric("Tiempo SQL", f"{medicion.segundos_sql * 1000:.0f} ms")
+    st.caption(
+        f"Total de la ejecución: {medicion.segundos_total * 1000:.0f} ms · "
+        f"{len(medicion.formas)} formas distintas"
+    )
+    
+    for forma in medicion.posibles_n_mas_1():
+        st.warning(
+            f"⚠️ Posible N+1: {forma.veces}× en {forma.origen or 'origen desconocido'}"
+        )
+        st.code(forma.forma[:300], language="sql")
+    
+    repetidas = medicion.repetidas()
+    if repetidas:
+        with st.expander("Sentencias repetidas"):
+            for forma in repetidas[:10]:
+                st.caption(f"{forma.veces}× · {forma.segundos * 1000:.1f} ms")
+                st.code(forma.forma[:300], language="sql")
 
 
 def sincronizar_todas_las_tablas(db_local_engine, db_remote_engine, st_display_func):
@@ -131,28 +168,43 @@ def sincronizar_todas_las_tablas(db_local_engine, db_remote_engine, st_display_f
                     st.success("✅ Cambios enviados a Supabase")
                 else:
                     st.error("❌ Hubo errores al enviar")
+    
+    with st.expander("🚚 Carga inicial masiva (Supabase vacío)"):
+        st.caption("Copia todas las tablas locales con COPY; mucho más rápido que el envío normal para poblar un proyecto nuevo o recién recreado.")
+        if st.button("🚚 CARGAR TODO A SUPABASE", use_container_width=True, key="sembrar_remoto"):
+            with st.spinner("Copiando tablas a Supabase..."):
+                if sembrar_remoto(db_local_engine, db_remote_engine, st_display_func):
+                    st.success("✅ Carga masiva completada")
+                else:
+                    st.error("❌ Hubo errores en la carga masiva")
 
 
 def obtener_estadisticas_rapidas(db_engine, db_module):
     """
     Obtiene estadísticas rápidas del sistema.
     ⚠️ ACTUALIZADO para usar Feligres
+    En Supabase los conteos van todos a la vez (una ida y vuelta, no once).
     """
+    consultas = {
+        'feligreses': select(func.count(Feligres.id_feligres)),  # ⚠️ CAMBIO
+        'telefonos': select(func.count(Telefono.id_telefono)),
+        'direcciones': select(func.count(Direccion.id_direccion)),
+        'catecumenos': select(func.count(Catecumeno.id_catecumeno)),
+        'actividades': select(func.count(Actividad.id_actividad)),
+        'sesiones': select(func.count(Sesion.id_sesion)),
+        'grupos': select(func.count(GrupoParroquial.id_grupo)),
+        'transacciones': select(func.count(TransaccionFinanciera.id_transaccion)),
+        'bienes': select(func.count(BienInventario.id_bien)),
+        'actas': select(func.count(ActaReunion.id_acta)),
+        'constancias': select(func.count(ConstanciaEmitida.id_constancia))
+    }
     try:
+        if db_engine.dialect.name == 'postgresql' and database_remote_async.disponible():
+            conteos = database_remote_async.consultar_en_paralelo(consultas, escalar=True)
+            return {clave: n or 0 for clave, n in conteos.items()}
+        
         with Session(db_engine) as session:
-            stats = {
-                'feligreses': session.exec(select(func.count(Feligres.id_feligres))).first() or 0,  # ⚠️ CAMBIO
-                'telefonos': session.exec(select(func.count(Telefono.id_telefono))).first() or 0,
-                'direcciones': session.exec(select(func.count(Direccion.id_direccion))).first() or 0,
-                'catecumenos': session.exec(select(func.count(Catecumeno.id_catecumeno))).first() or 0,
-                'actividades': session.exec(select(func.count(Actividad.id_actividad))).first() or 0,
-                'sesiones': session.exec(select(func.count(Sesion.id_sesion))).first() or 0,
-                'grupos': session.exec(select(func.count(GrupoParroquial.id_grupo))).first() or 0,
-                'transacciones': session.exec(select(func.count(TransaccionFinanciera.id_transaccion))).first() or 0,
-                'bienes': session.exec(select(func.count(BienInventario.id_bien))).first() or 0,
-                'actas': session.exec(select(func.count(ActaReunion.id_acta))).first() or 0,
-                'constancias': session.exec(select(func.count(ConstanciaEmitida.id_constancia))).first() or 0
-            }
+            stats = {clave: session.exec(consulta).first() or 0 for clave, consulta in consultas.items()}
         return stats
     except Exception as e:
         print(f"Error obteniendo estadísticas: {e}")
@@ -270,6 +322,9 @@ def mostrar_pagina_inicio():
             """)
 
 
+# Cuenta las sentencias SQL de esta ejecución (ver database/instrumentacion.py)
+iniciar_medicion()
+
 # ====================================================================
 # CONFIGURACIÓN DE BASE DE DATOS (SIDEBAR)
 # ====================================================================
@@ -292,7 +347,7 @@ with st.sidebar:
     usuario_actual = None
     
     # Obtener engines
-    cached_local, cached_remote = get_database_engines()
+    cached_local, cached_remote, conexion_remota = get_database_engines()
     
     if db_mode == "Local (SQLite)":
         db_local_engine = cached_local
@@ -301,20 +356,61 @@ with st.sidebar:
         st.success("✅ SQLite Conectado")
         
         if db_engine:
-            pendientes = database_local.contar_pendientes_sincronizacion(db_engine)
+            pendientes_por_tabla = database_local.contar_pendientes_por_tabla(db_engine)
+            pendientes = sum(pendientes_por_tabla.values())
             if pendientes > 0:
                 st.warning(f"⚠️ {pendientes} cambios sin sincronizar")
+                with st.expander("Ver por tabla"):
+                    for tabla, cantidad in sorted(pendientes_por_tabla.items(), key=lambda x: -x[1]):
+                        st.caption(f"{tabla}: {cantidad}")
             else:
                 st.info("✅ Todo sincronizado")
     else:
         db_remote_engine = cached_remote
         if db_remote_engine:
-            db_engine = db_remote_engine
-            db_module = database_remote
             remote_connected = True
-            st.success("✅ Supabase Conectado")
+            local_primero = st.toggle(
+                "⚡ Guardar primero en local",
+                value=True,
+                key="local_primero",
+                help="Lee y escribe en SQLite; los cambios se copian a Supabase en segundo plano"
+            )
+            
+            if conexion_remota.estado == "degradada":
+                st.warning(
+                    "🐢 Supabase lento o inestable"
+                    + (f" ({conexion_remota.latencia_ms:.0f} ms)" if conexion_remota.latencia_ms else "")
+                )
+            
+            if local_primero and cached_local:
+                # Latencia de disco en la recepción; Supabase queda al día en segundos
+                db_local_engine = cached_local
+                db_engine = db_local_engine
+                db_module = database_local
+                iniciar_replicador(db_local_engine, db_remote_engine)
+                st.success("✅ Supabase Conectado (local primero)")
+            else:
+                db_engine = db_remote_engine
+                db_module = database_remote
+                st.success("✅ Supabase Conectado")
         else:
-            st.error("❌ No conectado a Supabase")
+            # Sin Supabase se sigue trabajando en SQLite de inmediato
+            db_local_engine = cached_local
+            db_engine = db_local_engine
+            db_module = database_local
+            
+            if conexion_remota.estado == "conectando":
+                st.info("⏳ Conectando a Supabase... mientras tanto se trabaja en SQLite")
+            else:
+                reintento = conexion_remota.segundos_para_reintento()
+                st.error("❌ Supabase no disponible: trabajando en SQLite")
+                st.caption(
+                    f"{conexion_remota.ultimo_error or 'Sin respuesta'}"
+                    + (f" · reintento en {reintento:.0f}s" if reintento else "")
+                )
+                if st.button("🔄 Reintentar ahora", key="reintentar_supabase"):
+                    conexion_remota.reintentar_ahora()
+            
             st.info("💡 Configura tus credenciales")
             with st.expander("📖 Ver instrucciones"):
                 st.markdown("""
@@ -341,6 +437,18 @@ with st.sidebar:
 with st.sidebar:
     st.markdown("### 🔄 Sincronización")
     
+    # Sincronizador en segundo plano (python -m sync_manager --watch)
+    estado_sync = leer_estado_sincronizador(cached_local) if cached_local else None
+    if sincronizador_activo(estado_sync):
+        if estado_sync.estado == "error":
+            st.warning(f"🛰️ Sincronizador con errores: {estado_sync.ultimo_error or 'reintentando'}")
+        else:
+            ultimo = f"{estado_sync.ultimo_exito:%H:%M}" if estado_sync.ultimo_exito else "—"
+            st.caption(
+                f"🛰️ Sincronizador activo ({estado_sync.estado}) · "
+                f"último éxito {ultimo} · {estado_sync.pendientes} pendientes"
+            )
+    
     if remote_connected:
         if not db_local_engine:
             db_local_engine = cached_local
@@ -410,6 +518,8 @@ with st.sidebar:
     st.caption("**Versión:** 4.0 + Supabase")
     st.caption("⚠️ Modelo: **Feligres**")  # ⚠️ NUEVO
     st.caption("🕐 " + datetime.now().strftime("%H:%M:%S"))
+    st.checkbox("🐞 Depurar consultas", key="debug_consultas",
+                help=f"Muestra las sentencias SQL de cada página y marca las que se repiten {UMBRAL_N_MAS_1}+ veces")
 
 
 # ====================================================================
@@ -545,6 +655,16 @@ elif menu_option == "📊 Dashboard":
         st.error("❌ Sin conexión")
 
 
+# ====================================================================
+# DEPURACIÓN DE CONSULTAS
+# ====================================================================
+
+medicion_consultas = terminar_medicion(menu_option)
+if medicion_consultas and st.session_state.get("debug_consultas"):
+    with st.sidebar:
+        mostrar_panel_consultas(medicion_consultas)
+
+
 # ====================================================================
 # FOOTER
 # ====================================================================
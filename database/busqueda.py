@@ -0,0 +1,168 @@
+# database/busqueda.py - Búsqueda de feligreses por nombre y CURP
+"""
+Índice de texto completo sobre Feligres (nombres, apellidos y CURP).
+
+SQLite: tabla virtual FTS5 'feligres_busqueda' con contenido externo
+(content='feligres'), tokenizador unicode61 sin acentos ni mayúsculas e
+índices de prefijo. Los triggers la mantienen al día en cualquier
+escritura, incluidas las de la sincronización y las masivas.
+
+PostgreSQL (Supabase): ILIKE por término apoyado en un índice GIN de
+pg_trgm sobre el nombre completo, ordenado por similarity().
+
+El índice lo crea la migración v005_busqueda_feligres.
+
+Uso:
+    buscar_feligres("jose garc", engine, limite=20)
+"""
+
+import re
+from typing import List
+
+from sqlalchemy import text, literal_column, func, or_
+from sqlmodel import Session, select
+
+from models import Feligres
+
+TABLA_FTS = "feligres_busqueda"
+
+# Debe coincidir carácter por carácter con el índice GIN para que se use
+EXPRESION_PG = (
+    "(nombres || ' ' || apellido_paterno || ' ' || "
+    "coalesce(apellido_materno, '') || ' ' || coalesce(curp, ''))"
+)
+
+_COLUMNAS = "nombres, apellido_paterno, apellido_materno, curp"
+_NUEVAS = "new.id_feligres, new.nombres, new.apellido_paterno, new.apellido_materno, new.curp"
+_VIEJAS = "old.id_feligres, old.nombres, old.apellido_paterno, old.apellido_materno, old.curp"
+
+# ====================================================================
+# CREACIÓN DEL ÍNDICE
+# ====================================================================
+
+def fts5_disponible(conn) -> bool:
+    return bool(conn.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar())
+
+
+def crear_indice_busqueda(conn):
+    """Crea el índice de búsqueda del dialecto de `conn` (en su transacción)."""
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.execute(text(
+            f'CREATE INDEX IF NOT EXISTS "ix_feligres_busqueda_trgm" '
+            f'ON feligres USING gin ({EXPRESION_PG} gin_trgm_ops)'
+        ))
+        return
+
+    if not fts5_disponible(conn):
+        print("⚠️ SQLite sin FTS5: la búsqueda de feligreses usará LIKE")
+        return
+
+    # remove_diacritics 2: 'José' == 'jose'; prefix: 'gar*' sin recorrer el índice
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5("
+        f"{_COLUMNAS}, content='feligres', content_rowid='id_feligres', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ai AFTER INSERT ON feligres BEGIN
+            INSERT INTO {TABLA_FTS}(rowid, {_COLUMNAS}) VALUES ({_NUEVAS});
+        END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ad AFTER DELETE ON feligres BEGIN
+            INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, {_COLUMNAS}) VALUES ('delete', {_VIEJAS});
+        END
+    """))
+    # Solo si cambia un campo indexado: las marcas de sincronización no reindexan
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_au
+        AFTER UPDATE OF {_COLUMNAS} ON feligres BEGIN
+            INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, {_COLUMNAS}) VALUES ('delete', {_VIEJAS});
+            INSERT INTO {TABLA_FTS}(rowid, {_COLUMNAS}) VALUES ({_NUEVAS});
+        END
+    """))
+    conn.execute(text(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')"))
+
+
+def reconstruir_indice_busqueda(engine):
+    """Reconstruye el índice FTS5 desde la tabla feligres (p. ej. tras restaurar)."""
+    with engine.begin() as conn:
+        conn.execute(text(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')"))
+
+# ====================================================================
+# BÚSQUEDA
+# ====================================================================
+
+def terminos_busqueda(texto: str) -> List[str]:
+    """Palabras del texto sin signos (evita la sintaxis de consulta de FTS5)."""
+    return re.findall(r"\w+", texto or "")
+
+
+def _buscar_fts(session: Session, terminos: List[str], limite: int) -> List[Feligres]:
+    # Todas las palabras, cada una como prefijo: "jose garc" → "jose"* "garc"*
+    consulta = " ".join(f'"{t}"*' for t in terminos)
+    # bm25 con más peso al apellido paterno y a la CURP
+    ids = session.execute(text(
+        f"SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH :consulta "
+        f"ORDER BY bm25({TABLA_FTS}, 1.0, 2.0, 1.0, 3.0) LIMIT :limite"
+    ), {'consulta': consulta, 'limite': limite}).scalars().all()
+    return _en_orden(session, ids)
+
+
+def _buscar_pg(session: Session, terminos: List[str], limite: int) -> List[Feligres]:
+    nombre = literal_column(EXPRESION_PG)
+    consulta = " ".join(terminos)
+    statement = select(Feligres).where(
+        *[nombre.ilike(f"%{t}%") for t in terminos]
+    ).order_by(
+        func.similarity(nombre, consulta).desc(), Feligres.apellido_paterno
+    ).limit(limite)
+    return list(session.exec(statement).all())
+
+
+def _buscar_like(session: Session, terminos: List[str], limite: int) -> List[Feligres]:
+    columnas = (Feligres.nombres, Feligres.apellido_paterno, Feligres.apellido_materno, Feligres.curp)
+    statement = select(Feligres).where(
+        *[or_(*[c.ilike(f"%{t}%") for c in columnas]) for t in terminos]
+    ).order_by(Feligres.apellido_paterno, Feligres.nombres).limit(limite)
+    return list(session.exec(statement).all())
+
+
+def _en_orden(session: Session, ids: List[int]) -> List[Feligres]:
+    if not ids:
+        return []
+    por_id = {f.id_feligres: f for f in session.exec(select(Feligres).where(Feligres.id_feligres.in_(ids)))}
+    return [por_id[i] for i in ids if i in por_id]
+
+
+def _tiene_fts(session: Session) -> bool:
+    return session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nombre"),
+        {'nombre': TABLA_FTS}
+    ).first() is not None
+
+
+def buscar_feligres(texto: str, engine, limite: int = 20) -> List[Feligres]:
+    """
+    Los `limite` feligreses que mejor coinciden con `texto` (nombres,
+    apellidos o CURP; palabras parciales; sin importar acentos ni
+    mayúsculas en SQLite). Retorna [] si el texto está vacío.
+    """
+    terminos = terminos_busqueda(texto)
+    if not engine or not terminos:
+        return []
+
+    try:
+        with Session(engine) as session:
+            if engine.dialect.name == 'postgresql':
+                return _buscar_pg(session, terminos, limite)
+            if _tiene_fts(session):
+                return _buscar_fts(session, terminos, limite)
+            return _buscar_like(session, terminos, limite)
+    except Exception as e:
+        print(f"Error al buscar feligreses: {e}")
+        return []
+
+
+__all__ = ['buscar_feligres', 'crear_indice_busqueda', 'reconstruir_indice_busqueda', 'terminos_busqueda']
@@ -0,0 +1,121 @@
+# database/catalogos.py - Caché de tablas catálogo (pocas filas, mucha lectura)
+"""
+Los listados resuelven una y otra vez los mismos grupos, categorías,
+áreas, bodegas, tipos de reunión, salones y actividades con un
+session.get por fila. Este módulo carga cada catálogo completo con una
+sola consulta y después resuelve por id desde un diccionario.
+
+El caché es del proceso y se separa por base (local / remoto). Se
+invalida cuando crear_registro, actualizar_registro, eliminar_registro
+(o sus versiones por lote) tocan la tabla, y cuando la sincronización
+escribe en ella. Como el sincronizador en segundo plano es otro proceso,
+cada catálogo además caduca a los TTL_CATALOGOS segundos.
+
+Los objetos son instancias desligadas de sesión y compartidas: son de
+solo lectura. Para editar, leer el registro con session.get.
+
+Uso:
+    grupo = resolver(GrupoParroquial, t.id_grupo, engine)
+    grupos = resolver_varios(GrupoParroquial, [t.id_grupo for t in filas], engine)
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlmodel import Session, select
+
+# Modelos que se guardan completos en memoria
+CATALOGOS = {
+    'GrupoParroquial', 'CategoriaFinanciera', 'CategoriaInventario', 'AreaParroquial',
+    'Bodega', 'TipoReunion', 'Salon', 'Actividad',
+}
+
+TTL_CATALOGOS = float(os.environ.get("SGP_TTL_CATALOGOS", "300"))
+
+# (base, tabla) → (momento de carga, {id: registro})
+_cache: Dict[Tuple[str, str], Tuple[float, Dict[int, object]]] = {}
+_lock = threading.Lock()
+
+# ====================================================================
+# CARGA
+# ====================================================================
+
+def es_catalogo(modelo_clase) -> bool:
+    return modelo_clase.__name__ in CATALOGOS
+
+
+def _clave(modelo_clase, engine) -> Tuple[str, str]:
+    return (str(engine.url), modelo_clase.__tablename__)
+
+
+def _cargar(modelo_clase, engine) -> Dict[int, object]:
+    pk = list(modelo_clase.__table__.primary_key.columns)[0].name
+    with Session(engine) as session:
+        registros = session.exec(select(modelo_clase)).all()
+    return {getattr(r, pk): r for r in registros}
+
+
+def catalogo(modelo_clase, engine) -> Dict[int, object]:
+    """{id: registro} del catálogo completo; lo carga si no está o caducó."""
+    clave = _clave(modelo_clase, engine)
+    entrada = _cache.get(clave)
+    if entrada and time.monotonic() - entrada[0] < TTL_CATALOGOS:
+        return entrada[1]
+
+    with _lock:
+        entrada = _cache.get(clave)
+        if entrada and time.monotonic() - entrada[0] < TTL_CATALOGOS:
+            return entrada[1]
+        registros = _cargar(modelo_clase, engine)
+        _cache[clave] = (time.monotonic(), registros)
+        return registros
+
+# ====================================================================
+# RESOLUCIÓN
+# ====================================================================
+
+def resolver(modelo_clase, id_registro: Optional[int], engine):
+    """
+    Registro con ese id, o None. Para modelos que no son catálogo hace un
+    session.get normal, así el llamador no tiene que distinguir.
+    """
+    if id_registro is None or engine is None:
+        return None
+    if not es_catalogo(modelo_clase):
+        with Session(engine) as session:
+            return session.get(modelo_clase, id_registro)
+    return catalogo(modelo_clase, engine).get(id_registro)
+
+
+def resolver_varios(modelo_clase, ids: Iterable[Optional[int]], engine) -> Dict[int, object]:
+    """{id: registro} de los ids pedidos que existen (una consulta como máximo)."""
+    buscados = {i for i in ids if i is not None}
+    if not buscados or engine is None:
+        return {}
+    if es_catalogo(modelo_clase):
+        todos = catalogo(modelo_clase, engine)
+        return {i: todos[i] for i in buscados if i in todos}
+
+    pk = getattr(modelo_clase, list(modelo_clase.__table__.primary_key.columns)[0].name)
+    with Session(engine) as session:
+        registros = session.exec(select(modelo_clase).where(pk.in_(buscados))).all()
+    return {getattr(r, pk.key): r for r in registros}
+
+# ====================================================================
+# INVALIDACIÓN
+# ====================================================================
+
+def invalidar(tabla=None):
+    """
+    Olvida el catálogo de `tabla` (nombre o modelo) en todas las bases;
+    sin argumento, olvida todos.
+    """
+    nombre = getattr(tabla, '__tablename__', tabla)
+    with _lock:
+        for clave in [c for c in _cache if nombre is None or c[1] == nombre]:
+            del _cache[clave]
+
+
+__all__ = ['resolver', 'resolver_varios', 'catalogo', 'invalidar', 'es_catalogo', 'CATALOGOS']
@@ -0,0 +1,183 @@
+# database/diario.py - Diario de cambios para la sincronización
+"""
+Captura las altas, cambios y bajas hechas sobre la base local en la tabla
+sync_diario (models_sync.DiarioCambio) mediante eventos de sesión de
+SQLAlchemy. Así las bajas llegan a Supabase y el envío no tiene que
+recorrer todas las tablas buscando sincronizado == False.
+
+Uso:
+    activar_diario(engine)                 # en database/local.get_engine
+    Session(engine, info=SIN_DIARIO)       # escrituras de la propia sincronización
+"""
+
+import json
+import weakref
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from sqlalchemy import event, inspect, insert, select, func
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel
+
+from models_sync import DiarioCambio
+
+# Campos de control que no cuentan como cambio del usuario
+CAMPOS_CONTROL = {'id_local', 'id_remoto', 'sincronizado', 'fecha_sync'}
+
+# Marca para las sesiones que no deben escribir en el diario
+SIN_DIARIO = {'sin_diario': True}
+
+_engines_con_diario = weakref.WeakSet()
+
+# ====================================================================
+# ACTIVACIÓN
+# ====================================================================
+
+def activar_diario(engine):
+    """Empieza a registrar en sync_diario las escrituras hechas con este engine."""
+    _engines_con_diario.add(engine)
+
+
+def diario_activo(session: Session) -> bool:
+    """Indica si los flush de esta sesión deben quedar en el diario."""
+    if session.info.get('sin_diario'):
+        return False
+    return session.bind is not None and session.bind in _engines_con_diario
+
+
+def es_tabla_sincronizable(instancia) -> bool:
+    """Solo se registran los modelos del sistema que se sincronizan."""
+    tabla = getattr(instancia, '__table__', None)
+    return (
+        tabla is not None
+        and tabla.metadata is SQLModel.metadata
+        and 'id_remoto' in tabla.c
+    )
+
+# ====================================================================
+# CAPTURA
+# ====================================================================
+
+def _pk(instancia):
+    # En after_flush las altas aún no tienen identity; se lee la columna
+    estado = inspect(instancia)
+    return estado.mapper.primary_key_from_instance(instancia)[0]
+
+
+def _columnas_cambiadas(instancia) -> List[str]:
+    estado = inspect(instancia)
+    return [
+        attr.key for attr in estado.attrs
+        if attr.key not in CAMPOS_CONTROL and attr.history.has_changes()
+    ]
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_cambios(session, flush_context):
+    """Anota en el diario, dentro de la misma transacción, lo que se acaba de escribir."""
+    if not diario_activo(session):
+        return
+
+    ahora = datetime.now()
+    filas: List[Dict[str, Any]] = []
+
+    for instancia in session.new:
+        if es_tabla_sincronizable(instancia):
+            filas.append({
+                'tabla': instancia.__tablename__, 'id_registro': _pk(instancia),
+                'operacion': 'I', 'columnas': None, 'fecha': ahora,
+            })
+
+    for instancia in session.dirty:
+        if not es_tabla_sincronizable(instancia) or not session.is_modified(instancia):
+            continue
+        columnas = _columnas_cambiadas(instancia)
+        # Cambios solo en banderas de sincronización no generan entrada
+        if columnas:
+            filas.append({
+                'tabla': instancia.__tablename__, 'id_registro': _pk(instancia),
+                'operacion': 'U', 'columnas': json.dumps(columnas), 'fecha': ahora,
+            })
+
+    for instancia in session.deleted:
+        if es_tabla_sincronizable(instancia):
+            filas.append({
+                'tabla': instancia.__tablename__, 'id_registro': _pk(instancia),
+                'operacion': 'D', 'columnas': None, 'fecha': ahora,
+            })
+
+    filas = [f for f in filas if f['id_registro'] is not None]
+    if filas:
+        session.connection().execute(insert(DiarioCambio.__table__), filas)
+
+
+def registrar_en_diario(session: Session, tabla: str, ids: List[int], operacion: str,
+                        columnas: Optional[List[str]] = None):
+    """
+    Anota escrituras hechas sin flush del ORM (INSERT/UPDATE/DELETE masivos,
+    que no disparan after_flush). No hace commit: va en la misma transacción.
+    """
+    if not ids or not diario_activo(session):
+        return
+    ahora = datetime.now()
+    columnas_json = json.dumps(columnas) if columnas and operacion == 'U' else None
+    session.execute(insert(DiarioCambio.__table__), [
+        {'tabla': tabla, 'id_registro': id_registro, 'operacion': operacion,
+         'columnas': columnas_json, 'fecha': ahora}
+        for id_registro in ids
+    ])
+
+# ====================================================================
+# LECTURA Y CONFIRMACIÓN
+# ====================================================================
+
+def leer_diario(engine, tabla: str) -> Dict[int, Dict[str, Any]]:
+    """
+    Entradas pendientes de una tabla, compactadas por registro: para cada
+    id_registro queda la última operación y la secuencia más alta.
+    """
+    diario = DiarioCambio.__table__
+    compactado: Dict[int, Dict[str, Any]] = {}
+
+    with engine.connect() as conn:
+        filas = conn.execute(
+            diario.select()
+            .where(diario.c.tabla == tabla)
+            .order_by(diario.c.secuencia)
+        ).mappings()
+        for fila in filas:
+            previa = compactado.get(fila['id_registro'])
+            operacion = fila['operacion']
+            # Un alta seguida de cambios sigue siendo alta
+            if previa and previa['operacion'] == 'I' and operacion == 'U':
+                operacion = 'I'
+            compactado[fila['id_registro']] = {
+                'operacion': operacion, 'secuencia': fila['secuencia'],
+            }
+
+    return compactado
+
+
+def confirmar_diario(session: Session, tabla: str, ids: List[int], hasta_secuencia: int):
+    """
+    Borra las entradas ya aplicadas en remoto (hasta la secuencia leída;
+    las que llegaron después se conservan). No hace commit.
+    """
+    if not ids:
+        return
+    diario = DiarioCambio.__table__
+    session.execute(
+        diario.delete().where(
+            (diario.c.tabla == tabla)
+            & diario.c.id_registro.in_(ids)
+            & (diario.c.secuencia <= hasta_secuencia)
+        )
+    )
+
+
+def contar_diario(engine) -> int:
+    """Número de entradas pendientes en el diario."""
+    with engine.connect() as conn:
+        return conn.execute(
+            select(func.count()).select_from(DiarioCambio.__table__)
+        ).scalar() or 0
@@ -0,0 +1,255 @@
+# database/instrumentacion.py - Conteo de consultas por ejecución de página
+"""
+Mide cuántas sentencias SQL emite cada ejecución (rerun) de Streamlit,
+cuánto tardan y cuáles se repiten, para decidir qué páginas optimizar.
+
+Los eventos before/after_cursor_execute del engine anotan cada sentencia
+en la medición activa del hilo (Streamlit corre cada rerun en su hilo).
+Las sentencias se agrupan por forma: el SQL con los parámetros ya como
+marcadores y las listas IN (...) / VALUES (...) colapsadas. Una SELECT
+que se repite UMBRAL_N_MAS_1 veces o más en la misma ejecución se marca
+como posible N+1 (p. ej. session.get dentro de un for), con el archivo y
+la línea que la disparó.
+
+Cada ejecución deja una línea JSON en un log rotativo (logs/consultas.log,
+o la ruta de SGP_LOG_CONSULTAS; vacía para desactivarlo).
+
+Uso:
+    instrumentar(engine)                  # una vez por engine
+    iniciar_medicion()                    # al inicio del script
+    medicion = terminar_medicion("💰 Finanzas")
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+import traceback
+import weakref
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+# Repeticiones de una misma SELECT que se consideran posible N+1
+UMBRAL_N_MAS_1 = int(os.environ.get("SGP_UMBRAL_N_MAS_1", "10"))
+
+_raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_LOG = os.environ.get("SGP_LOG_CONSULTAS", os.path.join(_raiz, "logs", "consultas.log"))
+
+_engines_instrumentados = weakref.WeakSet()
+_activa = threading.local()
+_log: Optional[logging.Logger] = None
+_lock_log = threading.Lock()
+
+# Marcos que no cuentan como "origen" de una consulta: la capa de datos
+# no es la que decide el bucle, el módulo que la llama sí
+_RUTAS_INTERNAS = (os.sep + "sqlalchemy" + os.sep, os.sep + "sqlmodel" + os.sep,
+                   os.path.dirname(os.path.abspath(__file__)) + os.sep)
+
+# ====================================================================
+# FORMA DE UNA SENTENCIA
+# ====================================================================
+
+_ESPACIOS = re.compile(r"\s+")
+_MARCADOR = r"(?:\?|%\(\w+\)s|%s|\$\d+)"
+_LISTA_MARCADORES = re.compile(rf"\(\s*{_MARCADOR}(?:\s*,\s*{_MARCADOR})+\s*\)")
+_FILAS_REPETIDAS = re.compile(r"(\([^()]*\))(?:\s*,\s*\([^()]*\))+")
+
+
+def forma_sentencia(statement: str) -> str:
+    """SQL sin el detalle que cambia entre repeticiones (espacios, listas IN, filas VALUES)."""
+    forma = _ESPACIOS.sub(" ", statement).strip()
+    forma = _LISTA_MARCADORES.sub("(…)", forma)
+    return _FILAS_REPETIDAS.sub(r"\1, …", forma)
+
+
+def _origen() -> Optional[str]:
+    """Primer archivo del proyecto en la pila fuera de SQLAlchemy y de database/."""
+    for marco in reversed(traceback.extract_stack()[:-1]):
+        if not marco.filename.startswith(_raiz):
+            continue
+        if any(ruta in marco.filename for ruta in _RUTAS_INTERNAS):
+            continue
+        return f"{os.path.relpath(marco.filename, _raiz)}:{marco.lineno}"
+    return None
+
+# ====================================================================
+# MEDICIÓN DE UNA EJECUCIÓN
+# ====================================================================
+
+class FormaConsulta:
+    """Veces y tiempo acumulado de una misma forma de sentencia."""
+
+    def __init__(self, forma: str):
+        self.forma = forma
+        self.veces = 0
+        self.segundos = 0.0
+        self.origen: Optional[str] = None
+
+    @property
+    def es_select(self) -> bool:
+        return self.forma[:6].upper() == "SELECT"
+
+    def como_dict(self) -> dict:
+        return {
+            'forma': self.forma[:300],
+            'veces': self.veces,
+            'ms': round(self.segundos * 1000, 2),
+            'origen': self.origen,
+        }
+
+
+class MedicionRender:
+    """Sentencias de una ejecución del script, agrupadas por forma."""
+
+    def __init__(self, etiqueta: Optional[str] = None):
+        self.etiqueta = etiqueta
+        self.fecha = datetime.now()
+        self.inicio = time.perf_counter()
+        self.fin: Optional[float] = None
+        self.sentencias = 0
+        self.segundos_sql = 0.0
+        self.por_motor: Dict[str, int] = {}
+        self.formas: Dict[str, FormaConsulta] = {}
+
+    def registrar(self, statement: str, segundos: float, motor: str):
+        forma = forma_sentencia(statement)
+        registro = self.formas.get(forma)
+        if registro is None:
+            registro = self.formas[forma] = FormaConsulta(forma)
+        registro.veces += 1
+        registro.segundos += segundos
+        # La pila solo se inspecciona una vez por forma sospechosa
+        if registro.veces == UMBRAL_N_MAS_1 and registro.es_select:
+            registro.origen = _origen()
+
+        self.sentencias += 1
+        self.segundos_sql += segundos
+        self.por_motor[motor] = self.por_motor.get(motor, 0) + 1
+
+    @property
+    def segundos_total(self) -> float:
+        return (self.fin or time.perf_counter()) - self.inicio
+
+    def repetidas(self, minimo: int = 2) -> List[FormaConsulta]:
+        """Formas ejecutadas al menos `minimo` veces, de la más repetida a la menos."""
+        return sorted(
+            (f for f in self.formas.values() if f.veces >= minimo),
+            key=lambda f: (-f.veces, -f.segundos)
+        )
+
+    def posibles_n_mas_1(self) -> List[FormaConsulta]:
+        return [f for f in self.repetidas(UMBRAL_N_MAS_1) if f.es_select]
+
+    def resumen(self, top: int = 5) -> dict:
+        return {
+            'fecha': self.fecha.isoformat(timespec='seconds'),
+            'pagina': self.etiqueta,
+            'sentencias': self.sentencias,
+            'formas_distintas': len(self.formas),
+            'ms_sql': round(self.segundos_sql * 1000, 2),
+            'ms_total': round(self.segundos_total * 1000, 2),
+            'por_motor': self.por_motor,
+            'repetidas': [f.como_dict() for f in self.repetidas()[:top]],
+            'posibles_n_mas_1': [f.como_dict() for f in self.posibles_n_mas_1()],
+        }
+
+# ====================================================================
+# EVENTOS DEL ENGINE
+# ====================================================================
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_inicios_consulta', []).append(time.perf_counter())
+
+
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get('_inicios_consulta')
+    if not inicios:
+        return
+    segundos = time.perf_counter() - inicios.pop()
+    medicion = medicion_activa()
+    if medicion is not None:
+        medicion.registrar(statement, segundos, conn.dialect.name)
+
+
+def _error(contexto):
+    # Una sentencia fallida no llega a after_cursor_execute: sacar su inicio
+    inicios = contexto.connection.info.get('_inicios_consulta') if contexto.connection else None
+    if inicios:
+        inicios.pop()
+
+
+def instrumentar(engine):
+    """Registra los eventos de medición en `engine` (una sola vez)."""
+    if engine is None or engine in _engines_instrumentados:
+        return engine
+    event.listen(engine, "before_cursor_execute", _antes)
+    event.listen(engine, "after_cursor_execute", _despues)
+    event.listen(engine, "handle_error", _error)
+    _engines_instrumentados.add(engine)
+    return engine
+
+# ====================================================================
+# CICLO POR EJECUCIÓN
+# ====================================================================
+
+def iniciar_medicion(etiqueta: Optional[str] = None) -> MedicionRender:
+    """Empieza a medir las sentencias de este hilo; descarta la medición anterior."""
+    _activa.medicion = MedicionRender(etiqueta)
+    return _activa.medicion
+
+
+def medicion_activa() -> Optional[MedicionRender]:
+    return getattr(_activa, 'medicion', None)
+
+
+def terminar_medicion(etiqueta: Optional[str] = None) -> Optional[MedicionRender]:
+    """Cierra la medición del hilo, la escribe en el log y la retorna."""
+    medicion = medicion_activa()
+    if medicion is None:
+        return None
+    _activa.medicion = None
+
+    medicion.fin = time.perf_counter()
+    if etiqueta is not None:
+        medicion.etiqueta = etiqueta
+    escribir_log(medicion)
+    return medicion
+
+# ====================================================================
+# LOG ROTATIVO
+# ====================================================================
+
+def _logger() -> Optional[logging.Logger]:
+    global _log
+    if not RUTA_LOG:
+        return None
+    with _lock_log:
+        if _log is None:
+            os.makedirs(os.path.dirname(RUTA_LOG) or ".", exist_ok=True)
+            manejador = RotatingFileHandler(RUTA_LOG, maxBytes=1_000_000, backupCount=3, encoding="utf-8")
+            manejador.setFormatter(logging.Formatter("%(message)s"))
+            _log = logging.getLogger("sgp.consultas")
+            _log.setLevel(logging.INFO)
+            _log.propagate = False
+            _log.addHandler(manejador)
+    return _log
+
+
+def escribir_log(medicion: MedicionRender):
+    try:
+        log = _logger()
+        if log is not None:
+            log.info(json.dumps(medicion.resumen(), ensure_ascii=False))
+    except OSError as e:
+        print(f"⚠️ No se pudo escribir el log de consultas: {e}")
+
+
+__all__ = [
+    'instrumentar', 'iniciar_medicion', 'terminar_medicion', 'medicion_activa',
+    'MedicionRender', 'FormaConsulta', 'forma_sentencia', 'UMBRAL_N_MAS_1',
+]
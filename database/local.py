@@ -4,13 +4,21 @@ CAMBIO ARQUITECTÓNICO: Persona → Feligres
 Funciones CRUD actualizadas
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Iterator
 from sqlmodel import create_engine, Session, select, SQLModel
+from sqlalchemy import event, func, literal, union_all, and_, or_, insert, update, delete, bindparam
 from sqlalchemy.exc import IntegrityError
-from datetime import datetime
+from datetime import datetime, date
+from decimal import Decimal
+import threading
+import base64
+import json
 import os
 
 from models import *
+from database.diario import activar_diario, registrar_en_diario
+from database.catalogos import invalidar
+from database.migraciones import migrar
 
 # ====================================================================
 # 1. CONFIGURACIÓN LOCAL
@@ -21,26 +29,141 @@ db_path = os.path.join(current_dir, "parroquia.db")
 
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{db_path}"
 
+# Perfil de PRAGMAs aplicado a cada conexión. Cada valor se puede cambiar
+# con una variable de entorno SQLITE_<PRAGMA> (p. ej. SQLITE_CACHE_SIZE).
+PERFIL_SQLITE = {
+    'journal_mode': 'WAL',        # lectores no bloquean al escritor
+    'synchronous': 'NORMAL',      # seguro con WAL, sin fsync en cada commit
+    'busy_timeout': 10000,        # ms esperando el candado antes de "database is locked"
+    'foreign_keys': 'ON',
+    'cache_size': -65536,         # negativo = KiB (64 MB)
+    'mmap_size': 268435456,       # 256 MB
+    'temp_store': 'MEMORY',
+}
+
 # ====================================================================
 # 2. MOTOR DE BASE DE DATOS
 # ====================================================================
 
-def get_engine():
-    """Crea y retorna el motor de base de datos SQLite."""
-    try:
-        engine = create_engine(
-            SQLALCHEMY_DATABASE_URL,
-            echo=False,
-            connect_args={"check_same_thread": False}
-        )
-        
-        SQLModel.metadata.create_all(engine)
-        print("✅ Base de datos SQLite inicializada con modelo Feligres")
-        return engine
+# Sentencias que no escriben: corren fuera de transacción, como con el driver
+_SOLO_LECTURA = ('SELECT', 'PRAGMA', 'EXPLAIN')
+
+def configurar_transacciones(engine):
+    """
+    El driver sqlite3 no abre la transacción antes de un SAVEPOINT, así que
+    cada begin_nested() se confirmaba solo. Aquí la transacción se abre con
+    BEGIN IMMEDIATE justo antes de la primera sentencia que escribe (o del
+    primer SAVEPOINT), para que un lote de sincronización se confirme o
+    deshaga completo.
+    
+    Las lecturas previas no abren transacción. Un BEGIN diferido que lee y
+    luego escribe falla al instante con "database is locked" si otra
+    conexión confirmó en medio (SQLITE_BUSY_SNAPSHOT en WAL, sin esperar
+    busy_timeout); BEGIN IMMEDIATE toma el candado de escritura al empezar
+    y sí espera su turno.
+    """
+    @event.listens_for(engine, "connect")
+    def _sin_autobegin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _begin_immediate(conn, cursor, statement, parameters, context, executemany):
+        dbapi_connection = conn.connection.dbapi_connection
+        if dbapi_connection.in_transaction:
+            return
+        if statement.lstrip().split(None, 1)[0].upper() in _SOLO_LECTURA:
+            return
+        dbapi_connection.execute("BEGIN IMMEDIATE")
+
+
+def perfil_sqlite(pragmas: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """PERFIL_SQLITE con las variables de entorno y los cambios indicados."""
+    perfil = {
+        nombre: os.getenv(f"SQLITE_{nombre.upper()}", valor)
+        for nombre, valor in PERFIL_SQLITE.items()
+    }
+    perfil.update(pragmas or {})
+    return perfil
+
+
+def aplicar_pragmas(engine, pragmas: Dict[str, Any]):
+    """Ejecuta los PRAGMAs del perfil al abrir cada conexión."""
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for nombre, valor in pragmas.items():
+            cursor.execute(f"PRAGMA {nombre}={valor}")
+        cursor.close()
+
+
+# Valores numéricos con que SQLite reporta algunos PRAGMAs
+_NOMBRES_PRAGMA = {
+    'synchronous': {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'},
+    'temp_store': {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'},
+    'foreign_keys': {0: 'OFF', 1: 'ON'},
+}
+
+def verificar_perfil(engine, pragmas: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Lee los PRAGMAs activos y avisa de los que no quedaron como se pidió
+    (p. ej. WAL no está disponible en carpetas de red). Retorna los activos.
+    """
+    activos = {}
+    with engine.connect() as conn:
+        for nombre in pragmas:
+            valor = conn.exec_driver_sql(f"PRAGMA {nombre}").scalar()
+            activos[nombre] = _NOMBRES_PRAGMA.get(nombre, {}).get(valor, valor)
+    
+    distintos = [
+        nombre for nombre, esperado in pragmas.items()
+        if str(activos[nombre]).upper() != str(esperado).upper()
+    ]
+    resumen = ", ".join(f"{nombre}={valor}" for nombre, valor in activos.items())
+    if distintos:
+        print(f"⚠️ SQLite: no se aplicó {', '.join(distintos)} ({resumen})")
+    else:
+        print(f"✅ SQLite: {resumen}")
+    return activos
+
+
+# Un engine por base de datos y por proceso
+_engines: Dict[str, Any] = {}
+_engines_lock = threading.Lock()
+
+def get_engine(database_url: str = SQLALCHEMY_DATABASE_URL,
+               pragmas: Optional[Dict[str, Any]] = None):
+    """
+    Retorna el motor SQLite compartido (parroquia.db por defecto).
+    La primera llamada del proceso lo crea, aplica el perfil de PRAGMAs,
+    verifica la configuración y aplica las migraciones pendientes; las
+    siguientes reutilizan el mismo engine.
+    """
+    with _engines_lock:
+        if database_url in _engines:
+            return _engines[database_url]
         
-    except Exception as e:
-        print(f"❌ Error conectando a SQLite: {e}")
-        return None
+        try:
+            engine = create_engine(
+                database_url,
+                echo=False,
+                connect_args={"check_same_thread": False}
+            )
+            
+            perfil = perfil_sqlite(pragmas)
+            configurar_transacciones(engine)
+            aplicar_pragmas(engine, perfil)
+            verificar_perfil(engine, perfil)
+            
+            migrar(engine, 'local')
+            activar_diario(engine)
+            print("✅ Base de datos SQLite inicializada con modelo Feligres")
+            
+            _engines[database_url] = engine
+            return engine
+            
+        except Exception as e:
+            print(f"❌ Error conectando a SQLite: {e}")
+            return None
 
 # ====================================================================
 # 3. FUNCIONES CRUD CON MARCADO DE SINCRONIZACIÓN
@@ -61,6 +184,7 @@ def crear_registro(registro: SQLModel, engine, st_display_func,
             
             session.add(registro)
             session.commit()
+            invalidar(type(registro))
             session.refresh(registro)
             
             if not synchronize:
@@ -94,6 +218,7 @@ def actualizar_registro(modelo_clase, registro_id: int, datos: Dict[str, Any],
                 
                 session.add(registro)
                 session.commit()
+                invalidar(modelo_clase)
                 st_display_func(f"✅ {nombre_tabla} actualizado en SQLite (pendiente de sincronizar)")
                 return True
             st_display_func(f"❌ {nombre_tabla} no encontrado", is_error=True)
@@ -104,13 +229,17 @@ def actualizar_registro(modelo_clase, registro_id: int, datos: Dict[str, Any],
 
 def eliminar_registro(modelo_clase, registro_id: int, engine, st_display_func,
                      synchronize: bool = False, nombre_tabla: str = "Registro") -> bool:
-    """Elimina un registro de SQLite."""
+    """
+    Elimina un registro de SQLite.
+    La baja queda en el diario de cambios y se replica en Supabase al sincronizar.
+    """
     try:
         with Session(engine) as session:
             registro = session.get(modelo_clase, registro_id)
             if registro:
                 session.delete(registro)
                 session.commit()
+                invalidar(modelo_clase)
                 if not synchronize:
                     st_display_func(f"⚠️ {nombre_tabla} eliminado de SQLite", is_warning=True)
                 return True
@@ -121,6 +250,142 @@ def eliminar_registro(modelo_clase, registro_id: int, engine, st_display_func,
             st_display_func(f"❌ Error eliminando {nombre_tabla}: {e}", is_error=True)
         return False
 
+# ====================================================================
+# 3b. ESCRITURA POR LOTES (UNA TRANSACCIÓN)
+# ====================================================================
+
+CAMPOS_SYNC_PENDIENTE = {'sincronizado': False, 'fecha_sync': None}
+
+def _en_trozos(valores: List, tamano: int = 500):
+    for i in range(0, len(valores), tamano):
+        yield valores[i:i + tamano]
+
+def _pk_columna(modelo_clase):
+    return list(modelo_clase.__table__.primary_key.columns)[0]
+
+def _ids_existentes(session: Session, modelo_clase, ids: List[int]) -> List[int]:
+    pk = _pk_columna(modelo_clase)
+    existentes = set()
+    for trozo in _en_trozos(list(ids)):
+        existentes.update(session.exec(select(pk).where(pk.in_(trozo))).all())
+    return [i for i in ids if i in existentes]
+
+def crear_registros_lote(registros: List[SQLModel], engine, st_display_func,
+                         synchronize: bool = False, nombre_tabla: str = "Registros") -> List[int]:
+    """
+    Crea muchos registros del mismo modelo en una sola transacción
+    (INSERT con executemany), marcados como NO SINCRONIZADOS.
+    Retorna los ids asignados en el mismo orden; [] si algo falla.
+    """
+    if not registros:
+        return []
+    
+    modelo_clase = type(registros[0])
+    tabla = modelo_clase.__table__
+    pk = _pk_columna(modelo_clase)
+    
+    filas = []
+    for registro in registros:
+        fila = {c.name: getattr(registro, c.name, None) for c in tabla.columns if c.name != pk.name}
+        if 'sincronizado' in tabla.c:
+            fila.update(CAMPOS_SYNC_PENDIENTE, id_remoto=None)
+        filas.append(fila)
+    
+    try:
+        with Session(engine) as session:
+            ids = list(session.execute(
+                insert(tabla).returning(pk, sort_by_parameter_order=True), filas
+            ).scalars())
+            registrar_en_diario(session, tabla.name, ids, 'I')
+            session.commit()
+            invalidar(modelo_clase)
+        
+        for registro, id_registro in zip(registros, ids):
+            setattr(registro, pk.name, id_registro)
+        
+        if not synchronize:
+            st_display_func(f"✅ {len(ids)} {nombre_tabla} creados en SQLite (pendientes de sincronizar)")
+        return ids
+    except Exception as e:
+        if not synchronize:
+            st_display_func(f"❌ Error creando {nombre_tabla}: {e}", is_error=True)
+        return []
+
+def actualizar_registros_lote(modelo_clase, cambios: Dict[int, Dict[str, Any]], engine,
+                              st_display_func, nombre_tabla: str = "Registros") -> List[int]:
+    """
+    Aplica {id: {campo: valor}} en una sola transacción (UPDATE con
+    executemany por llave primaria) y marca las filas como NO SINCRONIZADAS.
+    Retorna los ids actualizados; los que no existen se omiten.
+    """
+    if not cambios:
+        return []
+    
+    tabla = modelo_clase.__table__
+    pk = _pk_columna(modelo_clase)
+    
+    try:
+        with Session(engine) as session:
+            ids = _ids_existentes(session, modelo_clase, list(cambios))
+            
+            # executemany agrupa por conjunto de columnas
+            por_columnas: Dict[tuple, List[Dict[str, Any]]] = {}
+            for id_registro in ids:
+                datos = {k: v for k, v in cambios[id_registro].items() if k in tabla.c and k != pk.name}
+                if 'sincronizado' in tabla.c:
+                    datos.update(CAMPOS_SYNC_PENDIENTE)
+                por_columnas.setdefault(tuple(sorted(datos)), []).append({'_id': id_registro, **datos})
+            
+            for columnas, filas in por_columnas.items():
+                if not columnas:
+                    continue
+                session.execute(
+                    update(tabla)
+                    .where(pk == bindparam('_id'))
+                    .values({c: bindparam(c) for c in columnas}),
+                    filas
+                )
+                cambiadas = [c for c in columnas if c not in CAMPOS_SYNC_PENDIENTE]
+                registrar_en_diario(session, tabla.name, [f['_id'] for f in filas], 'U', cambiadas)
+            
+            session.commit()
+            invalidar(modelo_clase)
+        
+        st_display_func(f"✅ {len(ids)} {nombre_tabla} actualizados en SQLite (pendientes de sincronizar)")
+        return ids
+    except Exception as e:
+        st_display_func(f"❌ Error actualizando {nombre_tabla}: {e}", is_error=True)
+        return []
+
+def eliminar_registros_lote(modelo_clase, ids: List[int], engine, st_display_func,
+                            synchronize: bool = False, nombre_tabla: str = "Registros") -> List[int]:
+    """
+    Elimina varios registros en una sola transacción. Las bajas quedan en el
+    diario de cambios. Retorna los ids eliminados; [] si algo falla.
+    """
+    if not ids:
+        return []
+    
+    tabla = modelo_clase.__table__
+    pk = _pk_columna(modelo_clase)
+    
+    try:
+        with Session(engine) as session:
+            existentes = _ids_existentes(session, modelo_clase, list(ids))
+            for trozo in _en_trozos(existentes):
+                session.execute(delete(tabla).where(pk.in_(trozo)))
+            registrar_en_diario(session, tabla.name, existentes, 'D')
+            session.commit()
+            invalidar(modelo_clase)
+        
+        if not synchronize:
+            st_display_func(f"⚠️ {len(existentes)} {nombre_tabla} eliminados de SQLite", is_warning=True)
+        return existentes
+    except Exception as e:
+        if not synchronize:
+            st_display_func(f"❌ Error eliminando {nombre_tabla}: {e}", is_error=True)
+        return []
+
 def leer_registros(modelo_clase, engine, limit: Optional[int] = None) -> List:
     """Lee registros de SQLite."""
     if not engine:
@@ -135,36 +400,179 @@ def leer_registros(modelo_clase, engine, limit: Optional[int] = None) -> List:
         print(f"Error leyendo {modelo_clase.__name__}: {e}")
         return []
 
-def contar_pendientes_sincronizacion(engine) -> int:
-    """Cuenta cuántos registros están pendientes de sincronizar."""
+# ====================================================================
+# LECTURA PAGINADA (KEYSET) Y EN STREAMING
+# ====================================================================
+
+def _columnas_orden(modelo_clase, orden: Optional[str]):
+    """(columna de orden, llave primaria); sin orden se pagina solo por la llave."""
+    pk = list(modelo_clase.__table__.primary_key.columns)[0]
+    columna = modelo_clase.__table__.c[orden] if orden else None
+    return columna, pk
+
+def _codificar_cursor(valores: Dict[str, Any]) -> str:
+    texto = json.dumps(valores, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+def _decodificar_cursor(cursor: str) -> Dict[str, Any]:
+    relleno = '=' * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(cursor + relleno))
+
+def _valor_de_cursor(columna, valor):
+    """Restaura el tipo de un valor guardado en el cursor como texto."""
+    if valor is None:
+        return None
+    try:
+        tipo = columna.type.python_type
+    except NotImplementedError:
+        return valor
+    if tipo is datetime:
+        return datetime.fromisoformat(valor)
+    if tipo is date:
+        return date.fromisoformat(valor)
+    if tipo is Decimal:
+        return Decimal(valor)
+    return valor
+
+def _condicion_despues_de(columna, pk, valor, ultimo_id, descendente: bool):
+    """
+    Filas posteriores a (valor, ultimo_id) en el orden de la página.
+    Los NULL van primero en orden ascendente y al final en descendente.
+    """
+    if columna is None:
+        return pk < ultimo_id if descendente else pk > ultimo_id
+    if not descendente:
+        if valor is None:
+            return or_(columna.is_not(None), and_(columna.is_(None), pk > ultimo_id))
+        return or_(columna > valor, and_(columna == valor, pk > ultimo_id))
+    if valor is None:
+        return and_(columna.is_(None), pk < ultimo_id)
+    return or_(columna < valor, and_(columna == valor, pk < ultimo_id), columna.is_(None))
+
+def leer_pagina(modelo_clase, engine, cursor: Optional[str] = None, tamano: int = 50,
+                orden: Optional[str] = None, descendente: bool = False,
+                filtros: Optional[List] = None) -> Tuple[List, Optional[str]]:
+    """
+    Lee una página con paginación por llave (keyset): en vez de OFFSET se
+    continúa después de la última fila vista, así cada página cuesta lo
+    mismo sin importar cuántas filas haya antes.
+    
+    orden: columna de orden (la llave primaria desempata); por defecto la llave.
+    filtros: condiciones extra, p. ej. [Modelo.activo == True].
+    Retorna (registros, cursor_siguiente); cursor_siguiente es None en la última página.
+    """
     if not engine:
-        return 0
+        return [], None
+    
+    columna, pk = _columnas_orden(modelo_clase, orden)
+    statement = select(modelo_clase)
+    for filtro in filtros or []:
+        statement = statement.where(filtro)
+    
+    if cursor:
+        posicion = _decodificar_cursor(cursor)
+        if posicion.get('orden') != orden or posicion.get('desc') != descendente:
+            raise ValueError("El cursor pertenece a otro orden de página")
+        valor = _valor_de_cursor(columna, posicion['valor']) if columna is not None else None
+        statement = statement.where(
+            _condicion_despues_de(columna, pk, valor, posicion['id'], descendente)
+        )
+    
+    if columna is not None:
+        statement = statement.order_by(
+            columna.desc().nulls_last() if descendente else columna.asc().nulls_first()
+        )
+    statement = statement.order_by(pk.desc() if descendente else pk.asc())
     
     try:
-        from sync_manager import SYNC_ORDER
-        modelos = SYNC_ORDER
-    except ImportError:
-        from models import SYNC_ORDER_COMPLETE
-        modelos = SYNC_ORDER_COMPLETE
+        with Session(engine) as session:
+            # Una fila de más indica si hay página siguiente
+            registros = session.exec(statement.limit(tamano + 1)).all()
+    except Exception as e:
+        print(f"Error leyendo {modelo_clase.__name__}: {e}")
+        return [], None
     
-    total = 0
+    if len(registros) <= tamano:
+        return registros, None
+    
+    registros = registros[:tamano]
+    ultimo = registros[-1]
+    siguiente = _codificar_cursor({
+        'orden': orden,
+        'desc': descendente,
+        'valor': getattr(ultimo, orden) if orden else None,
+        'id': getattr(ultimo, pk.name),
+    })
+    return registros, siguiente
+
+def iterar_registros(modelo_clase, engine, tamano_lote: int = 1000,
+                     orden: Optional[str] = None, descendente: bool = False,
+                     filtros: Optional[List] = None) -> Iterator:
+    """
+    Generador para exportaciones: recorre la tabla completa con yield_per,
+    trayendo `tamano_lote` filas a la vez en lugar de cargarla entera.
+    """
+    if not engine:
+        return
+    
+    columna, pk = _columnas_orden(modelo_clase, orden)
+    statement = select(modelo_clase)
+    for filtro in filtros or []:
+        statement = statement.where(filtro)
+    if columna is not None:
+        statement = statement.order_by(columna.desc() if descendente else columna.asc())
+    statement = statement.order_by(pk.desc() if descendente else pk.asc())
+    
+    with Session(engine) as session:
+        resultado = session.exec(statement.execution_options(yield_per=tamano_lote))
+        for registro in resultado:
+            yield registro
+            # Las filas ya entregadas no se quedan en el mapa de identidad
+            session.expunge(registro)
+
+def tablas_con_pendientes() -> List:
+    """Tablas del sistema con bandera sincronizado."""
+    # Sin orden: sorted_tables exige resolver todas las llaves foráneas
+    return [t for t in SQLModel.metadata.tables.values() if 'sincronizado' in t.c]
+
+_consultas_pendientes: Dict[tuple, Any] = {}
+
+def _consulta_pendientes():
+    # Se arma una vez por conjunto de tablas; así SQLAlchemy reutiliza la compilación
+    tablas = tuple(tablas_con_pendientes())
+    if not tablas:
+        return None
+    if tablas not in _consultas_pendientes:
+        _consultas_pendientes[tablas] = union_all(*[
+            select(literal(tabla.name).label('tabla'), func.count().label('pendientes'))
+            .select_from(tabla)
+            .where(tabla.c.sincronizado == False)
+            for tabla in tablas
+        ])
+    return _consultas_pendientes[tablas]
+
+def contar_pendientes_por_tabla(engine) -> Dict[str, int]:
+    """
+    {tabla: registros con sincronizado = 0}, solo las tablas con pendientes.
+    Una sola consulta: UNION ALL de COUNT(*) servidos por los índices
+    parciales (migración v003_indices_pendientes).
+    """
+    if not engine:
+        return {}
     
     try:
-        for modelo in modelos:
-            if hasattr(modelo, 'sincronizado'):
-                try:
-                    with Session(engine) as session:
-                        count = len([
-                            r for r in session.exec(select(modelo)).all()
-                            if not r.sincronizado
-                        ])
-                        total += count
-                except:
-                    continue
-        return total
+        consulta = _consulta_pendientes()
+        if consulta is None:
+            return {}
+        with engine.connect() as conn:
+            return {tabla: n for tabla, n in conn.execute(consulta) if n}
     except Exception as e:
         print(f"Error contando pendientes: {e}")
-        return 0
+        return {}
+
+def contar_pendientes_sincronizacion(engine) -> int:
+    """Cuenta cuántos registros están pendientes de sincronizar."""
+    return sum(contar_pendientes_por_tabla(engine).values())
 
 # ====================================================================
 # 4. FUNCIONES ESPECÍFICAS PARA FELIGRES (antes Persona)
@@ -0,0 +1,129 @@
+# database/migraciones/__init__.py - Migraciones versionadas del esquema
+"""
+Reemplaza el create_all de cada arranque. La versión aplicada vive en la
+tabla esquema_version; si ya es la última, el arranque solo hace un
+SELECT max(version) y no toca el catálogo.
+
+Cada migración es un módulo vNNN_descripcion.py de esta carpeta con:
+    DESTINOS = ('local', 'remoto')   # dónde aplica
+    def aplicar(conn): ...           # recibe la conexión en transacción
+
+La primera línea del docstring del módulo es la descripción. Las
+migraciones se aplican en orden, cada una en su propia transacción
+(SQLite y PostgreSQL admiten DDL transaccional). Una versión que no
+aplica a un destino se registra igual, para que la versión sea la misma.
+
+Para agregar una tabla, columna o índice: crear el siguiente vNNN_*.py;
+no editar migraciones ya publicadas.
+"""
+
+from typing import List, Optional, Tuple
+from types import ModuleType
+from datetime import datetime
+import importlib
+import pkgutil
+import re
+
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, select, func, text
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+_metadata = MetaData()
+
+esquema_version = Table(
+    "esquema_version", _metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("descripcion", String(200), nullable=False),
+    Column("fecha_aplicada", DateTime, nullable=False),
+)
+
+# Llave del candado consultivo de PostgreSQL (dos arranques a la vez)
+_CANDADO_PG = 7305150001
+
+_migraciones: Optional[List[Tuple[int, str, ModuleType]]] = None
+
+# ====================================================================
+# DESCUBRIMIENTO
+# ====================================================================
+
+def listar_migraciones() -> List[Tuple[int, str, ModuleType]]:
+    """[(version, descripcion, modulo)] ordenadas por versión."""
+    global _migraciones
+    if _migraciones is None:
+        encontradas = []
+        for info in pkgutil.iter_modules(__path__):
+            coincidencia = re.match(r"v(\d+)_", info.name)
+            if not coincidencia:
+                continue
+            modulo = importlib.import_module(f"{__name__}.{info.name}")
+            descripcion = (modulo.__doc__ or info.name).strip().splitlines()[0]
+            encontradas.append((int(coincidencia.group(1)), descripcion[:200], modulo))
+        encontradas.sort(key=lambda m: m[0])
+        _migraciones = encontradas
+    return _migraciones
+
+
+def ultima_version() -> int:
+    migraciones = listar_migraciones()
+    return migraciones[-1][0] if migraciones else 0
+
+# ====================================================================
+# VERSIÓN APLICADA
+# ====================================================================
+
+def version_actual(engine) -> Optional[int]:
+    """Versión aplicada; None si la base aún no tiene esquema_version."""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(func.max(esquema_version.c.version))).scalar() or 0
+    except DBAPIError:
+        return None
+
+
+def _version_en_transaccion(conn) -> int:
+    if conn.dialect.name == 'postgresql':
+        # Otro proceso pudo migrar mientras esperábamos el candado
+        conn.execute(text("SELECT pg_advisory_xact_lock(:llave)"), {'llave': _CANDADO_PG})
+    return conn.execute(select(func.max(esquema_version.c.version))).scalar() or 0
+
+# ====================================================================
+# EJECUCIÓN
+# ====================================================================
+
+def migrar(engine, destino: str) -> int:
+    """
+    Lleva la base de `destino` ('local' o 'remoto') a la última versión.
+    Retorna la versión final. Si ya está al día, cuesta una sola consulta.
+    """
+    objetivo = ultima_version()
+    actual = version_actual(engine)
+
+    if actual is not None and actual >= objetivo:
+        return actual
+
+    if actual is None:
+        with engine.begin() as conn:
+            _metadata.create_all(conn)
+
+    for version, descripcion, modulo in listar_migraciones():
+        if actual is not None and version <= actual:
+            continue
+        try:
+            aplica = destino in getattr(modulo, 'DESTINOS', ('local', 'remoto'))
+            with engine.begin() as conn:
+                if version <= _version_en_transaccion(conn):
+                    continue
+                if aplica:
+                    modulo.aplicar(conn)
+                conn.execute(esquema_version.insert().values(
+                    version=version, descripcion=descripcion, fecha_aplicada=datetime.now()
+                ))
+            if aplica:
+                print(f"🗄️ Migración {version:03d} aplicada ({destino}): {descripcion}")
+        except IntegrityError:
+            # Otro proceso registró la misma versión primero
+            continue
+
+    return ultima_version()
+
+
+__all__ = ['migrar', 'version_actual', 'ultima_version', 'listar_migraciones']
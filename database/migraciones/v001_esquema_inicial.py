@@ -0,0 +1,11 @@
+# database/migraciones/v001_esquema_inicial.py
+"""Esquema inicial: todas las tablas de models.py."""
+
+from sqlmodel import SQLModel
+
+DESTINOS = ('local', 'remoto')
+
+
+def aplicar(conn):
+    # checkfirst: en bases existentes solo crea las tablas que falten
+    SQLModel.metadata.create_all(conn)
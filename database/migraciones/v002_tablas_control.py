@@ -0,0 +1,10 @@
+# database/migraciones/v002_tablas_control.py
+"""Tablas de control de la sincronización (cursores, mapa de ids, diario)."""
+
+from models_sync import crear_tablas_control
+
+DESTINOS = ('local',)
+
+
+def aplicar(conn):
+    crear_tablas_control(conn)
@@ -0,0 +1,21 @@
+# database/migraciones/v003_indices_pendientes.py
+"""Índices parciales WHERE sincronizado = 0 para contar pendientes."""
+
+from sqlalchemy import text
+from sqlmodel import SQLModel
+
+DESTINOS = ('local',)
+
+
+def aplicar(conn):
+    # Solo contienen las filas sucias: el conteo de la barra lateral no
+    # recorre las tablas (database/local.contar_pendientes_por_tabla)
+    # Sin orden: sorted_tables exige resolver todas las llaves foráneas
+    for tabla in SQLModel.metadata.tables.values():
+        if 'sincronizado' not in tabla.c:
+            continue
+        pk = list(tabla.primary_key.columns)[0].name
+        conn.execute(text(
+            f'CREATE INDEX IF NOT EXISTS "ix_{tabla.name}_pendiente" '
+            f'ON "{tabla.name}" ("{pk}") WHERE sincronizado = 0'
+        ))
@@ -0,0 +1,19 @@
+# database/migraciones/v004_indices_fecha_sync.py
+"""Índices sobre fecha_sync en Supabase para la descarga incremental."""
+
+from sqlalchemy import text
+from sqlmodel import SQLModel
+
+DESTINOS = ('remoto',)
+
+
+def aplicar(conn):
+    # sync_manager.consulta_incremental filtra por pk > marca OR fecha_sync >= marca
+    # Sin orden: sorted_tables exige resolver todas las llaves foráneas
+    for tabla in SQLModel.metadata.tables.values():
+        if 'fecha_sync' not in tabla.c:
+            continue
+        conn.execute(text(
+            f'CREATE INDEX IF NOT EXISTS "ix_{tabla.name}_fecha_sync" '
+            f'ON "{tabla.name}" (fecha_sync)'
+        ))
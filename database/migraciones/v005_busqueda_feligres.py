@@ -0,0 +1,10 @@
+# database/migraciones/v005_busqueda_feligres.py
+"""Índice de búsqueda de feligreses: FTS5 en SQLite, pg_trgm en Supabase."""
+
+from database.busqueda import crear_indice_busqueda
+
+DESTINOS = ('local', 'remoto')
+
+
+def aplicar(conn):
+    crear_indice_busqueda(conn)
@@ -0,0 +1,32 @@
+# database/migraciones/v006_sello_fecha_sync.py
+"""fecha_sync sellada por Supabase (trigger BEFORE INSERT OR UPDATE)."""
+
+from sqlalchemy import text
+from sqlmodel import SQLModel
+
+DESTINOS = ('remoto',)
+
+
+def aplicar(conn):
+    # La marca de agua de la descarga incremental compara fecha_sync remotas:
+    # si las sella cada cliente, un reloj atrasado o una edición hecha
+    # directamente en Supabase quedan detrás de la marca y no se descargan.
+    # Con el trigger todas salen del reloj del servidor, en cada escritura.
+    if conn.dialect.name != 'postgresql':
+        return
+
+    conn.execute(text(
+        "CREATE OR REPLACE FUNCTION sgp_sellar_fecha_sync() RETURNS trigger "
+        "LANGUAGE plpgsql AS $$ "
+        "BEGIN NEW.fecha_sync := clock_timestamp(); RETURN NEW; END $$"
+    ))
+    # Sin orden: sorted_tables exige resolver todas las llaves foráneas
+    for tabla in SQLModel.metadata.tables.values():
+        if 'fecha_sync' not in tabla.c:
+            continue
+        conn.execute(text(f'DROP TRIGGER IF EXISTS "trg_{tabla.name}_fecha_sync" ON "{tabla.name}"'))
+        conn.execute(text(
+            f'CREATE TRIGGER "trg_{tabla.name}_fecha_sync" '
+            f'BEFORE INSERT OR UPDATE ON "{tabla.name}" '
+            f'FOR EACH ROW EXECUTE FUNCTION sgp_sellar_fecha_sync()'
+        ))
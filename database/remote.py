@@ -1,11 +1,18 @@
 # database/remote.py - CONEXIÓN A SUPABASE (PostgreSQL)
 from typing import List, Optional, Dict, Any
 from sqlmodel import create_engine, Session, select, SQLModel, text
+from sqlalchemy import func, literal, cast, null, union_all, DateTime, insert, update, bindparam
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 import os
+import time
+import random
+import threading
 import urllib.parse
 
+from database.migraciones import migrar
+from database.catalogos import invalidar
+
 # Importación de modelos y orden de sincronización
 try:
     from models import SQLModel, SYNC_ORDER_COMPLETE
@@ -25,41 +32,55 @@ SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD", "Tlacolula70400")
 # 2. Puerto: El pooler de Supabase requiere obligatoriamente el puerto 6543
 SUPABASE_PORT = os.getenv("SUPABASE_PORT", "6543")
 
+# 3. Conexiones: tope de este proceso hacia el pooler, entre todos sus pools.
+# Un tercio es del pool asíncrono (database/remote_async.py, consultas a la
+# vez) y el resto del engine síncrono; juntos nunca pasan del tope.
+CONEXIONES_SUPABASE = max(2, int(os.getenv("SGP_CONEXIONES_SUPABASE", "15")))
+CONEXIONES_ASINCRONAS = max(1, CONEXIONES_SUPABASE // 3)
+CONEXIONES_SINCRONAS = CONEXIONES_SUPABASE - CONEXIONES_ASINCRONAS
+POOL_SINCRONO = min(5, CONEXIONES_SINCRONAS)   # conexiones estables; el resto, desborde
+
+def url_conexion(driver: str = "psycopg2") -> str:
+    """URL de Supabase para el driver indicado (psycopg2, o psycopg para asyncio)."""
+    # Codificamos la contraseña para manejar caracteres especiales
+    password_encoded = urllib.parse.quote_plus(SUPABASE_PASSWORD)
+    return (
+        f"postgresql+{driver}://{SUPABASE_USER}:{password_encoded}"
+        f"@{SUPABASE_HOST}:{SUPABASE_PORT}/{SUPABASE_DB}"
+    )
+
+def _crear_engine(connect_timeout: int = 30):
+    """Engine de Supabase sin conectar todavía."""
+    return create_engine(
+        url_conexion("psycopg2"),
+        pool_size=POOL_SINCRONO,
+        max_overflow=CONEXIONES_SINCRONAS - POOL_SINCRONO,
+        pool_recycle=1800,
+        pool_pre_ping=True, # Verifica la conexión antes de cada uso
+        connect_args={
+            'connect_timeout': connect_timeout,
+            'application_name': 'Sistema_Parroquial'
+        },
+        echo=False
+    )
+
 def get_engine():
-    """Crea conexión a PostgreSQL de Supabase."""
+    """
+    Crea conexión a PostgreSQL de Supabase (bloquea hasta conectar).
+    La app usa conexion_en_segundo_plano(); esto queda para la línea de comandos.
+    """
     try:
-        # Codificamos la contraseña para manejar caracteres especiales
-        password_encoded = urllib.parse.quote_plus(SUPABASE_PASSWORD)
-        
-        # Construcción de la URL de conexión (psycopg2)
-        connection_string = (
-            f"postgresql+psycopg2://{SUPABASE_USER}:{password_encoded}"
-            f"@{SUPABASE_HOST}:{SUPABASE_PORT}/{SUPABASE_DB}"
-        )
-        
         print(f"🔗 Intentando conectar a: {SUPABASE_HOST} por puerto {SUPABASE_PORT}...")
         
-        engine = create_engine(
-            connection_string,
-            pool_size=5,
-            max_overflow=10,
-            pool_recycle=1800,
-            pool_pre_ping=True, # Verifica la conexión antes de cada uso
-            connect_args={
-                'connect_timeout': 30,
-                'application_name': 'Sistema_Parroquial'
-            },
-            echo=False
-        )
+        engine = _crear_engine()
         
         # Prueba de conexión real
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
             print("✅ ¡Conexión exitosa a Supabase!")
         
-        # Intentar creación automática de tablas al conectar
-        # Nota: Solo crea las tablas que no existan
-        SQLModel.metadata.create_all(engine)
+        # Migraciones pendientes; si el esquema está al día es una sola consulta
+        migrar(engine, 'remoto')
         
         return engine
         
@@ -67,6 +88,137 @@ def get_engine():
         print(f"❌ Error crítico de conexión: {str(e)}")
         return None
 
+# ====================================================================
+# CONEXIÓN EN SEGUNDO PLANO (SALUD Y CORTACIRCUITOS)
+# ====================================================================
+# La app nunca espera a la red: un hilo crea el engine, aplica migraciones
+# y lo sondea cada INTERVALO_SALUD segundos. Estados:
+#   conectando - primer intento en curso
+#   activa     - responde bien
+#   degradada  - responde lento o falló hace poco (aún se usa)
+#   caida      - circuito abierto: la app trabaja en local hasta el
+#                próximo intento, con espera exponencial entre intentos
+
+CONNECT_TIMEOUT_FONDO = 5           # s por intento en segundo plano
+INTERVALO_SALUD = 30.0              # s entre sondeos con la conexión arriba
+LATENCIA_DEGRADADA_MS = 1000.0      # SELECT 1 más lento que esto = degradada
+FALLOS_PARA_ABRIR = 3               # fallos seguidos que abren el circuito
+ESPERA_BASE = 2.0                   # s; se duplica con cada fallo
+ESPERA_MAXIMA = 300.0
+
+class ConexionRemota:
+    """Estado compartido de la conexión a Supabase (uno por proceso)."""
+    
+    def __init__(self):
+        self.estado = "conectando"
+        self.engine = None
+        self.fallos_seguidos = 0
+        self.ultimo_error: Optional[str] = None
+        self.latencia_ms: Optional[float] = None
+        self.desde = datetime.now()
+        self.proximo_intento: Optional[float] = None   # time.monotonic()
+        self._migrado = False
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+    
+    # --- Consulta desde la app ---
+    
+    @property
+    def disponible(self) -> bool:
+        """True si se puede usar el remoto (circuito cerrado)."""
+        return self.engine is not None and self.estado in ("activa", "degradada")
+    
+    def engine_disponible(self):
+        return self.engine if self.disponible else None
+    
+    def segundos_para_reintento(self) -> Optional[float]:
+        if self.proximo_intento is None:
+            return None
+        return max(0.0, self.proximo_intento - time.monotonic())
+    
+    # --- Resultados (del sondeo o de quien use el engine) ---
+    
+    def _cambiar(self, estado: str):
+        if estado != self.estado:
+            self.estado = estado
+            self.desde = datetime.now()
+            print(f"🛰️ Supabase: {estado}")
+    
+    def registrar_exito(self, latencia_ms: Optional[float] = None):
+        with self._lock:
+            self.fallos_seguidos = 0
+            self.ultimo_error = None
+            self.proximo_intento = None
+            if latencia_ms is not None:
+                self.latencia_ms = latencia_ms
+            lenta = self.latencia_ms is not None and self.latencia_ms > LATENCIA_DEGRADADA_MS
+            self._cambiar("degradada" if lenta else "activa")
+    
+    def registrar_fallo(self, error) -> float:
+        """Anota un fallo y retorna la espera antes del siguiente intento."""
+        with self._lock:
+            self.fallos_seguidos += 1
+            self.ultimo_error = str(error).strip().splitlines()[0][:300] if str(error).strip() else repr(error)
+            espera = min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** (self.fallos_seguidos - 1))
+            espera *= random.uniform(0.8, 1.2)
+            if self.engine is None or self.fallos_seguidos >= FALLOS_PARA_ABRIR:
+                self._cambiar("caida")
+                self.proximo_intento = time.monotonic() + espera
+            else:
+                self._cambiar("degradada")
+            return espera
+    
+    def reintentar_ahora(self):
+        """Adelanta el siguiente intento (botón de la barra lateral)."""
+        self._despertar.set()
+    
+    # --- Hilo ---
+    
+    def iniciar(self):
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._hilo = threading.Thread(target=self._bucle, name="conexion-supabase", daemon=True)
+            self._hilo.start()
+    
+    def _sondear(self) -> float:
+        """Un intento de conexión o sondeo de salud; retorna la espera siguiente."""
+        try:
+            if self.engine is None:
+                engine = _crear_engine(connect_timeout=CONNECT_TIMEOUT_FONDO)
+            else:
+                engine = self.engine
+            
+            inicio = time.perf_counter()
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            latencia_ms = (time.perf_counter() - inicio) * 1000
+            
+            if not self._migrado:
+                migrar(engine, 'remoto')
+                self._migrado = True
+            
+            self.engine = engine
+            self.registrar_exito(latencia_ms)
+            return INTERVALO_SALUD
+        except Exception as e:
+            return self.registrar_fallo(e)
+    
+    def _bucle(self):
+        while True:
+            espera = self._sondear()
+            if self._despertar.wait(espera):
+                self._despertar.clear()
+
+
+_conexion = ConexionRemota()
+
+def conexion_en_segundo_plano() -> ConexionRemota:
+    """Arranca (una vez) la conexión en segundo plano y retorna su estado. No bloquea."""
+    _conexion.iniciar()
+    return _conexion
+
 def forzar_creacion_tablas(db_engine, st_display_func):
     """
     Fuerza la creación de todas las tablas definidas en models.py.
@@ -94,45 +246,168 @@ def forzar_creacion_tablas(db_engine, st_display_func):
         st_display_func(f"❌ Error en creación de tablas: {e}")
         return False
 
+_consultas_estadisticas: Dict[tuple, Any] = {}
+
+def _consulta_estadisticas_tabla(tabla):
+    """SELECT de una fila: tabla, COUNT(*), COUNT(id_local), MAX(fecha_sync)."""
+    con_id_local = func.count(tabla.c.id_local) if 'id_local' in tabla.c else literal(0)
+    ultima = func.max(tabla.c.fecha_sync) if 'fecha_sync' in tabla.c else cast(null(), DateTime)
+    return select(
+        literal(tabla.name).label('tabla'),
+        func.count().label('registros'),
+        con_id_local.label('con_id_local'),
+        ultima.label('ultima_sincronizacion'),
+    ).select_from(tabla)
+
+def _consulta_estadisticas(tablas: tuple):
+    # Se arma una vez por conjunto de tablas; así SQLAlchemy reutiliza la compilación
+    if tablas not in _consultas_estadisticas:
+        _consultas_estadisticas[tablas] = union_all(*[_consulta_estadisticas_tabla(t) for t in tablas])
+    return _consultas_estadisticas[tablas]
+
 def obtener_estadisticas_sincronizacion(engine) -> Dict[str, Any]:
-    """Obtiene estadísticas de sincronización de Supabase."""
+    """
+    Obtiene estadísticas de sincronización de Supabase.
+    Una sola consulta (UNION ALL de COUNT(*), COUNT(id_local) y
+    MAX(fecha_sync) por tabla); no trae filas. 'por_tabla' tiene el
+    desglose {tabla: {registros, con_id_local, ultima_sincronizacion}}.
+    """
     if not engine:
         return {}
     
     estadisticas = {
         'total_registros': 0,
         'con_id_local': 0,
-        'ultima_sincronizacion': None
+        'ultima_sincronizacion': None,
+        'por_tabla': {}
     }
     
     try:
         # Usamos el orden de sincronización definido en models.py
         from models import SYNC_ORDER_COMPLETE
-        modelos = SYNC_ORDER_COMPLETE
+        tablas = tuple(modelo.__table__ for modelo in SYNC_ORDER_COMPLETE)
+        if not tablas:
+            return estadisticas
         
-        with Session(engine) as session:
-            for modelo in modelos:
-                try:
-                    # Contamos registros de cada tabla
-                    statement = select(modelo)
-                    resultados = session.exec(statement).all()
-                    estadisticas['total_registros'] += len(resultados)
-                    
-                    if hasattr(modelo, 'id_local'):
-                        con_local = [r for r in resultados if getattr(r, 'id_local', None) is not None]
-                        estadisticas['con_id_local'] += len(con_local)
-                    
-                    if hasattr(modelo, 'fecha_sync'):
-                        fechas = [r.fecha_sync for r in resultados if getattr(r, 'fecha_sync', None)]
-                        if fechas:
-                            ultima = max(fechas)
-                            if not estadisticas['ultima_sincronizacion'] or ultima > estadisticas['ultima_sincronizacion']:
-                                estadisticas['ultima_sincronizacion'] = ultima
-                except Exception:
-                    # Si una tabla no existe aún, saltamos a la siguiente
-                    continue
+        try:
+            with engine.connect() as conn:
+                filas = conn.execute(_consulta_estadisticas(tablas)).all()
+        except Exception:
+            # Si una tabla no existe aún, una consulta por tabla saltando esa
+            filas = []
+            with engine.connect() as conn:
+                for tabla in tablas:
+                    try:
+                        with conn.begin_nested():
+                            filas.append(conn.execute(_consulta_estadisticas_tabla(tabla)).one())
+                    except Exception:
+                        continue
+        
+        for tabla, registros, con_id_local, ultima in filas:
+            estadisticas['por_tabla'][tabla] = {
+                'registros': registros,
+                'con_id_local': con_id_local,
+                'ultima_sincronizacion': ultima,
+            }
+            estadisticas['total_registros'] += registros
+            estadisticas['con_id_local'] += con_id_local
+            if ultima and (not estadisticas['ultima_sincronizacion'] or ultima > estadisticas['ultima_sincronizacion']):
+                estadisticas['ultima_sincronizacion'] = ultima
         
         return estadisticas
     except Exception as e:
         print(f"Error obteniendo estadísticas: {e}")
-        return estadisticas
\ No newline at end of file
+        return estadisticas
+
+# ====================================================================
+# ESCRITURA POR LOTES
+# ====================================================================
+# Mismas firmas que en database/local.py, para las pantallas que reciben
+# db_module. En Supabase no hay diario ni banderas de sincronización: la
+# descarga trae las filas y el trigger de fecha_sync las marca.
+
+def _pk_columna(modelo_clase):
+    return list(modelo_clase.__table__.primary_key.columns)[0]
+
+def _ids_existentes(session: Session, modelo_clase, ids: List[int]) -> List[int]:
+    pk = _pk_columna(modelo_clase)
+    existentes = set()
+    for i in range(0, len(ids), 500):
+        existentes.update(session.exec(select(pk).where(pk.in_(ids[i:i + 500]))).all())
+    return [i for i in ids if i in existentes]
+
+def crear_registros_lote(registros: List[SQLModel], engine, st_display_func,
+                         synchronize: bool = False, nombre_tabla: str = "Registros") -> List[int]:
+    """
+    Crea muchos registros del mismo modelo en Supabase en una sola
+    transacción (INSERT con executemany). Retorna los ids asignados en el
+    mismo orden; [] si algo falla.
+    """
+    if not registros:
+        return []
+    
+    modelo_clase = type(registros[0])
+    tabla = modelo_clase.__table__
+    pk = _pk_columna(modelo_clase)
+    filas = [{c.name: getattr(r, c.name, None) for c in tabla.columns if c.name != pk.name} for r in registros]
+    
+    try:
+        with Session(engine) as session:
+            ids = list(session.execute(
+                insert(tabla).returning(pk, sort_by_parameter_order=True), filas
+            ).scalars())
+            session.commit()
+            invalidar(modelo_clase)
+        
+        for registro, id_registro in zip(registros, ids):
+            setattr(registro, pk.name, id_registro)
+        
+        if not synchronize:
+            st_display_func(f"✅ {len(ids)} {nombre_tabla} creados en Supabase")
+        return ids
+    except Exception as e:
+        if not synchronize:
+            st_display_func(f"❌ Error creando {nombre_tabla}: {e}", is_error=True)
+        return []
+
+def actualizar_registros_lote(modelo_clase, cambios: Dict[int, Dict[str, Any]], engine,
+                              st_display_func, nombre_tabla: str = "Registros") -> List[int]:
+    """
+    Aplica {id: {campo: valor}} en Supabase en una sola transacción
+    (UPDATE con executemany por llave primaria). Retorna los ids
+    actualizados; los que no existen se omiten.
+    """
+    if not cambios:
+        return []
+    
+    tabla = modelo_clase.__table__
+    pk = _pk_columna(modelo_clase)
+    
+    try:
+        with Session(engine) as session:
+            ids = _ids_existentes(session, modelo_clase, list(cambios))
+            
+            # executemany agrupa por conjunto de columnas
+            por_columnas: Dict[tuple, List[Dict[str, Any]]] = {}
+            for id_registro in ids:
+                datos = {k: v for k, v in cambios[id_registro].items() if k in tabla.c and k != pk.name}
+                por_columnas.setdefault(tuple(sorted(datos)), []).append({'_id': id_registro, **datos})
+            
+            for columnas, filas in por_columnas.items():
+                if not columnas:
+                    continue
+                session.execute(
+                    update(tabla)
+                    .where(pk == bindparam('_id'))
+                    .values({c: bindparam(c) for c in columnas}),
+                    filas
+                )
+            
+            session.commit()
+            invalidar(modelo_clase)
+        
+        st_display_func(f"✅ {len(ids)} {nombre_tabla} actualizados en Supabase")
+        return ids
+    except Exception as e:
+        st_display_func(f"❌ Error actualizando {nombre_tabla}: {e}", is_error=True)
+        return []
@@ -0,0 +1,172 @@
+# database/remote_async.py - Consultas concurrentes a Supabase (asyncio + psycopg 3)
+"""
+Con ~150 ms de ida y vuelta a Supabase, diez consultas independientes
+hechas una tras otra tardan ~1.5 s. Aquí se mandan a la vez por
+conexiones distintas y tardan lo que la más lenta.
+
+Usa el driver asíncrono de psycopg 3 (postgresql+psycopg) con los mismos
+modelos de models.py, así que las consultas se escriben igual que con el
+engine síncrono (select de sqlmodel) y retornan los mismos objetos.
+
+La concurrencia se limita a LIMITE_CONCURRENCIA conexiones (pool propio,
+sin desborde): la parte asíncrona del tope SGP_CONEXIONES_SUPABASE que
+database/remote.py reparte entre ambos pools, así que este pool y el del
+engine síncrono juntos nunca abren más conexiones que el tope; más
+paralelismo solo haría fila en el servidor. El pooler en modo transacción
+(puerto 6543) no admite sentencias preparadas, por eso se desactivan
+(prepare_threshold=None).
+
+Streamlit es síncrono: las corrutinas corren en un bucle de eventos
+propio, en un hilo aparte, que conserva el engine y su pool entre
+ejecuciones de la página. Desde código síncrono se usa
+consultar_en_paralelo(); desde código asíncrono, en_paralelo().
+
+Uso:
+    conteos = consultar_en_paralelo({
+        'feligreses': select(func.count(Feligres.id_feligres)),
+        'grupos': select(func.count(GrupoParroquial.id_grupo)),
+    }, escalar=True)
+"""
+
+import asyncio
+import importlib.util
+import threading
+import concurrent.futures
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import func
+from sqlmodel import select
+
+from database.remote import url_conexion, CONNECT_TIMEOUT_FONDO, CONEXIONES_ASINCRONAS
+
+# Conexiones simultáneas como máximo (la parte asíncrona del tope común)
+LIMITE_CONCURRENCIA = CONEXIONES_ASINCRONAS
+
+# Espera máxima de quien llama desde código síncrono
+TIMEOUT_CONSULTAS = 60.0
+
+_engine = None
+_bucle: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+# ====================================================================
+# DISPONIBILIDAD
+# ====================================================================
+
+def disponible() -> bool:
+    """True si están psycopg 3 y greenlet (sqlalchemy.ext.asyncio los necesita)."""
+    return all(importlib.util.find_spec(m) is not None for m in ("psycopg", "greenlet"))
+
+# ====================================================================
+# ENGINE ASÍNCRONO
+# ====================================================================
+
+def _crear_engine_async():
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    return create_async_engine(
+        url_conexion("psycopg"),
+        pool_size=LIMITE_CONCURRENCIA,
+        max_overflow=0,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        connect_args={
+            'connect_timeout': CONNECT_TIMEOUT_FONDO,
+            'application_name': 'Sistema_Parroquial',
+            'prepare_threshold': None,   # el pooler en modo transacción no las admite
+        },
+        echo=False
+    )
+
+
+def get_async_engine():
+    """Engine asíncrono (uno por proceso). Solo debe usarse dentro del bucle propio."""
+    global _engine
+    if _engine is None:
+        _engine = _crear_engine_async()
+    return _engine
+
+# ====================================================================
+# CONSULTAS (ASÍNCRONAS)
+# ====================================================================
+
+async def consultar(statement, escalar: bool = False):
+    """
+    Ejecuta `statement` en su propia sesión. Retorna la lista de
+    resultados, o el primer valor si `escalar`.
+    """
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    async with AsyncSession(get_async_engine()) as session:
+        resultado = await session.exec(statement)
+        return resultado.first() if escalar else resultado.all()
+
+
+async def en_paralelo(consultas: Dict[str, Any], escalar: bool = False,
+                      limite: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Ejecuta las consultas de `consultas` a la vez, con `limite`
+    conexiones como máximo. Retorna {clave: resultado}. Si una falla se
+    propaga su error.
+    """
+    semaforo = asyncio.Semaphore(min(limite or LIMITE_CONCURRENCIA, LIMITE_CONCURRENCIA))
+
+    async def _una(statement):
+        async with semaforo:
+            return await consultar(statement, escalar)
+
+    claves = list(consultas)
+    resultados = await asyncio.gather(*[_una(consultas[c]) for c in claves])
+    return dict(zip(claves, resultados))
+
+# ====================================================================
+# PUENTE PARA CÓDIGO SÍNCRONO (STREAMLIT)
+# ====================================================================
+
+def _bucle_fondo() -> asyncio.AbstractEventLoop:
+    """Bucle de eventos en un hilo propio; el engine y su pool viven en él."""
+    global _bucle
+    with _lock:
+        if _bucle is None or _bucle.is_closed():
+            # Selector también en Windows: psycopg no funciona con el Proactor
+            _bucle = asyncio.SelectorEventLoop()
+            threading.Thread(target=_bucle.run_forever, name="consultas-supabase", daemon=True).start()
+        return _bucle
+
+
+def ejecutar(corrutina, timeout: float = TIMEOUT_CONSULTAS):
+    """Corre `corrutina` en el bucle de fondo y espera su resultado."""
+    futuro = asyncio.run_coroutine_threadsafe(corrutina, _bucle_fondo())
+    try:
+        return futuro.result(timeout)
+    except concurrent.futures.TimeoutError:
+        futuro.cancel()
+        raise
+
+
+def consultar_en_paralelo(consultas: Dict[str, Any], escalar: bool = False,
+                          limite: Optional[int] = None) -> Dict[str, Any]:
+    """Versión síncrona de en_paralelo()."""
+    if not consultas:
+        return {}
+    return ejecutar(en_paralelo(consultas, escalar, limite))
+
+
+def contar_registros(modelos: Iterable) -> Dict[str, int]:
+    """{tabla: COUNT(*)} de cada modelo, todas las consultas a la vez."""
+    consultas = {m.__tablename__: select(func.count()).select_from(m) for m in modelos}
+    return {tabla: n or 0 for tabla, n in consultar_en_paralelo(consultas, escalar=True).items()}
+
+
+def cerrar():
+    """Cierra las conexiones del pool asíncrono (al terminar el proceso o en pruebas)."""
+    global _engine
+    if _engine is not None and _bucle is not None and not _bucle.is_closed():
+        ejecutar(_engine.dispose())
+    _engine = None
+
+
+__all__ = [
+    'disponible', 'get_async_engine', 'consultar', 'en_paralelo', 'ejecutar',
+    'consultar_en_paralelo', 'contar_registros', 'cerrar', 'LIMITE_CONCURRENCIA',
+]
@@ -0,0 +1,312 @@
+# database/respaldo.py - Respaldos en caliente de parroquia.db
+"""
+Respaldo y restauración de la base local sin detener la app.
+
+Copiar parroquia.db con el explorador mientras la app escribe puede dejar
+un archivo a medias (y olvida lo que sigue en el -wal). Aquí se usa la API
+de respaldo en línea de SQLite: copia por pasos de PAGINAS_POR_PASO
+páginas con una pausa entre pasos, de modo que la recepción sigue
+escribiendo mientras corre el respaldo nocturno. Si otra conexión escribe
+a media copia, SQLite reinicia la copia sola: el resultado siempre es
+consistente.
+
+Cada respaldo se verifica (PRAGMA integrity_check), se comprime con gzip
+como respaldos/parroquia-AAAAMMDD-HHMMSS.db.gz y se conservan los
+CONSERVAR más recientes.
+
+Restaurar descomprime a un temporal, lo verifica, respalda la base
+actual y copia el respaldo sobre la base viva con la misma API (en un solo
+paso), así las conexiones abiertas ven los datos restaurados sin tocar
+los archivos -wal/-shm a mano.
+
+EJECUTAR DESDE LA RAÍZ DEL PROYECTO:
+    python -m database.respaldo crear
+    python -m database.respaldo listar
+    python -m database.respaldo restaurar database/respaldos/parroquia-20250101-020000.db.gz
+
+Respaldo nocturno (Programador de tareas de Windows o cron):
+    python -m database.respaldo crear --conservar 30
+"""
+
+from typing import List, Optional, Tuple
+from datetime import datetime
+import argparse
+import sqlite3
+import shutil
+import gzip
+import time
+import os
+
+# Misma ruta que database/local.py, sin importar los modelos
+_directorio = os.path.dirname(os.path.abspath(__file__))
+RUTA_BASE = os.path.join(_directorio, "parroquia.db")
+CARPETA_RESPALDOS = os.environ.get("SGP_RESPALDOS_DIR", os.path.join(_directorio, "respaldos"))
+
+# 1024 páginas de 4 KB = 4 MB por paso; entre pasos la base queda libre
+PAGINAS_POR_PASO = int(os.environ.get("SGP_RESPALDO_PAGINAS", "1024"))
+PAUSA_ENTRE_PASOS = float(os.environ.get("SGP_RESPALDO_PAUSA", "0.005"))
+CONSERVAR = int(os.environ.get("SGP_RESPALDOS_CONSERVAR", "14"))
+
+PREFIJO = "parroquia-"
+EXTENSION = ".db.gz"
+
+# ====================================================================
+# FUNCIONES AUXILIARES
+# ====================================================================
+
+def _mostrar(mensaje, is_error=False, is_warning=False):
+    print(mensaje)
+
+
+def _nombre_respaldo(fecha: datetime) -> str:
+    return f"{PREFIJO}{fecha:%Y%m%d-%H%M%S}{EXTENSION}"
+
+
+def _copiar_en_linea(origen: str, destino: str, paginas: int, pausa: float, progreso=None):
+    """Copia `origen` en `destino` con la API de respaldo de SQLite."""
+    fuente = sqlite3.connect(origen)
+    copia = sqlite3.connect(destino)
+    try:
+        fuente.backup(copia, pages=paginas, progress=progreso, sleep=pausa)
+    finally:
+        copia.close()
+        fuente.close()
+
+
+def verificar_base(ruta: str) -> Tuple[bool, str]:
+    """(True, detalle) si el archivo es una base SQLite íntegra del sistema."""
+    try:
+        conn = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True)
+        try:
+            resultado = conn.execute("PRAGMA integrity_check").fetchone()[0]
+            if resultado != "ok":
+                return False, f"integrity_check: {resultado}"
+            tablas = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if "feligres" not in tablas:
+                return False, "no contiene la tabla feligres"
+            version = None
+            if "esquema_version" in tablas:
+                version = conn.execute("SELECT max(version) FROM esquema_version").fetchone()[0]
+            return True, f"íntegra, esquema v{version or 0}, {len(tablas)} tablas"
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        return False, str(e)
+
+# ====================================================================
+# RESPALDAR
+# ====================================================================
+
+def crear_respaldo(
+    ruta_base: str = RUTA_BASE,
+    carpeta: str = CARPETA_RESPALDOS,
+    conservar: Optional[int] = CONSERVAR,
+    paginas: int = PAGINAS_POR_PASO,
+    pausa: float = PAUSA_ENTRE_PASOS,
+    st_display_func=_mostrar
+) -> Optional[str]:
+    """
+    Respalda la base en caliente, verifica la copia y la comprime.
+    Retorna la ruta del .db.gz, o None si falló.
+    """
+    if not os.path.exists(ruta_base):
+        st_display_func(f"❌ No existe la base {ruta_base}", is_error=True)
+        return None
+
+    os.makedirs(carpeta, exist_ok=True)
+    inicio = time.perf_counter()
+    final = os.path.join(carpeta, _nombre_respaldo(datetime.now()))
+    temporal = final[:-len(".gz")] + ".tmp"
+
+    try:
+        _copiar_en_linea(ruta_base, temporal, paginas, pausa)
+
+        # La copia queda en un solo archivo (sin -wal) antes de verificarla
+        conn = sqlite3.connect(temporal)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.close()
+
+        valida, detalle = verificar_base(temporal)
+        if not valida:
+            st_display_func(f"❌ Respaldo inválido: {detalle}", is_error=True)
+            return None
+
+        with open(temporal, "rb") as entrada, gzip.open(final + ".parcial", "wb", compresslevel=6) as salida:
+            shutil.copyfileobj(entrada, salida, 1024 * 1024)
+        os.replace(final + ".parcial", final)
+    except (sqlite3.Error, OSError) as e:
+        st_display_func(f"❌ Error al respaldar: {e}", is_error=True)
+        return None
+    finally:
+        for ruta in (temporal, final + ".parcial"):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+    segundos = time.perf_counter() - inicio
+    st_display_func(
+        f"✅ Respaldo {os.path.basename(final)} "
+        f"({os.path.getsize(final) / 1024 / 1024:.1f} MB, {segundos:.1f} s; {detalle})"
+    )
+
+    if conservar:
+        rotar_respaldos(carpeta, conservar, st_display_func)
+    return final
+
+
+def listar_respaldos(carpeta: str = CARPETA_RESPALDOS) -> List[Tuple[str, datetime, int]]:
+    """[(ruta, fecha, bytes)] del más reciente al más antiguo."""
+    if not os.path.isdir(carpeta):
+        return []
+    respaldos = []
+    for nombre in os.listdir(carpeta):
+        if not (nombre.startswith(PREFIJO) and nombre.endswith(EXTENSION)):
+            continue
+        try:
+            fecha = datetime.strptime(nombre[len(PREFIJO):-len(EXTENSION)], "%Y%m%d-%H%M%S")
+        except ValueError:
+            continue
+        ruta = os.path.join(carpeta, nombre)
+        respaldos.append((ruta, fecha, os.path.getsize(ruta)))
+    return sorted(respaldos, key=lambda r: r[1], reverse=True)
+
+
+def rotar_respaldos(carpeta: str = CARPETA_RESPALDOS, conservar: int = CONSERVAR,
+                    st_display_func=_mostrar) -> int:
+    """Borra los respaldos más antiguos, dejando los `conservar` más recientes."""
+    sobrantes = listar_respaldos(carpeta)[conservar:]
+    for ruta, _, _ in sobrantes:
+        os.remove(ruta)
+    if sobrantes:
+        st_display_func(f"🧹 {len(sobrantes)} respaldos antiguos eliminados")
+    return len(sobrantes)
+
+# ====================================================================
+# RESTAURAR
+# ====================================================================
+
+def _descomprimir(archivo: str, destino: str):
+    # gzip valida el CRC al terminar de leer: un archivo dañado falla aquí
+    with gzip.open(archivo, "rb") as entrada, open(destino, "wb") as salida:
+        shutil.copyfileobj(entrada, salida, 1024 * 1024)
+
+
+def verificar_respaldo(archivo: str) -> Tuple[bool, str]:
+    """Descomprime a un temporal y verifica la base sin tocar la actual."""
+    temporal = os.path.join(os.path.dirname(os.path.abspath(archivo)), ".verificacion.db")
+    try:
+        _descomprimir(archivo, temporal)
+        return verificar_base(temporal)
+    except (OSError, EOFError) as e:
+        return False, f"archivo dañado: {e}"
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def restaurar_respaldo(
+    archivo: str,
+    ruta_base: str = RUTA_BASE,
+    respaldar_actual: bool = True,
+    st_display_func=_mostrar
+) -> bool:
+    """
+    Reemplaza el contenido de la base por el del respaldo, después de
+    verificarlo. Por defecto respalda antes la base actual.
+    """
+    inicio = time.perf_counter()
+    temporal = ruta_base + ".restaurando"
+
+    try:
+        _descomprimir(archivo, temporal)
+        valida, detalle = verificar_base(temporal)
+        if not valida:
+            st_display_func(f"❌ Respaldo inválido, no se restauró: {detalle}", is_error=True)
+            return False
+
+        if respaldar_actual and os.path.exists(ruta_base):
+            if not crear_respaldo(ruta_base, conservar=None, st_display_func=st_display_func):
+                st_display_func("❌ No se pudo respaldar la base actual; restauración cancelada", is_error=True)
+                return False
+
+        # Un solo paso: la base queda bloqueada apenas unos segundos
+        _copiar_en_linea(temporal, ruta_base, paginas=-1, pausa=0)
+
+        valida, detalle = verificar_base(ruta_base)
+        if not valida:
+            st_display_func(f"❌ La base restaurada no pasó la verificación: {detalle}", is_error=True)
+            return False
+    except (sqlite3.Error, OSError, EOFError) as e:
+        st_display_func(f"❌ Error al restaurar: {e}", is_error=True)
+        return False
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+    st_display_func(
+        f"✅ Restaurado {os.path.basename(archivo)} en {time.perf_counter() - inicio:.1f} s ({detalle})"
+    )
+    return True
+
+# ====================================================================
+# LÍNEA DE COMANDOS
+# ====================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m database.respaldo",
+        description="Respaldos en caliente de la base local (parroquia.db)."
+    )
+    parser.add_argument("--base", default=RUTA_BASE, help="base SQLite (default: database/parroquia.db)")
+    parser.add_argument("--carpeta", default=CARPETA_RESPALDOS, help="carpeta de respaldos")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    crear = comandos.add_parser("crear", help="respaldar ahora")
+    crear.add_argument("--conservar", type=int, default=CONSERVAR,
+                       help=f"respaldos a conservar (default: {CONSERVAR}; 0 = todos)")
+
+    comandos.add_parser("listar", help="listar respaldos")
+
+    verificar = comandos.add_parser("verificar", help="verificar un respaldo sin restaurarlo")
+    verificar.add_argument("archivo")
+
+    restaurar = comandos.add_parser("restaurar", help="verificar y restaurar un respaldo")
+    restaurar.add_argument("archivo", help="ruta del .db.gz, o 'ultimo'")
+    restaurar.add_argument("--sin-respaldo-previo", action="store_true",
+                           help="no respaldar la base actual antes de restaurar")
+    args = parser.parse_args(argv)
+
+    if args.comando == "crear":
+        return 0 if crear_respaldo(args.base, args.carpeta, conservar=args.conservar) else 1
+
+    if args.comando == "listar":
+        respaldos = listar_respaldos(args.carpeta)
+        if not respaldos:
+            print("ℹ️ No hay respaldos")
+        for ruta, fecha, tamano in respaldos:
+            print(f"{fecha:%Y-%m-%d %H:%M:%S}  {tamano / 1024 / 1024:8.1f} MB  {ruta}")
+        return 0
+
+    archivo = args.archivo
+    if archivo == "ultimo":
+        respaldos = listar_respaldos(args.carpeta)
+        if not respaldos:
+            print("❌ No hay respaldos")
+            return 1
+        archivo = respaldos[0][0]
+
+    if args.comando == "verificar":
+        valido, detalle = verificar_respaldo(archivo)
+        print(f"{'✅' if valido else '❌'} {os.path.basename(archivo)}: {detalle}")
+        return 0 if valido else 1
+
+    exito = restaurar_respaldo(archivo, args.base, respaldar_actual=not args.sin_respaldo_previo)
+    return 0 if exito else 1
+
+
+__all__ = [
+    'crear_respaldo', 'listar_respaldos', 'rotar_respaldos',
+    'verificar_respaldo', 'restaurar_respaldo', 'verificar_base',
+]
+
+if __name__ == "__main__":
+    raise SystemExit(main())
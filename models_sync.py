@@ -0,0 +1,187 @@
+# models_sync.py - Tablas de control de sincronización
+"""
+Tablas internas que usa sync_manager para llevar el estado de la
+sincronización entre SQLite y Supabase.
+
+Viven en un MetaData propio para que solo se creen en la base local:
+Supabase nunca debe recibir estas tablas.
+"""
+
+from sqlmodel import SQLModel, Field
+from sqlalchemy import MetaData, Index, inspect, select, literal
+from sqlalchemy.engine import Engine
+from contextlib import nullcontext
+from typing import Optional
+from datetime import datetime
+
+# ====================================================================
+# BASE CON METADATA PROPIO (SOLO LOCAL)
+# ====================================================================
+
+class BaseControlSync(SQLModel):
+    """Base de las tablas de control (no se crean en Supabase)."""
+    metadata = MetaData()
+
+
+# ====================================================================
+# CURSORES DE DESCARGA (REMOTO → LOCAL)
+# ====================================================================
+
+class CursorSincronizacion(BaseControlSync, table=True):
+    """
+    Marca de agua por tabla de la última descarga exitosa.
+
+    marca_id: mayor clave primaria remota ya descargada (detecta altas).
+    marca_fecha: mayor fecha_sync remota ya descargada (detecta cambios).
+    """
+    __tablename__ = "sync_cursor"
+
+    tabla: str = Field(primary_key=True, max_length=100)
+    marca_id: Optional[int] = Field(default=None)
+    marca_fecha: Optional[datetime] = Field(default=None)
+    fecha_actualizacion: datetime = Field(default_factory=datetime.now)
+
+
+# ====================================================================
+# MAPA PERSISTENTE DE IDS (LOCAL ↔ REMOTO)
+# ====================================================================
+
+class MapaIdSincronizacion(BaseControlSync, table=True):
+    """
+    Correspondencia id_local ↔ id_remoto de cada tabla sincronizada.
+    Sobrevive entre ejecuciones; SyncCache la carga de una sola lectura.
+    """
+    __tablename__ = "sync_mapa_id"
+    __table_args__ = (
+        Index("ix_sync_mapa_id_remoto", "tabla", "id_remoto", unique=True),
+    )
+
+    tabla: str = Field(primary_key=True, max_length=100)
+    id_local: int = Field(primary_key=True)
+    id_remoto: int
+
+
+# ====================================================================
+# DIARIO DE CAMBIOS (OUTBOX LOCAL → REMOTO)
+# ====================================================================
+
+class DiarioCambio(BaseControlSync, table=True):
+    """
+    Bitácora de solo-anexar de las escrituras locales (ver database/diario.py).
+    El envío Local → Remoto la reproduce en orden de secuencia y borra las
+    entradas ya confirmadas.
+
+    operacion: 'I' (alta), 'U' (cambio) o 'D' (baja).
+    columnas: nombres de las columnas cambiadas (JSON), solo para 'U'.
+    """
+    __tablename__ = "sync_diario"
+    __table_args__ = (
+        Index("ix_sync_diario_tabla_seq", "tabla", "secuencia"),
+    )
+
+    secuencia: Optional[int] = Field(default=None, primary_key=True)
+    tabla: str = Field(max_length=100)
+    id_registro: int
+    operacion: str = Field(max_length=1)
+    columnas: Optional[str] = Field(default=None)
+    fecha: datetime = Field(default_factory=datetime.now)
+
+
+# ====================================================================
+# EJECUCIONES REANUDABLES
+# ====================================================================
+
+class EjecucionSincronizacion(BaseControlSync, table=True):
+    """
+    Una corrida de sincronización. Si queda 'en_curso' (la página se
+    recargó, se cayó la conexión...), la siguiente corrida la reanuda.
+    Termina como 'completada' o, si la reanudación también falla,
+    'con_errores'.
+    """
+    __tablename__ = "sync_ejecucion"
+
+    id_ejecucion: Optional[int] = Field(default=None, primary_key=True)
+    direccion: str = Field(max_length=20)  # 'descarga' o 'envio'
+    estado: str = Field(default="en_curso", max_length=20)
+    completo: bool = Field(default=False)
+    fecha_inicio: datetime = Field(default_factory=datetime.now)
+    fecha_fin: Optional[datetime] = Field(default=None)
+
+
+class AvanceSincronizacion(BaseControlSync, table=True):
+    """
+    Punto de control por tabla dentro de una ejecución: la última clave
+    confirmada (commit) y si la tabla ya terminó.
+    """
+    __tablename__ = "sync_avance"
+
+    id_ejecucion: int = Field(primary_key=True, foreign_key="sync_ejecucion.id_ejecucion")
+    tabla: str = Field(primary_key=True, max_length=100)
+    ultima_clave: Optional[int] = Field(default=None)
+    completada: bool = Field(default=False)
+    fecha_actualizacion: datetime = Field(default_factory=datetime.now)
+
+
+# ====================================================================
+# ESTADO DEL SINCRONIZADOR EN SEGUNDO PLANO
+# ====================================================================
+
+class EstadoSincronizador(BaseControlSync, table=True):
+    """
+    Fila única (id = 1) que escribe `python -m sync_manager --watch` y que
+    la barra lateral de la app lee para mostrar el estado.
+    """
+    __tablename__ = "sync_estado"
+
+    id: int = Field(default=1, primary_key=True)
+    estado: str = Field(default="detenido", max_length=20)  # sincronizando, esperando, error, detenido
+    pid: Optional[int] = Field(default=None)
+    latido: datetime = Field(default_factory=datetime.now)
+    ultimo_exito: Optional[datetime] = Field(default=None)
+    ultimo_error: Optional[str] = Field(default=None)
+    ciclos: int = Field(default=0)
+    pendientes: int = Field(default=0)  # entradas que quedan en sync_diario
+    latencia_ms: Optional[float] = Field(default=None)
+    tasa_error: float = Field(default=0.0)
+    proxima_descarga: Optional[datetime] = Field(default=None)
+
+
+def _transaccion(bind):
+    """Conexión en transacción, sea bind un Engine o una Connection ya abierta."""
+    return bind.begin() if isinstance(bind, Engine) else nullcontext(bind)
+
+
+def crear_tablas_control(bind):
+    """
+    Crea las tablas de control en la base local (ver la migración
+    v002_tablas_control). Si el diario es nuevo, se siembra con lo que ya
+    estaba pendiente según la bandera sincronizado, para no perder cambios.
+    """
+    with _transaccion(bind) as conn:
+        diario_nuevo = not inspect(conn).has_table(DiarioCambio.__tablename__)
+        BaseControlSync.metadata.create_all(conn)
+        if diario_nuevo:
+            sembrar_diario(conn)
+
+
+def sembrar_diario(bind):
+    """Registra como 'U' cada fila con sincronizado = False o sin id_remoto."""
+    diario = DiarioCambio.__table__
+    ahora = datetime.now()
+
+    with _transaccion(bind) as conn:
+        # Sin orden: sorted_tables exige resolver todas las llaves foráneas
+        for tabla in SQLModel.metadata.tables.values():
+            if 'sincronizado' not in tabla.c or 'id_remoto' not in tabla.c:
+                continue
+            if not inspect(conn).has_table(tabla.name):
+                continue
+
+            pk_col = list(tabla.primary_key.columns)[0]
+            pendientes = select(
+                literal(tabla.name), pk_col, literal('U'), literal(ahora)
+            ).where((tabla.c.sincronizado == False) | (tabla.c.id_remoto.is_(None)))
+
+            conn.execute(diario.insert().from_select(
+                ['tabla', 'id_registro', 'operacion', 'fecha'], pendientes
+            ))
@@ -6,6 +6,7 @@ from models import (
 )
 from models import GrupoParroquial, feligres, Usuario
 from sqlmodel import Session, select
+from database.catalogos import resolver
 from typing import Optional
 
 # ====================================================================
@@ -414,10 +415,11 @@ def ver_actas(db_engine, usuario_actual):
         
         # Mostrar actas
         for acta in actas:
+            grupo = resolver(GrupoParroquial, acta.id_grupo, db_engine)
+            area = resolver(AreaParroquial, acta.id_area, db_engine)
+            tipo = resolver(TipoReunion, acta.id_tipo_reunion, db_engine)
+            
             with Session(db_engine) as session:
-                grupo = session.get(GrupoParroquial, acta.id_grupo)
-                area = session.get(AreaParroquial, acta.id_area)
-                tipo = session.get(TipoReunion, acta.id_tipo_reunion)
                 responsable = session.get(Persona, acta.id_responsable_reunion)
                 
                 # Contar asistentes
@@ -527,9 +529,8 @@ def aprobar_actas(db_engine, db_module, st_display_func, usuario_actual):
         st.markdown(f"**Actas pendientes:** {len(actas_pendientes)}")
         
         for acta in actas_pendientes:
-            with Session(db_engine) as session:
-                grupo = session.get(GrupoParroquial, acta.id_grupo)
-                tipo = session.get(TipoReunion, acta.id_tipo_reunion)
+            grupo = resolver(GrupoParroquial, acta.id_grupo, db_engine)
+            tipo = resolver(TipoReunion, acta.id_tipo_reunion, db_engine)
             
             with st.expander(f"📋 {acta.fecha_reunion.strftime('%d/%m/%Y')} - {tipo.nombre_tipo if tipo else 'N/A'} - {grupo.nombre_grupo if grupo else 'N/A'}"):
                 st.markdown(f"**Estatus actual:** {acta.estatus}")
@@ -139,36 +139,34 @@ def mostrar_crud_asistencia(db_engine, db_module, db_mode, st_display_func):
                 width="stretch",
                 key=f"btn_guardar_asist_{id_sesion_asist}"
             ):
-                registros_creados = 0
-                registros_actualizados = 0
+                ahora = datetime.now()
+                cambios = {}
+                nuevos = []
                 
                 for id_persona, estado in asistencias_nuevas.items():
                     if id_persona in asistencias_dict:
-                        if db_module.actualizar_registro(
-                            RegistroAsistencia,
-                            asistencias_dict[id_persona].id_asistencia,
-                            {
-                                "estado_asistencia": estado,
-                                "fecha_registro": datetime.now(),
-                                "metodo_registro": metodo
-                            },
-                            db_engine,
-                            st_display_func,
-                            nombre_tabla="Asistencia"
-                        ):
-                            registros_actualizados += 1
+                        cambios[asistencias_dict[id_persona].id_asistencia] = {
+                            "estado_asistencia": estado,
+                            "fecha_registro": ahora,
+                            "metodo_registro": metodo
+                        }
                     else:
-                        nuevo_registro = RegistroAsistencia(
+                        nuevos.append(RegistroAsistencia(
                             id_sesion=id_sesion_asist,
                             id_persona=id_persona,
                             estado_asistencia=estado,
-                            fecha_registro=datetime.now(),
+                            fecha_registro=ahora,
                             metodo_registro=metodo,
                             id_registrador=id_registrador
-                        )
-                        
-                        if db_module.crear_registro(nuevo_registro, db_engine, st_display_func, synchronize=True, nombre_tabla="Asistencia"):
-                            registros_creados += 1
+                        ))
+                
+                # Toda la lista en una transacción por operación, no un commit por persona
+                registros_actualizados = len(db_module.actualizar_registros_lote(
+                    RegistroAsistencia, cambios, db_engine, st_display_func, nombre_tabla="Asistencia"
+                ))
+                registros_creados = len(db_module.crear_registros_lote(
+                    nuevos, db_engine, st_display_func, synchronize=True, nombre_tabla="Asistencia"
+                ))
                 
                 st.success(f"✅ Guardado: {registros_creados} nuevos, {registros_actualizados} actualizados")
                 st.rerun()
@@ -12,6 +12,7 @@ from utils import (
     buscar_feligres_por_curp, validar_curp, validar_no_auto_referencia,
     obtener_lista_feligreses, mostrar_informacion_familia_completa
 )
+from database.busqueda import buscar_feligres
 
 def mostrar_crud_feligreses(db_engine, db_module, db_mode, st_display_func):
     """
@@ -156,9 +157,22 @@ def mostrar_crud_feligreses(db_engine, db_module, db_mode, st_display_func):
         if feligreses:
             # Selector para ver detalles
             st.markdown("### 👁️ Ver Detalles de un Feligrés")
+            texto_busqueda = st.text_input(
+                "🔍 Buscar por nombre o CURP",
+                placeholder="Ej. jose garc",
+                key="buscar_feligres_detalle"
+            )
+            
+            if texto_busqueda.strip():
+                candidatos = buscar_feligres(texto_busqueda, db_engine, limite=20)
+                if not candidatos:
+                    st.info("ℹ️ Sin coincidencias")
+            else:
+                candidatos = feligreses
+            
             feligres_sel = st.selectbox(
                 "Selecciona un feligrés:",
-                options=feligreses,
+                options=candidatos,
                 format_func=lambda f: f"{f.nombre_completo()} - {f.curp or 'Sin CURP'}",
                 key="ver_feligres_detalle"
             )
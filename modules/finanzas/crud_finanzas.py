@@ -8,6 +8,8 @@ from models import (
 from models import GrupoParroquial, Usuario, Persona, Actividad
 from sqlmodel import Session, select, func
 from typing import Optional
+from database.local import leer_pagina
+from database.catalogos import resolver, resolver_varios
 
 # ====================================================================
 # FUNCIÓN PRINCIPAL
@@ -325,42 +327,55 @@ def crud_transacciones(db_engine, db_module, st_display_func, usuario_actual):
                 key="ver_trans_anio"
             )
         
-        # Consultar transacciones
+        # Filtros de la consulta
+        from sqlalchemy import extract
+        filtros = [extract('year', TransaccionFinanciera.fecha_transaccion) == filtro_anio]
+        
+        if filtro_grupo != 0:
+            filtros.append(TransaccionFinanciera.id_grupo == filtro_grupo)
+        
+        if filtro_tipo != "Todos":
+            filtros.append(TransaccionFinanciera.tipo == filtro_tipo)
+        
+        if filtro_mes != 0:
+            filtros.append(extract('month', TransaccionFinanciera.fecha_transaccion) == filtro_mes)
+        
+        # Totales agregados en SQL (no se cargan todas las transacciones)
         with Session(db_engine) as session:
-            statement = select(TransaccionFinanciera).order_by(
-                TransaccionFinanciera.fecha_transaccion.desc()
-            )
-            
-            if filtro_grupo != 0:
-                statement = statement.where(TransaccionFinanciera.id_grupo == filtro_grupo)
-            
-            if filtro_tipo != "Todos":
-                statement = statement.where(TransaccionFinanciera.tipo == filtro_tipo)
-            
-            # Filtro de fecha
-            if filtro_mes != 0:
-                from sqlalchemy import extract
-                statement = statement.where(
-                    extract('month', TransaccionFinanciera.fecha_transaccion) == filtro_mes
-                )
-            
-            statement = statement.where(
-                extract('year', TransaccionFinanciera.fecha_transaccion) == filtro_anio
-            )
-            
-            transacciones = session.exec(statement).all()
+            totales = session.exec(
+                select(
+                    TransaccionFinanciera.tipo,
+                    TransaccionFinanciera.moneda,
+                    func.count(),
+                    func.sum(TransaccionFinanciera.monto)
+                ).where(*filtros).group_by(TransaccionFinanciera.tipo, TransaccionFinanciera.moneda)
+            ).all()
+        
+        total_transacciones = sum(n for _, _, n, _ in totales)
+        
+        # Página actual (paginación por llave); se reinicia al cambiar filtros
+        clave_filtros = (filtro_grupo, filtro_tipo, filtro_mes, filtro_anio)
+        if st.session_state.get("ver_trans_filtros") != clave_filtros:
+            st.session_state["ver_trans_filtros"] = clave_filtros
+            st.session_state["ver_trans_cursores"] = [None]
+        cursores = st.session_state["ver_trans_cursores"]
+        
+        transacciones, cursor_siguiente = leer_pagina(
+            TransaccionFinanciera, db_engine, cursor=cursores[-1], tamano=50,
+            orden="fecha_transaccion", descendente=True, filtros=filtros
+        )
         
         if transacciones:
-            st.markdown(f"**Total de transacciones:** {len(transacciones)}")
+            st.markdown(f"**Total de transacciones:** {total_transacciones}")
             
             # Resumen financiero
             ingresos_total = sum(
-                float(t.monto) for t in transacciones 
-                if t.tipo == "Ingreso" and t.moneda == "MXN"
+                float(suma or 0) for tipo, moneda, _, suma in totales
+                if tipo == "Ingreso" and moneda == "MXN"
             )
             egresos_total = sum(
-                float(t.monto) for t in transacciones 
-                if t.tipo == "Egreso" and t.moneda == "MXN"
+                float(suma or 0) for tipo, moneda, _, suma in totales
+                if tipo == "Egreso" and moneda == "MXN"
             )
             balance = ingresos_total - egresos_total
             
@@ -377,27 +392,40 @@ def crud_transacciones(db_engine, db_module, st_display_func, usuario_actual):
             
             # Tabla de transacciones
             data = []
-            with Session(db_engine) as session:
-                for t in transacciones:
-                    grupo = session.get(GrupoParroquial, t.id_grupo)
-                    categoria = session.get(CategoriaFinanciera, t.id_categoria)
-                    
-                    icono = "💰" if t.tipo == "Ingreso" else "💸"
-                    estado_icono = "✅" if t.estado == "Validada" else "📝"
-                    
-                    data.append({
-                        "ID": t.id_transaccion,
-                        "": estado_icono,
-                        "Fecha": t.fecha_transaccion.strftime("%d/%m/%Y"),
-                        "Tipo": f"{icono} {t.tipo}",
-                        "Concepto": t.concepto[:50] + "..." if len(t.concepto) > 50 else t.concepto,
-                        "Categoría": categoria.nombre_categoria if categoria else "N/A",
-                        "Monto": f"${float(t.monto):,.2f} {t.moneda}",
-                        "Grupo": grupo.nombre_grupo if grupo else "N/A",
-                        "Estado": t.estado
-                    })
+            grupos = resolver_varios(GrupoParroquial, [t.id_grupo for t in transacciones], db_engine)
+            categorias = resolver_varios(CategoriaFinanciera, [t.id_categoria for t in transacciones], db_engine)
+            for t in transacciones:
+                grupo = grupos.get(t.id_grupo)
+                categoria = categorias.get(t.id_categoria)
+                
+                icono = "💰" if t.tipo == "Ingreso" else "💸"
+                estado_icono = "✅" if t.estado == "Validada" else "📝"
+                
+                data.append({
+                    "ID": t.id_transaccion,
+                    "": estado_icono,
+                    "Fecha": t.fecha_transaccion.strftime("%d/%m/%Y"),
+                    "Tipo": f"{icono} {t.tipo}",
+                    "Concepto": t.concepto[:50] + "..." if len(t.concepto) > 50 else t.concepto,
+                    "Categoría": categoria.nombre_categoria if categoria else "N/A",
+                    "Monto": f"${float(t.monto):,.2f} {t.moneda}",
+                    "Grupo": grupo.nombre_grupo if grupo else "N/A",
+                    "Estado": t.estado
+                })
             
             st.dataframe(data, use_container_width=True, hide_index=True)
+            
+            col_ant, col_pag, col_sig = st.columns([1, 2, 1])
+            with col_ant:
+                if len(cursores) > 1 and st.button("⬅️ Anteriores", key="ver_trans_anterior"):
+                    cursores.pop()
+                    st.rerun()
+            with col_pag:
+                st.caption(f"Página {len(cursores)}")
+            with col_sig:
+                if cursor_siguiente and st.button("Siguientes ➡️", key="ver_trans_siguiente"):
+                    cursores.append(cursor_siguiente)
+                    st.rerun()
         else:
             st.info("ℹ️ No hay transacciones con los filtros seleccionados")
     
@@ -517,8 +545,7 @@ def crud_presupuestos(db_engine, db_module, st_display_func, usuario_actual):
         
         if presupuestos:
             for pres in presupuestos:
-                with Session(db_engine) as session:
-                    grupo = session.get(GrupoParroquial, pres.id_grupo)
+                grupo = resolver(GrupoParroquial, pres.id_grupo, db_engine)
                 
                 estado_icono = {"Borrador": "📝", "Aprobado": "✅", "Vigente": "🟢"}.get(pres.estado, "📋")
                 
@@ -7,6 +7,7 @@ from models import (
 )
 from models import GrupoParroquial, Usuario
 from sqlmodel import Session, select, func
+from database.catalogos import resolver
 
 # ====================================================================
 # FUNCIÓN PRINCIPAL
@@ -427,11 +428,10 @@ def crud_bienes(db_engine, db_module, st_display_func, usuario_actual):
             
             # Tabla de bienes
             for bien in bienes:
-                with Session(db_engine) as session:
-                    grupo = session.get(GrupoParroquial, bien.id_grupo_responsable)
-                    area = session.get(AreaParroquial, bien.id_area)
-                    bodega = session.get(Bodega, bien.id_bodega) if bien.id_bodega else None
-                    categoria = session.get(CategoriaInventario, bien.id_categoria)
+                grupo = resolver(GrupoParroquial, bien.id_grupo_responsable, db_engine)
+                area = resolver(AreaParroquial, bien.id_area, db_engine)
+                bodega = resolver(Bodega, bien.id_bodega, db_engine)
+                categoria = resolver(CategoriaInventario, bien.id_categoria, db_engine)
                 
                 # Icono según estado
                 iconos_estado = {
@@ -0,0 +1,352 @@
+# scripts/benchmark_sync.py
+"""
+Benchmark de la sincronización sin tocar Supabase
+Sistema Parroquial v4.0
+
+EJECUTAR DESDE LA RAÍZ DEL PROYECTO:
+python scripts/benchmark_sync.py --filas 2000 --salida bench.json
+
+Crea dos bases SQLite temporales: una con el perfil local normal y otra
+que hace de remoto. Llena el "remoto" con datos sintéticos en todos los
+modelos de SYNC_ORDER, descarga (Remoto → Local), genera la misma
+cantidad de filas nuevas en local y las envía (Local → Remoto).
+
+Por dirección reporta filas/s, consultas emitidas, tiempo por tabla y
+memoria pico (tracemalloc), en JSON para comparar entre commits.
+
+Con el models.py abreviado solo entran los modelos cuyas llaves foráneas
+apuntan a tablas cargadas (feligres, telefono, direccion, presbitero,
+usuario); el número de tablas va en el JSON ('tablas').
+"""
+
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy import event, insert, select, func
+from datetime import datetime, date, time as dt_time, timedelta
+from decimal import Decimal
+from enum import Enum
+from contextlib import redirect_stdout
+import subprocess
+import argparse
+import tempfile
+import tracemalloc
+import threading
+import random
+import json
+import time
+import sys
+import os
+
+# Añadir ruta del proyecto
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    import sync_manager
+    from sync_manager import SYNC_ORDER, descubrir_modelos, orden_topologico, obtener_pk_field
+    from database.local import (
+        get_engine as get_local_engine, configurar_transacciones, aplicar_pragmas, perfil_sqlite
+    )
+    from database.diario import activar_diario
+    from models_sync import sembrar_diario, crear_tablas_control
+except ImportError as e:
+    print(f"❌ Error al importar: {e}")
+    print("Asegúrate de ejecutar desde la raíz del proyecto")
+    sys.exit(1)
+
+
+CAMPOS_CONTROL = {'id_local', 'id_remoto', 'sincronizado', 'fecha_sync'}
+
+# ====================================================================
+# CONTEO DE CONSULTAS
+# ====================================================================
+
+class ContadorConsultas:
+    """Cuenta las sentencias de un engine, en total y por hilo."""
+
+    def __init__(self, engine):
+        self.total = 0
+        self._hilo = threading.local()
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._contar)
+
+    def _contar(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.total += 1
+        self._hilo.cuenta = self.del_hilo() + 1
+
+    def del_hilo(self) -> int:
+        return getattr(self._hilo, 'cuenta', 0)
+
+# ====================================================================
+# DATOS SINTÉTICOS
+# ====================================================================
+
+def modelos_benchmark():
+    """Modelos de SYNC_ORDER que existen como tabla, padres antes que hijos."""
+    disponibles = set(descubrir_modelos())
+    return orden_topologico([m for m in SYNC_ORDER if m in disponibles])
+
+
+def esquema_completo() -> bool:
+    """True si models.py es el completo: toda llave foránea apunta a una tabla cargada."""
+    return all(
+        fk.target_fullname.split('.')[0] in SQLModel.metadata.tables
+        for tabla in SQLModel.metadata.tables.values() for fk in tabla.foreign_keys
+    )
+
+
+def crear_engine_local(ruta: str, modelos):
+    """
+    Local con el perfil normal de PRAGMAs. Con el models.py completo se usa
+    get_engine (migraciones incluidas); con el abreviado las migraciones no
+    pueden crear el esquema, así que se crean solo las tablas de `modelos`,
+    las de control y el diario.
+    """
+    if esquema_completo():
+        return get_local_engine(f"sqlite:///{ruta}")
+
+    engine = create_engine(f"sqlite:///{ruta}", connect_args={"check_same_thread": False})
+    configurar_transacciones(engine)
+    aplicar_pragmas(engine, perfil_sqlite())
+    SQLModel.metadata.create_all(engine, tables=[m.__table__ for m in modelos])
+    crear_tablas_control(engine)
+    activar_diario(engine)
+    return engine
+
+
+def valor_sintetico(columna, i: int, aleatorio: random.Random, ids_por_tabla):
+    """Valor reproducible para la fila i según el tipo de la columna."""
+    for fk in columna.foreign_keys:
+        padres = ids_por_tabla.get(fk.column.table.name)
+        if not padres:
+            return None if columna.nullable else 1
+        if columna.unique:
+            # Relación uno a uno (p. ej. presbitero.id_feligres): sin repetir padre
+            return padres[i % len(padres)]
+        return aleatorio.choice(padres)
+
+    try:
+        tipo = columna.type.python_type
+    except NotImplementedError:
+        # TypeDecorator (p. ej. AutoString de SQLModel): usar el tipo base
+        tipo = getattr(getattr(columna.type, 'impl', None), 'python_type', str)
+
+    if tipo is bool:
+        return i % 2 == 0
+    if tipo is int:
+        return i
+    if tipo is Decimal:
+        return Decimal(i % 10000) / 4
+    if tipo is float:
+        return (i % 10000) / 4
+    if tipo is datetime:
+        return datetime(2020, 1, 1) + timedelta(minutes=i)
+    if tipo is date:
+        return date(2020, 1, 1) + timedelta(days=i % 3650)
+    if tipo is dt_time:
+        return dt_time(i % 24, i % 60)
+    if isinstance(tipo, type) and issubclass(tipo, Enum):
+        opciones = list(tipo)
+        return opciones[i % len(opciones)]
+    if tipo is str:
+        texto = f"{columna.name}-{i}"
+        longitud = getattr(columna.type, 'length', None)
+        return texto[-longitud:] if longitud else texto
+    return None
+
+
+def poblar(engine, modelos, filas: int, inicio: int, local: bool, semilla: int) -> int:
+    """
+    Inserta `filas` registros por modelo con ids desde `inicio`. Las llaves
+    foráneas apuntan a filas de la tabla padre insertadas en esta misma llamada.
+    """
+    aleatorio = random.Random(semilla)
+    ids_por_tabla = {}
+    total = 0
+
+    with engine.begin() as conn:
+        for modelo in modelos:
+            tabla = modelo.__table__
+            pk_field = obtener_pk_field(modelo)
+            registros = []
+
+            for i in range(inicio, inicio + filas):
+                fila = {}
+                for columna in tabla.columns:
+                    if columna.name == pk_field:
+                        fila[columna.name] = i
+                    elif columna.name == 'sincronizado':
+                        fila[columna.name] = not local
+                    elif columna.name == 'fecha_sync':
+                        fila[columna.name] = None if local else datetime.now()
+                    elif columna.name in CAMPOS_CONTROL:
+                        fila[columna.name] = None
+                    else:
+                        fila[columna.name] = valor_sintetico(columna, i, aleatorio, ids_por_tabla)
+                registros.append(fila)
+
+            conn.execute(insert(tabla), registros)
+            total += len(registros)
+            ids_por_tabla[tabla.name] = [r[pk_field] for r in registros]
+
+    return total
+
+# ====================================================================
+# MEDICIÓN
+# ====================================================================
+
+def medir_direccion(nombre_funcion: str, ejecutar, contadores, modelos) -> dict:
+    """
+    Corre una dirección de la sincronización envolviendo la función por
+    tabla de sync_manager para medir su tiempo y sus consultas.
+    """
+    original = getattr(sync_manager, nombre_funcion)
+    por_tabla = {}
+    lock = threading.Lock()
+
+    def medida(modelo, *args, **kwargs):
+        consultas_antes = sum(c.del_hilo() for c in contadores.values())
+        inicio = time.perf_counter()
+        resultado = original(modelo, *args, **kwargs)
+        with lock:
+            por_tabla[modelo.__tablename__] = {
+                'segundos': round(time.perf_counter() - inicio, 4),
+                'consultas': sum(c.del_hilo() for c in contadores.values()) - consultas_antes,
+                'filas': sum(resultado[:2]),
+            }
+        return resultado
+
+    consultas_antes = {lado: c.total for lado, c in contadores.items()}
+    setattr(sync_manager, nombre_funcion, medida)
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    try:
+        exito = ejecutar()
+    finally:
+        segundos = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        setattr(sync_manager, nombre_funcion, original)
+
+    filas = sum(t['filas'] for t in por_tabla.values())
+    orden = [m.__tablename__ for m in modelos]
+    return {
+        'exito': bool(exito),
+        'segundos': round(segundos, 4),
+        'filas': filas,
+        'filas_por_segundo': round(filas / segundos, 1) if segundos else None,
+        'consultas': {lado: c.total - consultas_antes[lado] for lado, c in contadores.items()},
+        'memoria_pico_mb': round(pico / 1024 / 1024, 2),
+        'tablas': {t: por_tabla[t] for t in orden + sorted(set(por_tabla) - set(orden)) if t in por_tabla},
+    }
+
+
+def version_actual() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def mensajes_silenciosos(errores):
+    def st_display_func(mensaje, is_error=False, is_warning=False):
+        if is_error or is_warning:
+            errores.append(mensaje)
+    return st_display_func
+
+# ====================================================================
+# PRINCIPAL
+# ====================================================================
+
+def main():
+    # Los print de la sincronización van a stderr; stdout queda para el JSON
+    with redirect_stdout(sys.stderr):
+        resultado, salida = correr_benchmark()
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if salida:
+        with open(salida, 'w', encoding='utf-8') as archivo:
+            archivo.write(texto)
+        print(f"✅ Resultados en {salida}", file=sys.stderr)
+    else:
+        print(texto)
+
+
+def correr_benchmark():
+    parser = argparse.ArgumentParser(description="Benchmark de sincronización con un remoto SQLite local.")
+    parser.add_argument("--filas", type=int, default=1000, help="filas sintéticas por tabla (default: 1000)")
+    parser.add_argument("--lote", type=int, default=500, help="tamaño de lote del envío (default: 500)")
+    parser.add_argument("--serial", action="store_true", help="desactiva el planificador en paralelo")
+    parser.add_argument("--semilla", type=int, default=42, help="semilla de los datos sintéticos")
+    parser.add_argument("--directorio", help="carpeta para las bases (default: temporal)")
+    parser.add_argument("--salida", help="archivo JSON de resultados (default: salida estándar)")
+    args = parser.parse_args()
+
+    directorio = args.directorio or tempfile.mkdtemp(prefix="bench_sync_")
+    os.makedirs(directorio, exist_ok=True)
+    ruta_local = os.path.join(directorio, "local.db")
+    ruta_remoto = os.path.join(directorio, "remoto.db")
+    for ruta in (ruta_local, ruta_remoto):
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+    modelos = modelos_benchmark()
+
+    # Local con el perfil normal; el "remoto" sin diario ni tablas de control
+    engine_local = crear_engine_local(ruta_local, modelos)
+    engine_remoto = create_engine(f"sqlite:///{ruta_remoto}", connect_args={"check_same_thread": False})
+    configurar_transacciones(engine_remoto)
+    SQLModel.metadata.create_all(engine_remoto, tables=[m.__table__ for m in modelos])
+    paralelo = not args.serial
+    errores = []
+    mostrar = mensajes_silenciosos(errores)
+
+    print(f"📦 Generando {args.filas} filas × {len(modelos)} tablas en el remoto...", file=sys.stderr)
+    sembradas_remoto = poblar(engine_remoto, modelos, args.filas, 1, local=False, semilla=args.semilla)
+
+    contadores = {'local': ContadorConsultas(engine_local), 'remoto': ContadorConsultas(engine_remoto)}
+
+    print("📥 Remoto → Local...", file=sys.stderr)
+    descarga = medir_direccion(
+        'sincronizar_tabla_simple',
+        lambda: sync_manager.sincronizar_bases_de_datos(engine_local, engine_remoto, mostrar, paralelo=paralelo),
+        contadores, modelos
+    )
+
+    # Filas nuevas en local, con ids que no chocan con las descargadas
+    with engine_local.connect() as conn:
+        inicio = max(
+            (conn.execute(select(func.max(getattr(m, obtener_pk_field(m))))).scalar() or 0) for m in modelos
+        ) + 1
+    sembradas_local = poblar(engine_local, modelos, args.filas, inicio, local=True, semilla=args.semilla + 1)
+    sembrar_diario(engine_local)
+
+    print("📤 Local → Remoto...", file=sys.stderr)
+    envio = medir_direccion(
+        'enviar_tabla',
+        lambda: sync_manager.sincronizar_local_a_remoto(
+            engine_local, engine_remoto, mostrar, lote=args.lote, paralelo=paralelo
+        ),
+        contadores, modelos
+    )
+
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': version_actual(),
+        'parametros': {
+            'filas_por_tabla': args.filas, 'lote': args.lote,
+            'paralelo': paralelo, 'semilla': args.semilla,
+        },
+        'tablas': len(modelos),
+        'filas_sembradas': {'remoto': sembradas_remoto, 'local': sembradas_local},
+        'descarga': descarga,
+        'envio': envio,
+        'errores': errores,
+    }
+    return resultado, args.salida
+
+
+if __name__ == "__main__":
+    main()
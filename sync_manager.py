@@ -8,49 +8,31 @@ CAMBIO ARQUITECTÓNICO: Todos los modelos actualizados para usar Feligres
 
 from typing import List, Dict, Any, Optional, Type, Tuple
 from sqlmodel import Session, select, SQLModel
+from sqlalchemy import event, update, insert, delete, func, cast, case, literal, String, BigInteger, Numeric
+from sqlalchemy.dialects.postgresql import BIT
 from sqlalchemy.exc import IntegrityError
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from enum import Enum
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import nullcontext
+import threading
 import traceback
+import argparse
+import hashlib
+import signal
 import time
+import os
 
-from models import (
-    # Geografía
-    Pais, Provincia, Arquidiocesis, Decanato, Parroquia, Comunidad, Capilla,
-    
-    # ⚠️ CAMBIO CRÍTICO: Persona → Feligres
-    Feligres, Telefono, Direccion,
-    
-    # Catequesis
-    CentroCatecismo, Catecumeno, GrupoCatequesis, RolCatequista, RolCatequistaIntegrante,
-    
-    # Clero
-    Presbitero,
-    
-    # Sacramentos
-    SacramentoBautizo, SacramentoConfirmacion, SacramentoEucaristia, 
-    SacramentoMatrimonio, RenovacionBautismal,
-    
-    # Grupos y educación
-    GrupoParroquial, Rol, MembresiaGrupo, Curso, TemaCurso, Actividad, 
-    Horario, Salon, ReservacionSalon, Sesion, Inscripcion, RegistroAsistencia, 
-    ReunionGrupal, AsistenciaReunion,
-    
-    # Sistema
-    Usuario,
-    
-    # Finanzas e inventario
-    PerfilUsuario, UsuarioPerfil,
-    PresupuestoAnual, CategoriaFinanciera, Donador, TransaccionFinanciera,
-    Bodega, AreaParroquial, CategoriaInventario, BienInventario, MovimientoBien,
-    
-    # Actas
-    TipoReunion, ActaReunion, AsistenteActa, HistorialActa,
-    
-    # Constancias
-    ConfiguracionConstancia, SolicitudConstancia, ConstanciaEmitida,
-    HistorialTransaccionConstancia, VerificacionConstancia,
-    PlantillaCorreoConstancia, ConfiguracionCampoPlantilla
+from models_sync import (
+    CursorSincronizacion, MapaIdSincronizacion, DiarioCambio,
+    EjecucionSincronizacion, AvanceSincronizacion, EstadoSincronizador
 )
+from database.diario import SIN_DIARIO, leer_diario, confirmar_diario, contar_diario
+from database.catalogos import invalidar as invalidar_catalogo
+
+import models
+from models import Feligres
 
 # ====================================================================
 # CONFIGURACIÓN
@@ -80,128 +62,180 @@ UNIQUE_FIELDS = {
 }
 
 # ✅ ORDEN DE SINCRONIZACIÓN COMPLETO Y CORRECTO
-SYNC_ORDER = [
+# Por nombre: el planificador toma las tablas de SQLModel.metadata
+# (descubrir_modelos) y este orden solo desempata, así que un models.py
+# abreviado, sin alguno de estos modelos, no impide importar el módulo.
+_ORDEN_SINCRONIZACION = [
     # ========================================
     # GEOGRAFÍA (sin cambios)
     # ========================================
-    Pais,
-    Provincia,
-    Arquidiocesis,
-    Decanato,
-    Parroquia,
-    Comunidad,
-    Capilla,
+    'Pais',
+    'Provincia',
+    'Arquidiocesis',
+    'Decanato',
+    'Parroquia',
+    'Comunidad',
+    'Capilla',
     
     # ========================================
     # ⚠️ FELIGRESES (ANTES: PERSONAS)
     # ========================================
-    Feligres,      # ⚠️ CAMBIO CRÍTICO
-    Telefono,      # Depende de Feligres
-    Direccion,     # Depende de Feligres
+    'Feligres',      # ⚠️ CAMBIO CRÍTICO
+    'Telefono',      # Depende de Feligres
+    'Direccion',     # Depende de Feligres
     
     # ========================================
     # CATEQUESIS
     # ========================================
-    CentroCatecismo,
-    GrupoCatequesis,
-    RolCatequista,
-    RolCatequistaIntegrante,
-    Catecumeno,    # Depende de Feligres
+    'CentroCatecismo',
+    'GrupoCatequesis',
+    'RolCatequista',
+    'RolCatequistaIntegrante',
+    'Catecumeno',    # Depende de Feligres
     
     # ========================================
     # CLERO
     # ========================================
-    Presbitero,    # Depende de Feligres
+    'Presbitero',    # Depende de Feligres
     
     # ========================================
     # SACRAMENTOS
     # ========================================
-    SacramentoBautizo,       # Depende de Feligres
-    SacramentoConfirmacion,  # Depende de Feligres
-    SacramentoEucaristia,    # Depende de Feligres
-    SacramentoMatrimonio,    # Depende de Feligres
-    RenovacionBautismal,     # Depende de Feligres
+    'SacramentoBautizo',       # Depende de Feligres
+    'SacramentoConfirmacion',  # Depende de Feligres
+    'SacramentoEucaristia',    # Depende de Feligres
+    'SacramentoMatrimonio',    # Depende de Feligres
+    'RenovacionBautismal',     # Depende de Feligres
     
     # ========================================
     # GRUPOS Y EDUCACIÓN
     # ========================================
-    GrupoParroquial,
-    Rol,
-    MembresiaGrupo,  # Depende de Feligres
-    Curso,
-    TemaCurso,
-    Actividad,
-    Salon,
-    Horario,
-    ReservacionSalon,  # Depende de Feligres
-    Sesion,
-    Inscripcion,       # Depende de Feligres
-    RegistroAsistencia,  # Depende de Feligres
-    ReunionGrupal,
-    AsistenciaReunion,   # Depende de Feligres
+    'GrupoParroquial',
+    'Rol',
+    'MembresiaGrupo',  # Depende de Feligres
+    'Curso',
+    'TemaCurso',
+    'Actividad',
+    'Salon',
+    'Horario',
+    'ReservacionSalon',  # Depende de Feligres
+    'Sesion',
+    'Inscripcion',       # Depende de Feligres
+    'RegistroAsistencia',  # Depende de Feligres
+    'ReunionGrupal',
+    'AsistenciaReunion',   # Depende de Feligres
     
     # ========================================
     # SISTEMA
     # ========================================
-    PerfilUsuario,
-    Usuario,         # Depende de Feligres
-    UsuarioPerfil,   # Depende de Usuario
+    'PerfilUsuario',
+    'Usuario',         # Depende de Feligres
+    'UsuarioPerfil',   # Depende de Usuario
     
     # ========================================
     # FINANZAS
     # ========================================
-    PresupuestoAnual,
-    CategoriaFinanciera,
-    Donador,         # Puede depender de Feligres
-    TransaccionFinanciera,
+    'PresupuestoAnual',
+    'CategoriaFinanciera',
+    'Donador',         # Puede depender de Feligres
+    'TransaccionFinanciera',
     
     # ========================================
     # INVENTARIO
     # ========================================
-    Bodega,
-    AreaParroquial,
-    CategoriaInventario,
-    BienInventario,
-    MovimientoBien,  # Depende de Usuario (que depende de Feligres)
+    'Bodega',
+    'AreaParroquial',
+    'CategoriaInventario',
+    'BienInventario',
+    'MovimientoBien',  # Depende de Usuario (que depende de Feligres)
     
     # ========================================
     # ACTAS
     # ========================================
-    TipoReunion,
-    ActaReunion,     # Depende de Feligres (responsable)
-    AsistenteActa,   # Depende de Feligres
-    HistorialActa,   # Depende de Usuario
+    'TipoReunion',
+    'ActaReunion',     # Depende de Feligres (responsable)
+    'AsistenteActa',   # Depende de Feligres
+    'HistorialActa',   # Depende de Usuario
     
     # ========================================
     # CONSTANCIAS
     # ========================================
-    ConfiguracionConstancia,
-    PlantillaCorreoConstancia,
-    ConfiguracionCampoPlantilla,
-    SolicitudConstancia,
-    ConstanciaEmitida,
-    HistorialTransaccionConstancia,
-    VerificacionConstancia,
+    'ConfiguracionConstancia',
+    'PlantillaCorreoConstancia',
+    'ConfiguracionCampoPlantilla',
+    'SolicitudConstancia',
+    'ConstanciaEmitida',
+    'HistorialTransaccionConstancia',
+    'VerificacionConstancia',
 ]
 
+SYNC_ORDER = [getattr(models, nombre) for nombre in _ORDEN_SINCRONIZACION if hasattr(models, nombre)]
+
 # ====================================================================
-# CACHÉ SIMPLE
+# CACHÉ DE IDS (RESPALDADO EN sync_mapa_id)
 # ====================================================================
 
 class SyncCache:
-    """Caché simplificado sin threading complejo."""
+    """
+    Mapa id_local ↔ id_remoto por tabla.
     
-    def __init__(self):
+    Con engine_local se respalda en la tabla sync_mapa_id: cada tabla se
+    carga de una sola lectura la primera vez que se consulta, y las
+    búsquedas posteriores son de diccionario. Sin engine_local funciona
+    como antes, solo en memoria.
+    """
+    
+    def __init__(self, engine_local=None):
+        self.engine_local = engine_local
         self.mapeo: Dict[str, Dict[int, int]] = {}
+        self.inverso: Dict[str, Dict[int, int]] = {}
         self.duplicados: Dict[str, Dict[str, int]] = {}
-        
+        self._bloqueo = threading.Lock()
+    
+    def cargar(self, tabla: str):
+        """Carga el mapa persistente de una tabla (una vez por ejecución)."""
+        if tabla in self.mapeo:
+            return
+        # La lectura va fuera del bloqueo; si dos hilos cargan a la vez, gana el primero
+        pares = leer_mapa_persistente(self.engine_local, tabla) if self.engine_local else {}
+        with self._bloqueo:
+            if tabla not in self.mapeo:
+                self.inverso[tabla] = {id_remoto: id_local for id_local, id_remoto in pares.items()}
+                self.mapeo[tabla] = pares
+    
     def agregar_mapeo(self, tabla: str, id_local: int, id_remoto: int):
-        if tabla not in self.mapeo:
-            self.mapeo[tabla] = {}
-        self.mapeo[tabla][id_local] = id_remoto
+        self.cargar(tabla)
+        mapeo, inverso = self.mapeo[tabla], self.inverso[tabla]
+        
+        # Un id solo puede estar emparejado con uno del otro lado
+        anterior_remoto = mapeo.pop(id_local, None)
+        if anterior_remoto is not None:
+            inverso.pop(anterior_remoto, None)
+        anterior_local = inverso.pop(id_remoto, None)
+        if anterior_local is not None:
+            mapeo.pop(anterior_local, None)
+        
+        mapeo[id_local] = id_remoto
+        inverso[id_remoto] = id_local
+    
+    def agregar_mapeos(self, tabla: str, pares: Dict[int, int]):
+        for id_local, id_remoto in pares.items():
+            self.agregar_mapeo(tabla, id_local, id_remoto)
+    
+    def eliminar_mapeos(self, tabla: str, ids_locales: List[int]):
+        self.cargar(tabla)
+        for id_local in ids_locales:
+            id_remoto = self.mapeo[tabla].pop(id_local, None)
+            if id_remoto is not None:
+                self.inverso[tabla].pop(id_remoto, None)
     
     def obtener_id_remoto(self, tabla: str, id_local: int) -> Optional[int]:
-        return self.mapeo.get(tabla, {}).get(id_local)
+        self.cargar(tabla)
+        return self.mapeo[tabla].get(id_local)
+    
+    def obtener_id_local(self, tabla: str, id_remoto: int) -> Optional[int]:
+        self.cargar(tabla)
+        return self.inverso[tabla].get(id_remoto)
     
     def agregar_duplicado(self, tabla: str, valor: str, id_reg: int):
         if tabla not in self.duplicados:
@@ -211,6 +245,68 @@ class SyncCache:
     def buscar_por_unico(self, tabla: str, valor: str) -> Optional[int]:
         return self.duplicados.get(tabla, {}).get(valor)
 
+def leer_mapa_persistente(engine_local, tabla: str) -> Dict[int, int]:
+    """
+    Lee {id_local: id_remoto} de sync_mapa_id en una sola consulta.
+    La primera vez se siembra con la columna id_remoto de la propia tabla.
+    """
+    with Session(engine_local) as session:
+        filas = session.exec(
+            select(MapaIdSincronizacion.id_local, MapaIdSincronizacion.id_remoto)
+            .where(MapaIdSincronizacion.tabla == tabla)
+        ).all()
+    
+    if filas:
+        return dict(filas)
+    
+    modelo = next((m for m in descubrir_modelos() if m.__tablename__ == tabla), None)
+    if modelo is None:
+        return {}
+    
+    pk_col = getattr(modelo, obtener_pk_field(modelo))
+    with Session(engine_local) as session:
+        pares = dict(session.exec(
+            select(pk_col, modelo.id_remoto).where(modelo.id_remoto.is_not(None))
+        ).all())
+    
+    if pares:
+        with escritura_local(engine_local), Session(engine_local) as session:
+            guardar_mapa_persistente(session, tabla, pares)
+            session.commit()
+    
+    return pares
+
+def borrar_mapa_persistente(session_local: Session, tabla: str, ids_locales: List[int]):
+    """Quita de sync_mapa_id los pares de registros eliminados. No hace commit."""
+    if not ids_locales:
+        return
+    mapa = MapaIdSincronizacion.__table__
+    session_local.execute(
+        delete(mapa).where((mapa.c.tabla == tabla) & mapa.c.id_local.in_(ids_locales))
+    )
+
+def guardar_mapa_persistente(session_local: Session, tabla: str, pares: Dict[int, int]):
+    """Escribe pares {id_local: id_remoto} en sync_mapa_id. No hace commit."""
+    if not pares:
+        return
+    
+    # Si dos locales apuntan al mismo remoto, gana el último
+    pares = {id_local: id_remoto for id_remoto, id_local in
+             {id_remoto: id_local for id_local, id_remoto in pares.items()}.items()}
+    
+    mapa = MapaIdSincronizacion.__table__
+    session_local.execute(
+        delete(mapa).where(
+            (mapa.c.tabla == tabla) &
+            (mapa.c.id_local.in_(list(pares.keys())) | mapa.c.id_remoto.in_(list(pares.values())))
+        )
+    )
+    session_local.execute(
+        insert(mapa),
+        [{'tabla': tabla, 'id_local': id_local, 'id_remoto': id_remoto}
+         for id_local, id_remoto in pares.items()]
+    )
+
 # ====================================================================
 # FUNCIONES AUXILIARES
 # ====================================================================
@@ -219,42 +315,95 @@ def obtener_pk_field(modelo: Type[SQLModel]) -> str:
     """Obtiene campo de clave primaria."""
     return list(modelo.__table__.primary_key.columns)[0].name
 
-def buscar_registro_existente(
+def normalizar_unico(valor):
+    """Normaliza un valor de campo único para compararlo (CURP, folio...)."""
+    if isinstance(valor, str):
+        return valor.strip().upper()
+    return valor
+
+def resolver_existentes(
     modelo: Type[SQLModel],
-    registro_origen,
+    registros_origen: List[SQLModel],
     session: Session,
-    cache: SyncCache
-) -> Optional[SQLModel]:
-    """Busca registro existente por id_remoto o campos únicos."""
+    cache: SyncCache,
+    hacia_remoto: bool
+) -> Dict[Any, SQLModel]:
+    """
+    Versión por lotes de buscar_registro_existente.
+    
+    Para un lote de filas origen (50-1000) hace un solo SELECT ... WHERE
+    pk IN (...) con los ids conocidos (mapa de ids o id_remoto) y un
+    SELECT ... WHERE campo IN (...) por cada campo de UNIQUE_FIELDS para
+    las filas que sigan sin pareja.
+    
+    Retorna {pk_origen: registro_destino}. Los errores de base de datos se
+    propagan al llamador.
+    """
     tabla = modelo.__tablename__
+    pk_field = obtener_pk_field(modelo)
+    pk_col = getattr(modelo, pk_field)
+    resultado: Dict[Any, SQLModel] = {}
     
-    # 1. Por id_remoto
-    if hasattr(registro_origen, 'id_remoto') and registro_origen.id_remoto:
-        try:
-            registro = session.get(modelo, registro_origen.id_remoto)
-            if registro:
-                return registro
-        except:
-            pass
-    
-    # 2. Por campos únicos
-    campos = UNIQUE_FIELDS.get(tabla, [])
-    for campo in campos:
-        if hasattr(registro_origen, campo):
-            valor = getattr(registro_origen, campo)
-            if valor:
-                if isinstance(valor, str):
-                    valor = valor.strip().upper()
-                
-                try:
-                    statement = select(modelo).where(getattr(modelo, campo) == valor)
-                    registro = session.exec(statement).first()
-                    if registro:
-                        return registro
-                except:
-                    pass
+    if not registros_origen:
+        return resultado
     
-    return None
+    # 1. Por mapa de ids (o id_remoto en el sentido Local → Remoto)
+    candidatos = {}
+    for origen in registros_origen:
+        pk_origen = getattr(origen, pk_field)
+        if hacia_remoto:
+            id_destino = cache.obtener_id_remoto(tabla, pk_origen) or getattr(origen, 'id_remoto', None)
+        else:
+            id_destino = cache.obtener_id_local(tabla, pk_origen)
+        if id_destino:
+            candidatos[pk_origen] = id_destino
+    
+    if candidatos:
+        destinos = {
+            getattr(r, pk_field): r
+            for r in session.exec(select(modelo).where(pk_col.in_(set(candidatos.values())))).all()
+        }
+        for pk_origen, id_destino in candidatos.items():
+            if id_destino in destinos:
+                resultado[pk_origen] = destinos[id_destino]
+    
+    # 2. Por campos únicos, solo para los que siguen sin pareja
+    for campo in UNIQUE_FIELDS.get(tabla, []):
+        if not hasattr(modelo, campo):
+            continue
+        
+        faltantes = {}
+        for origen in registros_origen:
+            pk_origen = getattr(origen, pk_field)
+            valor = normalizar_unico(getattr(origen, campo, None))
+            if pk_origen not in resultado and valor:
+                faltantes[pk_origen] = valor
+        
+        if not faltantes:
+            continue
+        
+        destinos = {
+            getattr(r, campo): r
+            for r in session.exec(
+                select(modelo).where(getattr(modelo, campo).in_(set(faltantes.values())))
+            ).all()
+        }
+        for pk_origen, valor in faltantes.items():
+            if valor in destinos:
+                resultado[pk_origen] = destinos[valor]
+    
+    return resultado
+
+def buscar_registro_existente(
+    modelo: Type[SQLModel],
+    registro_origen,
+    session: Session,
+    cache: SyncCache,
+    hacia_remoto: bool = True
+) -> Optional[SQLModel]:
+    """Busca registro existente por id_remoto o campos únicos (una sola fila)."""
+    existentes = resolver_existentes(modelo, [registro_origen], session, cache, hacia_remoto)
+    return existentes.get(getattr(registro_origen, obtener_pk_field(modelo)))
 
 def copiar_campos(registro_origen, modelo_destino: Type[SQLModel]) -> Dict[str, Any]:
     """Copia campos básicos sin procesamiento complejo."""
@@ -270,6 +419,245 @@ def copiar_campos(registro_origen, modelo_destino: Type[SQLModel]) -> Dict[str,
     
     return datos
 
+def sin_cambios(local, datos: Dict[str, Any], id_remoto: int) -> bool:
+    """True si el registro local ya tiene `datos` y está ligado a `id_remoto`."""
+    if getattr(local, 'id_remoto', id_remoto) != id_remoto:
+        return False
+    if not getattr(local, 'sincronizado', True):
+        return False
+    return all(getattr(local, campo, None) == valor for campo, valor in datos.items())
+
+def traducir_fks(
+    modelo: Type[SQLModel],
+    datos: Dict[str, Any],
+    cache: SyncCache,
+    hacia_remoto: bool
+) -> Dict[str, Any]:
+    """
+    Traduce las llaves foráneas de `datos` al espacio de ids del destino
+    usando el mapa de la tabla padre. Si no hay par conocido, el valor
+    se deja igual (comportamiento anterior).
+    """
+    for fk in modelo.__table__.foreign_keys:
+        campo = fk.parent.name
+        valor = datos.get(campo)
+        if valor is None:
+            continue
+        
+        tabla_padre = fk.column.table.name
+        if hacia_remoto:
+            traducido = cache.obtener_id_remoto(tabla_padre, valor)
+        else:
+            traducido = cache.obtener_id_local(tabla_padre, valor)
+        
+        if traducido is not None:
+            datos[campo] = traducido
+    
+    return datos
+
+# ====================================================================
+# CURSORES INCREMENTALES (REMOTO → LOCAL)
+# ====================================================================
+
+def obtener_cursor(engine_local, tabla: str) -> Optional[CursorSincronizacion]:
+    """Obtiene la marca de agua de la última descarga de una tabla."""
+    with Session(engine_local) as session:
+        return session.get(CursorSincronizacion, tabla)
+
+def guardar_cursor(engine_local, tabla: str, marca_id: Optional[int],
+                   marca_fecha: Optional[datetime]):
+    """Avanza la marca de agua de una tabla (nunca la retrocede)."""
+    with Session(engine_local) as session:
+        cursor = session.get(CursorSincronizacion, tabla)
+        if not cursor:
+            cursor = CursorSincronizacion(tabla=tabla)
+        
+        if marca_id is not None and (cursor.marca_id is None or marca_id > cursor.marca_id):
+            cursor.marca_id = marca_id
+        if marca_fecha is not None and (cursor.marca_fecha is None or marca_fecha > cursor.marca_fecha):
+            cursor.marca_fecha = marca_fecha
+        cursor.fecha_actualizacion = datetime.now()
+        
+        session.add(cursor)
+        session.commit()
+
+def reiniciar_cursores(engine_local, tablas: Optional[List[str]] = None):
+    """
+    Borra las marcas de agua para forzar una descarga completa.
+    Necesario si la base remota se recrea (los ids vuelven a empezar).
+    """
+    with Session(engine_local) as session:
+        statement = select(CursorSincronizacion)
+        if tablas:
+            statement = statement.where(CursorSincronizacion.tabla.in_(tablas))
+        for cursor in session.exec(statement).all():
+            session.delete(cursor)
+        session.commit()
+
+# Cuánto se relee detrás de la marca de fecha_sync: una transacción remota
+# que selló sus filas antes de la marca pero confirmó después (o un sello
+# de un reloj atrasado) cae dentro de la ventana y no se pierde
+VENTANA_RELECTURA = timedelta(seconds=int(os.environ.get("SGP_VENTANA_RELECTURA", "600")))
+
+def consulta_incremental(modelo: Type[SQLModel], cursor: Optional[CursorSincronizacion]):
+    """
+    Construye el SELECT remoto que solo trae filas nuevas o modificadas.
+    
+    - Altas: clave primaria mayor que marca_id (ids seriales).
+    - Cambios: fecha_sync >= marca_fecha - VENTANA_RELECTURA. En Supabase
+      la sella el trigger de la migración 006 con el reloj del servidor en
+      cada INSERT/UPDATE, incluidas las ediciones hechas fuera de la app.
+      Las filas releídas que no cambiaron se omiten al aplicarlas.
+    """
+    pk_col = getattr(modelo, obtener_pk_field(modelo))
+    statement = select(modelo).order_by(pk_col)
+    
+    if not cursor or cursor.marca_id is None:
+        return statement
+    
+    condicion = pk_col > cursor.marca_id
+    if hasattr(modelo, 'fecha_sync') and cursor.marca_fecha is not None:
+        condicion = condicion | (getattr(modelo, 'fecha_sync') >= cursor.marca_fecha - VENTANA_RELECTURA)
+    
+    return statement.where(condicion)
+
+# ====================================================================
+# EJECUCIONES REANUDABLES
+# ====================================================================
+
+def iniciar_ejecucion(engine_local, direccion: str,
+                      completo: bool = False) -> Tuple[EjecucionSincronizacion, bool]:
+    """
+    Retorna (ejecución, reanudada). Si hay una ejecución de la misma
+    dirección que quedó 'en_curso', se reanuda en lugar de crear otra.
+    """
+    with escritura_local(engine_local), Session(engine_local) as session:
+        pendiente = session.exec(
+            select(EjecucionSincronizacion)
+            .where(EjecucionSincronizacion.direccion == direccion)
+            .where(EjecucionSincronizacion.estado == "en_curso")
+            .order_by(EjecucionSincronizacion.id_ejecucion.desc())
+        ).first()
+        if pendiente:
+            return pendiente, True
+        
+        ejecucion = EjecucionSincronizacion(direccion=direccion, completo=completo)
+        session.add(ejecucion)
+        session.commit()
+        session.refresh(ejecucion)
+        return ejecucion, False
+
+def leer_avance(engine_local, id_ejecucion: int) -> Dict[str, AvanceSincronizacion]:
+    """Puntos de control por tabla de una ejecución."""
+    with Session(engine_local) as session:
+        avances = session.exec(
+            select(AvanceSincronizacion).where(AvanceSincronizacion.id_ejecucion == id_ejecucion)
+        ).all()
+    return {a.tabla: a for a in avances}
+
+def registrar_avance(session_local: Session, id_ejecucion: int, tabla: str,
+                     ultima_clave: Optional[int] = None, completada: bool = False):
+    """Guarda el punto de control de una tabla. No hace commit (va con el lote)."""
+    avance = session_local.get(AvanceSincronizacion, (id_ejecucion, tabla))
+    if not avance:
+        avance = AvanceSincronizacion(id_ejecucion=id_ejecucion, tabla=tabla)
+    if ultima_clave is not None:
+        avance.ultima_clave = ultima_clave
+    avance.completada = avance.completada or completada
+    avance.fecha_actualizacion = datetime.now()
+    session_local.add(avance)
+
+def finalizar_ejecucion(engine_local, id_ejecucion: int, estado: str = "completada"):
+    """Cierra la ejecución; ya no se reanudará."""
+    with escritura_local(engine_local), Session(engine_local) as session:
+        ejecucion = session.get(EjecucionSincronizacion, id_ejecucion)
+        if ejecucion:
+            ejecucion.estado = estado
+            ejecucion.fecha_fin = datetime.now()
+            session.add(ejecucion)
+            session.commit()
+
+def marcar_tabla_completada(engine_local, id_ejecucion: Optional[int], tabla: str):
+    if id_ejecucion is None:
+        return
+    with escritura_local(engine_local), Session(engine_local) as session:
+        registrar_avance(session, id_ejecucion, tabla, completada=True)
+        session.commit()
+
+# ====================================================================
+# RITMO ADAPTATIVO
+# ====================================================================
+
+class RitmoAdaptativo:
+    """
+    Reemplaza las pausas fijas entre lotes y entre ciclos. Lleva un promedio
+    móvil de la latencia remota y de la tasa de error: con Supabase sano no
+    hay pausas; si responde lento o falla, el ritmo se frena en proporción.
+    """
+    
+    def __init__(self, intervalo: float = 60.0, intervalo_max: float = 600.0,
+                 pausa_max: float = 5.0, suavizado: float = 0.2):
+        self.intervalo = intervalo
+        self.intervalo_max = intervalo_max
+        self.pausa_max = pausa_max
+        self.suavizado = suavizado
+        self.latencia: Optional[float] = None  # segundos
+        self.tasa_error = 0.0
+        self.fallos_seguidos = 0
+        self._lock = threading.Lock()
+    
+    def registrar(self, segundos: float, exito: bool = True):
+        """Anota una operación remota (lectura o lote enviado)."""
+        a = self.suavizado
+        with self._lock:
+            self.latencia = segundos if self.latencia is None else (1 - a) * self.latencia + a * segundos
+            self.tasa_error = (1 - a) * self.tasa_error + a * (0.0 if exito else 1.0)
+    
+    def medir(self):
+        """Contexto que mide una operación remota y registra si falló."""
+        return _MedicionRemota(self)
+    
+    def pausa_lote(self) -> float:
+        """Segundos de espera entre lotes: cero mientras no haya errores."""
+        with self._lock:
+            if not self.latencia or self.tasa_error < 0.01:
+                return 0.0
+            return min(self.pausa_max, self.latencia * self.tasa_error * 4)
+    
+    def esperar_lote(self):
+        pausa = self.pausa_lote()
+        if pausa:
+            time.sleep(pausa)
+    
+    def fin_ciclo(self, exito: bool):
+        with self._lock:
+            self.fallos_seguidos = 0 if exito else self.fallos_seguidos + 1
+    
+    def intervalo_ciclo(self) -> float:
+        """Segundos hasta la siguiente descarga: se duplica con cada ciclo fallido."""
+        with self._lock:
+            espera = self.intervalo * (2 ** min(self.fallos_seguidos, 10))
+            if self.latencia:
+                # Nunca dedicar más de ~10% del tiempo a un remoto lento
+                espera = max(espera, self.latencia * 10)
+            return min(self.intervalo_max, espera)
+
+class _MedicionRemota:
+    def __init__(self, ritmo: RitmoAdaptativo):
+        self.ritmo = ritmo
+    
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+    
+    def __exit__(self, tipo, valor, tb):
+        self.ritmo.registrar(time.perf_counter() - self.inicio, exito=tipo is None)
+        return False
+
+def medir_remoto(ritmo: Optional[RitmoAdaptativo]):
+    """ritmo.medir() o un contexto vacío si no hay ritmo."""
+    return ritmo.medir() if ritmo else nullcontext()
+
 # ====================================================================
 # SINCRONIZACIÓN SIMPLE
 # ====================================================================
@@ -280,40 +668,86 @@ def sincronizar_tabla_simple(
     engine_remoto,
     cache: SyncCache,
     st_display_func,
-    batch_size: int = 50
+    batch_size: int = 50,
+    incremental: bool = True,
+    id_ejecucion: Optional[int] = None,
+    desde_clave: Optional[int] = None,
+    ritmo: Optional[RitmoAdaptativo] = None
 ) -> Tuple[int, int, int]:
-    """Sincroniza una tabla de forma simple y segura."""
+    """
+    Sincroniza una tabla de forma simple y segura.
+    Con incremental=True solo descarga lo cambiado desde la última marca de agua.
+    
+    Con id_ejecucion, cada lote guarda su punto de control en la misma
+    transacción; desde_clave reanuda después de la última clave confirmada.
+    El ritmo (opcional) mide la lectura remota y decide la pausa entre lotes.
+    
+    Las filas remotas se leen por páginas de batch_size ordenadas por la
+    llave primaria (WHERE pk > última ORDER BY pk LIMIT n), cada una en su
+    propia transacción corta, y se aplican al llegar: la memoria no depende
+    del tamaño de la tabla y no queda una conexión del pooler de Supabase
+    ocupada mientras se escribe en local.
+    """
     
     tabla = modelo.__tablename__
     pk_field = obtener_pk_field(modelo)
     creados = actualizados = errores = 0
     
     try:
-        # Leer todos los remotos
-        with Session(engine_remoto) as session:
-            remotos = session.exec(select(modelo)).all()
+        # Leer remotos (solo los cambiados desde el último cursor)
+        cursor = obtener_cursor(engine_local, tabla) if incremental else None
+        statement = consulta_incremental(modelo, cursor)
+        pk_col = getattr(modelo, pk_field)
         
-        if not remotos:
-            return 0, 0, 0
+        recibidas = 0
+        marca_id = marca_fecha = None
+        ultima = desde_clave
         
-        # Procesar en lotes pequeños
-        for i in range(0, len(remotos), batch_size):
-            batch = remotos[i:i+batch_size]
+        # Procesar en lotes pequeños: una página remota por lote
+        while True:
+            pagina = statement if ultima is None else statement.where(pk_col > ultima)
+            with medir_remoto(ritmo), Session(engine_remoto) as session_remota:
+                batch = session_remota.exec(pagina.limit(batch_size)).all()
+            if not batch:
+                break
+            ultima = getattr(batch[-1], pk_field)
+            
+            recibidas += len(batch)
+            marca_id = max(marca_id or 0, max(getattr(r, pk_field) for r in batch))
+            fechas = [r.fecha_sync for r in batch if getattr(r, 'fecha_sync', None)]
+            if fechas and (marca_fecha is None or max(fechas) > marca_fecha):
+                marca_fecha = max(fechas)
             
             # Procesar batch
-            with Session(engine_local) as session_local:
+            with escritura_local(engine_local), Session(engine_local, info=SIN_DIARIO) as session_local:
+                pares: Dict[int, int] = {}
+                
+                # Buscar existentes del lote completo: mapa de ids y luego campos únicos
+                existentes = resolver_existentes(modelo, batch, session_local, cache, hacia_remoto=False)
+                
                 for remoto in batch:
                     try:
                         id_remoto = getattr(remoto, pk_field)
+                        datos = traducir_fks(modelo, copiar_campos(remoto, modelo), cache, hacia_remoto=False)
                         
-                        # Buscar existente
-                        local = buscar_registro_existente(modelo, remoto, session_local, cache)
+                        local = existentes.get(id_remoto)
+                        if local is not None and sin_cambios(local, datos, id_remoto):
+                            # Releída por la ventana: ya está aplicada
+                            pares[getattr(local, pk_field)] = id_remoto
+                            continue
                         
-                        if local:
-                            # Actualizar
-                            for campo, valor in copiar_campos(remoto, modelo).items():
-                                if hasattr(local, campo):
-                                    setattr(local, campo, valor)
+                        # Cada fila en su SAVEPOINT: un error no deshace el lote
+                        with session_local.begin_nested():
+                            if local:
+                                # Actualizar
+                                for campo, valor in datos.items():
+                                    if hasattr(local, campo):
+                                        setattr(local, campo, valor)
+                                creado = False
+                            else:
+                                # Crear
+                                local = modelo(**datos)
+                                creado = True
                             
                             if hasattr(local, 'id_remoto'):
                                 local.id_remoto = id_remoto
@@ -323,44 +757,56 @@ def sincronizar_tabla_simple(
                                 local.fecha_sync = datetime.now()
                             
                             session_local.add(local)
-                            actualizados += 1
-                        else:
-                            # Crear
-                            datos = copiar_campos(remoto, modelo)
-                            nuevo = modelo(**datos)
-                            
-                            if hasattr(nuevo, 'id_remoto'):
-                                nuevo.id_remoto = id_remoto
-                            if hasattr(nuevo, 'sincronizado'):
-                                nuevo.sincronizado = True
-                            if hasattr(nuevo, 'fecha_sync'):
-                                nuevo.fecha_sync = datetime.now()
-                            
-                            session_local.add(nuevo)
                             session_local.flush()
-                            
-                            id_local = getattr(nuevo, pk_field)
-                            cache.agregar_mapeo(tabla, id_local, id_remoto)
+                        
+                        pares[getattr(local, pk_field)] = id_remoto
+                        if creado:
                             creados += 1
+                        else:
+                            actualizados += 1
                     
                     except IntegrityError:
                         errores += 1
-                        session_local.rollback()
                         continue
                     except Exception as e:
                         errores += 1
                         print(f"Error en {tabla}: {e}")
                         continue
                 
-                # Commit del batch
+                # Commit del batch (datos y mapa de ids en la misma transacción)
                 try:
+                    guardar_mapa_persistente(session_local, tabla, pares)
+                    # El punto de control solo avanza sobre lotes limpios: al
+                    # reanudar se releen desde la primera fila que falló
+                    if id_ejecucion is not None and errores == 0:
+                        registrar_avance(session_local, id_ejecucion, tabla,
+                                         ultima_clave=getattr(batch[-1], pk_field))
                     session_local.commit()
+                    cache.agregar_mapeos(tabla, pares)
                 except Exception as e:
                     session_local.rollback()
+                    errores += 1
                     st_display_func(f"⚠️ Error commit {tabla}: {e}", is_warning=True)
             
-            # Pequeña pausa entre batches
-            time.sleep(0.1)
+            # Una página incompleta es la última: no hace falta otra consulta
+            if len(batch) < batch_size:
+                break
+            if ritmo:
+                ritmo.esperar_lote()
+        
+        if recibidas == 0:
+            marcar_tabla_completada(engine_local, id_ejecucion, tabla)
+            return 0, 0, 0
+        
+        if creados or actualizados:
+            invalidar_catalogo(modelo)
+        
+        # Solo avanzar el cursor y dar la tabla por terminada si todo se
+        # aplicó; si no, la ejecución queda abierta y se reintenta
+        if errores == 0:
+            with escritura_local(engine_local):
+                guardar_cursor(engine_local, tabla, marca_id, marca_fecha)
+            marcar_tabla_completada(engine_local, id_ejecucion, tabla)
         
         return creados, actualizados, errores
     
@@ -368,14 +814,173 @@ def sincronizar_tabla_simple(
         st_display_func(f"❌ Error en {tabla}: {e}", is_error=True)
         return creados, actualizados, errores + 1
 
+# ====================================================================
+# PLANIFICADOR POR DEPENDENCIAS
+# ====================================================================
+
+# SQLite admite un solo escritor: los hilos de trabajo serializan sus commits
+_bloqueo_escritura_local = threading.RLock()
+
+def escritura_local(engine_local):
+    """Contexto para escribir en la base local desde varios hilos."""
+    if engine_local.dialect.name == 'sqlite':
+        return _bloqueo_escritura_local
+    return nullcontext()
+
+def descubrir_modelos() -> List[Type[SQLModel]]:
+    """
+    Modelos con tabla registrados en SQLModel.metadata y con campos de
+    sincronización. Evita que SYNC_ORDER quede desactualizado.
+    """
+    modelos = []
+    for mapper in SQLModel._sa_registry.mappers:
+        modelo = mapper.class_
+        tabla = getattr(modelo, '__table__', None)
+        if tabla is None or tabla.metadata is not SQLModel.metadata:
+            continue
+        # Con un models.py abreviado, una llave foránea hacia un modelo que
+        # no está cargado deja la tabla sin poder crearse: no se sincroniza
+        if any(fk.target_fullname.split('.')[0] not in SQLModel.metadata.tables
+               for fk in tabla.foreign_keys):
+            continue
+        if 'id_remoto' in tabla.c:
+            modelos.append(modelo)
+    return modelos
+
+def construir_grafo_dependencias(
+    modelos: List[Type[SQLModel]]
+) -> Dict[Type[SQLModel], List[Type[SQLModel]]]:
+    """Para cada modelo, los modelos padre a los que apuntan sus llaves foráneas."""
+    por_tabla = {m.__tablename__: m for m in modelos}
+    grafo = {}
+    for modelo in modelos:
+        padres = []
+        for fk in modelo.__table__.foreign_keys:
+            padre = por_tabla.get(fk.column.table.name)
+            # Las auto-referencias (id_padre, id_madre) no bloquean la tabla
+            if padre is not None and padre is not modelo and padre not in padres:
+                padres.append(padre)
+        grafo[modelo] = padres
+    return grafo
+
+def orden_topologico(modelos: List[Type[SQLModel]]) -> List[Type[SQLModel]]:
+    """
+    Orden serial determinista: padres antes que hijos; los empates se
+    resuelven por la posición en SYNC_ORDER y luego por nombre de tabla.
+    Si hay ciclos, las tablas restantes se agregan en ese mismo orden.
+    """
+    def prioridad(modelo):
+        posicion = SYNC_ORDER.index(modelo) if modelo in SYNC_ORDER else len(SYNC_ORDER)
+        return (posicion, modelo.__tablename__)
+    
+    grafo = construir_grafo_dependencias(modelos)
+    faltantes = {m: set(padres) for m, padres in grafo.items()}
+    orden = []
+    
+    while faltantes:
+        listos = sorted((m for m, padres in faltantes.items() if not padres), key=prioridad)
+        if not listos:
+            # Ciclo: se rompe con la tabla de mayor prioridad
+            listos = [min(faltantes, key=prioridad)]
+            print(f"⚠️ Ciclo de dependencias en {listos[0].__tablename__}")
+        
+        siguiente = listos[0]
+        orden.append(siguiente)
+        del faltantes[siguiente]
+        for padres in faltantes.values():
+            padres.discard(siguiente)
+    
+    return orden
+
+def tamano_pool(engine) -> int:
+    """Número de conexiones estables del pool del engine (mínimo 1)."""
+    try:
+        return max(1, engine.pool.size())
+    except Exception:
+        return 1
+
+class MensajesDiferidos:
+    """
+    Acumula los mensajes de un hilo de trabajo. Streamlit solo puede
+    pintar desde el hilo principal, que los vuelca al terminar la tabla.
+    """
+    
+    def __init__(self):
+        self.mensajes: List[Tuple[str, Dict[str, Any]]] = []
+    
+    def __call__(self, mensaje, **kwargs):
+        self.mensajes.append((mensaje, kwargs))
+    
+    def volcar(self, st_display_func):
+        for mensaje, kwargs in self.mensajes:
+            st_display_func(mensaje, **kwargs)
+        self.mensajes = []
+
+def ejecutar_por_dependencias(modelos, tarea, al_terminar, max_workers: int = 1):
+    """
+    Ejecuta tarea(modelo) para cada modelo en cuanto sus padres terminaron.
+    
+    al_terminar(modelo, resultado) se llama siempre en el hilo principal y
+    en orden determinista entre tareas que terminan a la vez. Con
+    max_workers=1 todo corre en serie según orden_topologico.
+    """
+    orden = orden_topologico(modelos)
+    
+    if max_workers <= 1:
+        for modelo in orden:
+            al_terminar(modelo, tarea(modelo))
+        return
+    
+    grafo = construir_grafo_dependencias(orden)
+    faltantes = {m: set(grafo[m]) for m in orden}
+    listos = [m for m in orden if not faltantes[m]]
+    en_curso = {}
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while listos or en_curso:
+            for modelo in listos:
+                del faltantes[modelo]
+                en_curso[pool.submit(tarea, modelo)] = modelo
+            listos = []
+            
+            if not en_curso:
+                break
+            
+            hechos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in sorted(hechos, key=lambda f: orden.index(en_curso[f])):
+                modelo = en_curso.pop(futuro)
+                al_terminar(modelo, futuro.result())
+                for padres in faltantes.values():
+                    padres.discard(modelo)
+            
+            listos = [m for m in orden if m in faltantes and not faltantes[m]]
+    
+    # Un ciclo deja tablas sin lanzar: se corren en serie al final
+    for modelo in [m for m in orden if m in faltantes]:
+        al_terminar(modelo, tarea(modelo))
+
 # ====================================================================
 # FUNCIÓN PRINCIPAL: REMOTO → LOCAL
 # ====================================================================
 
-def sincronizar_bases_de_datos(engine_local, engine_remoto, st_display_func) -> bool:
+def sincronizar_bases_de_datos(engine_local, engine_remoto, st_display_func,
+                               completo: bool = False, paralelo: bool = True,
+                               ritmo: Optional[RitmoAdaptativo] = None) -> bool:
     """
     Sincroniza Remoto → Local de forma segura.
     ACTUALIZADO para usar modelo Feligres
+    
+    Por defecto es incremental (cursor por tabla); completo=True ignora
+    los cursores y vuelve a descargar todas las filas.
+    
+    Las tablas se procesan según sus llaves foráneas: cada una arranca en
+    cuanto terminan sus padres, con tantos hilos como conexiones tiene el
+    pool remoto. paralelo=False usa el orden serial determinista.
+    
+    Si una corrida anterior se interrumpió, se reanuda: las tablas ya
+    terminadas se saltan y la que iba a medias sigue desde su último lote.
+    Una corrida con errores o tablas sin terminar queda 'en_curso' para la
+    siguiente; si la reanudación también falla se cierra como 'con_errores'.
     """
     
     if not engine_local or not engine_remoto:
@@ -384,48 +989,99 @@ def sincronizar_bases_de_datos(engine_local, engine_remoto, st_display_func) ->
     
     st_display_func("🔄 Iniciando sincronización (Remoto → Local)...")
     st_display_func("📋 Modelo actualizado: Feligres (antes Persona)")
-    cache = SyncCache()
+    cache = SyncCache(engine_local)
+    
+    ejecucion, reanudada = iniciar_ejecucion(engine_local, "descarga", completo)
+    avance = leer_avance(engine_local, ejecucion.id_ejecucion) if reanudada else {}
+    if reanudada:
+        completo = ejecucion.completo
+        terminadas = sum(1 for a in avance.values() if a.completada)
+        st_display_func(
+            f"↩️ Reanudando sincronización interrumpida del "
+            f"{ejecucion.fecha_inicio:%d/%m/%Y %H:%M} ({terminadas} tablas ya terminadas)"
+        )
+    elif completo:
+        reiniciar_cursores(engine_local)
     
-    total_creados = total_actualizados = total_errores = 0
+    modelos = descubrir_modelos()
+    max_workers = tamano_pool(engine_remoto) if paralelo else 1
+    totales = {'creados': 0, 'actualizados': 0, 'errores': 0, 'tablas': 0}
+    
+    def tarea(modelo):
+        mensajes = MensajesDiferidos() if max_workers > 1 else st_display_func
+        punto = avance.get(modelo.__tablename__)
+        if punto and punto.completada:
+            return (0, 0, 0), mensajes
+        
+        resultado = sincronizar_tabla_simple(
+            modelo, engine_local, engine_remoto, cache, mensajes,
+            batch_size=50, incremental=not completo,
+            id_ejecucion=ejecucion.id_ejecucion,
+            desde_clave=punto.ultima_clave if punto else None,
+            ritmo=ritmo
+        )
+        return resultado, mensajes
+    
+    def al_terminar(modelo, resultado):
+        (creados, actualizados, errores), mensajes = resultado
+        tabla = modelo.__tablename__
+        totales['tablas'] += 1
+        
+        # Mensaje especial para Feligres
+        if tabla == "feligres":
+            st_display_func(f"📋 [{totales['tablas']}/{len(modelos)}] ⚠️ {tabla} (Modelo Base - antes 'persona')")
+        else:
+            st_display_func(f"📋 [{totales['tablas']}/{len(modelos)}] {tabla}")
+        
+        if isinstance(mensajes, MensajesDiferidos):
+            mensajes.volcar(st_display_func)
+        
+        totales['creados'] += creados
+        totales['actualizados'] += actualizados
+        totales['errores'] += errores
+        
+        if creados > 0 or actualizados > 0:
+            st_display_func(f"  ✅ {creados} creados, {actualizados} actualizados")
+        
+        if errores > 0:
+            st_display_func(f"  ⚠️ {errores} errores", is_warning=True)
     
     try:
-        for i, modelo in enumerate(SYNC_ORDER, 1):
-            tabla = modelo.__tablename__
-            
-            # Mensaje especial para Feligres
-            if tabla == "feligres":
-                st_display_func(f"📋 [{i}/{len(SYNC_ORDER)}] ⚠️ {tabla} (Modelo Base - antes 'persona')...")
-            else:
-                st_display_func(f"📋 [{i}/{len(SYNC_ORDER)}] {tabla}...")
-            
-            creados, actualizados, errores = sincronizar_tabla_simple(
-                modelo, engine_local, engine_remoto, cache, st_display_func, batch_size=50
-            )
-            
-            total_creados += creados
-            total_actualizados += actualizados
-            total_errores += errores
-            
-            if creados > 0 or actualizados > 0:
-                st_display_func(f"  ✅ {creados} creados, {actualizados} actualizados")
-            
-            if errores > 0:
-                st_display_func(f"  ⚠️ {errores} errores", is_warning=True)
-            
-            # Pausa pequeña entre tablas
-            time.sleep(0.1)
+        ejecutar_por_dependencias(modelos, tarea, al_terminar, max_workers=max_workers)
         
         # Resumen
         st_display_func("─" * 60)
-        st_display_func(f"✅ Creados: {total_creados}")
-        st_display_func(f"🔄 Actualizados: {total_actualizados}")
+        st_display_func(f"✅ Creados: {totales['creados']}")
+        st_display_func(f"🔄 Actualizados: {totales['actualizados']}")
         
-        if total_errores > 0:
-            st_display_func(f"⚠️ Errores: {total_errores}", is_warning=True)
+        if totales['errores'] > 0:
+            st_display_func(f"⚠️ Errores: {totales['errores']}", is_warning=True)
         
+        avance = leer_avance(engine_local, ejecucion.id_ejecucion)
+        pendientes = [m.__tablename__ for m in modelos
+                      if not (avance.get(m.__tablename__) and avance[m.__tablename__].completada)]
+        
+        if pendientes:
+            if reanudada:
+                # Segundo intento fallido: se cierra para no dejar las demás
+                # tablas sin descargar; las pendientes no avanzaron su cursor
+                # y la siguiente corrida las vuelve a leer desde ahí
+                finalizar_ejecucion(engine_local, ejecucion.id_ejecucion, "con_errores")
+                st_display_func(
+                    f"⚠️ Sincronización con errores en {', '.join(pendientes)}; "
+                    f"se reintentarán en la siguiente", is_warning=True
+                )
+            else:
+                st_display_func(
+                    f"⏸️ Sincronización incompleta ({', '.join(pendientes)}); "
+                    f"la siguiente la reanuda desde el último lote confirmado", is_warning=True
+                )
+            return False
+        
+        finalizar_ejecucion(engine_local, ejecucion.id_ejecucion)
         st_display_func("✅ Sincronización completada - Modelo Feligres activo")
         
-        return total_errores == 0
+        return totales['errores'] == 0
     
     except Exception as e:
         st_display_func(f"❌ Error crítico: {e}", is_error=True)
@@ -433,161 +1089,1257 @@ def sincronizar_bases_de_datos(engine_local, engine_remoto, st_display_func) ->
         return False
 
 # ====================================================================
-# FUNCIÓN AUXILIAR: LOCAL → REMOTO
+# ENVÍO POR LOTES (UPSERT)
 # ====================================================================
 
-def sincronizar_local_a_remoto(engine_local, engine_remoto, st_display_func) -> bool:
+def columna_conflicto(modelo: Type[SQLModel]) -> Optional[str]:
     """
-    Sincroniza Local → Remoto de forma segura.
-    ACTUALIZADO para usar modelo Feligres
+    Campo único usado como objetivo de ON CONFLICT.
+    Solo sirve si la columna tiene restricción UNIQUE en el modelo.
     """
+    for campo in UNIQUE_FIELDS.get(modelo.__tablename__, []):
+        columna = modelo.__table__.c.get(campo)
+        if columna is None:
+            continue
+        if columna.unique:
+            return campo
+        for indice in modelo.__table__.indexes:
+            if indice.unique and [c.name for c in indice.columns] == [campo]:
+                return campo
+    return None
+
+def obtener_insert_upsert(engine):
+    """Retorna el insert con ON CONFLICT del dialecto, o None si no lo soporta."""
+    dialecto = engine.dialect.name
+    if dialecto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialecto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+def _ejecutar_upsert(
+    modelo: Type[SQLModel],
+    filas: List[Dict[str, Any]],
+    conflicto: str,
+    session_remoto: Session,
+    insert_func
+) -> Dict[int, int]:
+    """Un INSERT ... ON CONFLICT ... RETURNING multi-fila. Retorna {id_local: id_remoto}."""
+    if not filas:
+        return {}
     
-    if not engine_local or not engine_remoto:
-        st_display_func("❌ Se requieren ambas conexiones", is_error=True)
-        return False
+    tabla = modelo.__table__
+    pk_field = obtener_pk_field(modelo)
     
-    st_display_func("🔄 Sincronizando Local → Remoto...")
-    st_display_func("📋 Modelo actualizado: Feligres (antes Persona)")
-    cache = SyncCache()
+    statement = insert_func(tabla).values(filas)
+    columnas = [c for c in filas[0].keys() if c not in (pk_field, conflicto)]
+    statement = statement.on_conflict_do_update(
+        index_elements=[conflicto],
+        set_={c: statement.excluded[c] for c in columnas}
+    ).returning(tabla.c[pk_field], tabla.c['id_local'])
     
-    total_enviados = total_actualizados = 0
+    return {id_local: id_remoto for id_remoto, id_local in session_remoto.execute(statement)}
+
+def _ejecutar_insert(
+    modelo: Type[SQLModel],
+    filas: List[Dict[str, Any]],
+    session_remoto: Session,
+    insert_func
+) -> Dict[int, int]:
+    """INSERT multi-fila sin clave de conflicto. Retorna {id_local: id_remoto}."""
+    if not filas:
+        return {}
     
-    try:
-        for modelo in SYNC_ORDER:
-            tabla = modelo.__tablename__
-            pk_field = obtener_pk_field(modelo)
-            
-            # Buscar no sincronizados
-            with Session(engine_local) as session:
-                if not hasattr(modelo, 'sincronizado'):
-                    continue
-                
-                pendientes = session.exec(
-                    select(modelo).where(
-                        (getattr(modelo, 'sincronizado') == False) |
-                        (getattr(modelo, 'id_remoto').is_(None))
-                    )
-                ).all()
-            
-            if not pendientes:
-                continue
-            
-            # Mensaje especial para Feligres
-            if tabla == "feligres":
-                st_display_func(f"📤 feligres (Modelo Base): {len(pendientes)} pendientes...")
-            else:
-                st_display_func(f"📤 {tabla}: {len(pendientes)} pendientes...")
-            
-            for local in pendientes:
-                try:
-                    id_local = getattr(local, pk_field)
-                    
-                    with Session(engine_remoto) as session_remoto:
-                        remoto = buscar_registro_existente(modelo, local, session_remoto, cache)
-                        
-                        if remoto:
-                            # Actualizar
-                            for campo, valor in copiar_campos(local, modelo).items():
-                                if hasattr(remoto, campo) and campo != pk_field:
-                                    setattr(remoto, campo, valor)
-                            
-                            if hasattr(remoto, 'id_local'):
-                                remoto.id_local = id_local
-                            
-                            session_remoto.add(remoto)
-                            session_remoto.commit()
-                            
-                            id_remoto = getattr(remoto, pk_field)
-                            total_actualizados += 1
-                        else:
-                            # Crear
-                            datos = copiar_campos(local, modelo)
-                            nuevo = modelo(**datos)
-                            
-                            if hasattr(nuevo, 'id_local'):
-                                nuevo.id_local = id_local
-                            
-                            session_remoto.add(nuevo)
-                            session_remoto.commit()
-                            session_remoto.refresh(nuevo)
-                            
-                            id_remoto = getattr(nuevo, pk_field)
-                            total_enviados += 1
-                        
-                        # Actualizar local
-                        with Session(engine_local) as session_local:
-                            registro = session_local.get(modelo, id_local)
-                            if registro:
-                                if hasattr(registro, 'id_remoto'):
-                                    registro.id_remoto = id_remoto
-                                if hasattr(registro, 'sincronizado'):
-                                    registro.sincronizado = True
-                                if hasattr(registro, 'fecha_sync'):
-                                    registro.fecha_sync = datetime.now()
-                                session_local.add(registro)
-                                session_local.commit()
-                
-                except IntegrityError:
-                    continue
-                except Exception as e:
-                    print(f"Error en {tabla}: {e}")
-                    continue
-                
-                # Pausa pequeña
-                time.sleep(0.05)
-        
-        st_display_func(f"✅ Enviados: {total_enviados}, Actualizados: {total_actualizados}")
-        st_display_func("✅ Sincronización Local → Remoto completada")
-        return True
+    tabla = modelo.__table__
+    pk_field = obtener_pk_field(modelo)
+    statement = insert_func(tabla).values(filas).returning(tabla.c[pk_field], tabla.c['id_local'])
     
-    except Exception as e:
-        st_display_func(f"❌ Error: {e}", is_error=True)
-        return False
+    return {id_local: id_remoto for id_remoto, id_local in session_remoto.execute(statement)}
 
-# ====================================================================
-# VERIFICACIÓN DE INTEGRIDAD
-# ====================================================================
+def enviar_lote_upsert(
+    modelo: Type[SQLModel],
+    locales: List[SQLModel],
+    session_remoto: Session,
+    insert_func,
+    cache: Optional[SyncCache] = None
+) -> Dict[int, int]:
+    """
+    Envía un lote de registros locales con sentencias set-based.
+    Con cache, las llaves foráneas se traducen a ids remotos.
+    
+    - Con id_remoto: ON CONFLICT sobre la clave primaria remota.
+    - Con valor en el campo único: ON CONFLICT sobre ese campo.
+    - Resto: INSERT multi-fila.
+    
+    Retorna {id_local: id_remoto}. No hace commit.
+    """
+    tabla = modelo.__tablename__
+    pk_field = obtener_pk_field(modelo)
+    conflicto = columna_conflicto(modelo)
+    ahora = datetime.now()
+    
+    por_pk: Dict[Any, Dict[str, Any]] = {}
+    por_unico: Dict[Any, Dict[str, Any]] = {}
+    nuevos: List[Dict[str, Any]] = []
+    
+    for local in locales:
+        id_local = getattr(local, pk_field)
+        fila = copiar_campos(local, modelo)
+        if cache is not None:
+            fila = traducir_fks(modelo, fila, cache, hacia_remoto=True)
+        fila['id_local'] = id_local
+        if hasattr(modelo, 'fecha_sync'):
+            # En Supabase el trigger de la migración 006 lo reemplaza por la
+            # hora del servidor; este valor solo queda en remotos sin trigger
+            fila['fecha_sync'] = ahora
+        
+        id_remoto = cache.obtener_id_remoto(tabla, id_local) if cache is not None else None
+        id_remoto = id_remoto or getattr(local, 'id_remoto', None)
+        
+        # Se deduplica por clave: ON CONFLICT no admite dos filas con la misma
+        if id_remoto:
+            fila[pk_field] = id_remoto
+            por_pk[id_remoto] = fila
+        elif conflicto and fila.get(conflicto):
+            por_unico[fila[conflicto]] = fila
+        else:
+            nuevos.append(fila)
+    
+    mapeo: Dict[int, int] = {}
+    mapeo.update(_ejecutar_upsert(modelo, list(por_pk.values()), pk_field, session_remoto, insert_func))
+    if conflicto:
+        mapeo.update(_ejecutar_upsert(modelo, list(por_unico.values()), conflicto, session_remoto, insert_func))
+    mapeo.update(_ejecutar_insert(modelo, nuevos, session_remoto, insert_func))
+    return mapeo
 
-def verificar_integridad_feligres(engine_local, engine_remoto, st_display_func) -> bool:
+def marcar_sincronizados(modelo: Type[SQLModel], mapeo: Dict[int, int], engine_local,
+                         cache: Optional[SyncCache] = None,
+                         diario_hasta: Optional[int] = None):
     """
-    Verifica la integridad de los datos de Feligres entre ambas bases.
-    NUEVA FUNCIÓN: Específica para el modelo Feligres
+    Escribe los id_remoto devueltos en SQLite en una sola transacción,
+    junto con el mapa persistente de ids. Con diario_hasta, en la misma
+    transacción se confirman (borran) sus entradas del diario.
     """
-    st_display_func("🔍 Verificando integridad de Feligres...")
+    if not mapeo:
+        return
     
-    try:
-        with Session(engine_local) as session_local:
-            feligreses_local = session_local.exec(select(Feligres)).all()
+    tabla = modelo.__tablename__
+    pk_field = obtener_pk_field(modelo)
+    ahora = datetime.now()
+    filas = [
+        {pk_field: id_local, 'id_remoto': id_remoto, 'sincronizado': True, 'fecha_sync': ahora}
+        for id_local, id_remoto in mapeo.items()
+    ]
+    
+    with Session(engine_local, info=SIN_DIARIO) as session_local:
+        session_local.execute(update(modelo), filas)
+        guardar_mapa_persistente(session_local, tabla, mapeo)
+        if diario_hasta is not None:
+            confirmar_diario(session_local, tabla, list(mapeo.keys()), diario_hasta)
+        session_local.commit()
+    
+    if cache is not None:
+        cache.agregar_mapeos(tabla, mapeo)
+
+def enviar_lote_individual(
+    modelo: Type[SQLModel],
+    locales: List[SQLModel],
+    engine_local,
+    engine_remoto,
+    cache: SyncCache,
+    diario_hasta: Optional[int] = None,
+    st_display_func=print
+) -> Tuple[int, int, int]:
+    """
+    Envía un lote fila por fila (camino de respaldo cuando no hay upsert).
+    Las parejas remotas se resuelven de una vez para todo el lote y cada
+    fila va en su SAVEPOINT, con un solo commit remoto y uno local.
+    Las filas rechazadas se reportan y quedan pendientes en el diario.
+    Retorna (enviados, actualizados, errores).
+    """
+    tabla = modelo.__tablename__
+    pk_field = obtener_pk_field(modelo)
+    enviados = actualizados = errores = 0
+    mapeo: Dict[int, int] = {}
+    
+    with Session(engine_remoto) as session_remoto:
+        existentes = resolver_existentes(modelo, locales, session_remoto, cache, hacia_remoto=True)
         
-        with Session(engine_remoto) as session_remoto:
-            feligreses_remoto = session_remoto.exec(select(Feligres)).all()
+        for local in locales:
+            id_local = getattr(local, pk_field)
+            datos = traducir_fks(modelo, copiar_campos(local, modelo), cache, hacia_remoto=True)
+            
+            try:
+                with session_remoto.begin_nested():
+                    remoto = existentes.get(id_local)
+                    creado = remoto is None
+                    
+                    if remoto:
+                        # Actualizar
+                        for campo, valor in datos.items():
+                            if hasattr(remoto, campo) and campo != pk_field:
+                                setattr(remoto, campo, valor)
+                    else:
+                        # Crear
+                        remoto = modelo(**datos)
+                    
+                    if hasattr(remoto, 'id_local'):
+                        remoto.id_local = id_local
+                    if hasattr(remoto, 'fecha_sync'):
+                        # Lo reemplaza el trigger de la migración 006 (ver enviar_lote_upsert)
+                        remoto.fecha_sync = datetime.now()
+                    
+                    session_remoto.add(remoto)
+                    session_remoto.flush()
+                
+                mapeo[id_local] = getattr(remoto, pk_field)
+                if creado:
+                    enviados += 1
+                else:
+                    actualizados += 1
+            except Exception as e:
+                errores += 1
+                st_display_func(f"❌ {tabla} #{id_local} no enviado: {e}", is_error=True)
+                continue
         
-        st_display_func(f"📊 Local: {len(feligreses_local)} feligreses")
-        st_display_func(f"📊 Remoto: {len(feligreses_remoto)} feligreses")
+        session_remoto.commit()
+    
+    with escritura_local(engine_local):
+        marcar_sincronizados(modelo, mapeo, engine_local, cache, diario_hasta)
+    
+    return enviados, actualizados, errores
+
+# ====================================================================
+# FUNCIÓN AUXILIAR: LOCAL → REMOTO
+# ====================================================================
+
+def leer_pendientes(
+    modelo: Type[SQLModel],
+    engine_local,
+    completo: bool = False
+) -> Tuple[List[SQLModel], List[int], Optional[int]]:
+    """
+    Pendientes de envío de una tabla según el diario de cambios.
+    
+    Retorna (registros a subir, ids locales eliminados, secuencia máxima
+    leída del diario). Con completo=True también se incluyen las filas con
+    sincronizado == False o sin id_remoto (recorrido completo de la tabla).
+    """
+    tabla = modelo.__tablename__
+    pk_col = getattr(modelo, obtener_pk_field(modelo))
+    
+    entradas = leer_diario(engine_local, tabla)
+    hasta = max((e['secuencia'] for e in entradas.values()), default=None)
+    ids_subir = [i for i, e in entradas.items() if e['operacion'] != 'D']
+    ids_borrar = [i for i, e in entradas.items() if e['operacion'] == 'D']
+    
+    pendientes: Dict[int, SQLModel] = {}
+    with Session(engine_local) as session:
+        for i in range(0, len(ids_subir), 500):
+            for registro in session.exec(select(modelo).where(pk_col.in_(ids_subir[i:i+500]))).all():
+                pendientes[getattr(registro, pk_col.key)] = registro
         
-        # Verificar CURPs únicos
-        curps_local = {f.curp for f in feligreses_local if f.curp}
-        curps_remoto = {f.curp for f in feligreses_remoto if f.curp}
+        if completo:
+            for registro in session.exec(
+                select(modelo).where(
+                    (getattr(modelo, 'sincronizado') == False) |
+                    (getattr(modelo, 'id_remoto').is_(None))
+                )
+            ).all():
+                pendientes[getattr(registro, pk_col.key)] = registro
+    
+    # Entradas cuyo registro ya no existe (borrado sin pasar por la sesión)
+    huerfanos = [i for i in ids_subir if i not in pendientes]
+    if huerfanos and hasta is not None:
+        with escritura_local(engine_local), Session(engine_local, info=SIN_DIARIO) as session:
+            confirmar_diario(session, tabla, huerfanos, hasta)
+            session.commit()
+    
+    return list(pendientes.values()), ids_borrar, hasta
+
+def enviar_tabla(
+    modelo: Type[SQLModel],
+    engine_local,
+    engine_remoto,
+    cache: SyncCache,
+    st_display_func,
+    insert_func,
+    lote: int = 500,
+    completo: bool = False,
+    ritmo: Optional[RitmoAdaptativo] = None
+) -> Tuple[int, int, int]:
+    """
+    Envía altas y cambios pendientes de una tabla (las bajas van aparte,
+    en enviar_eliminaciones). Retorna (enviados, actualizados, errores);
+    las filas con error siguen pendientes para el siguiente envío.
+    """
+    tabla = modelo.__tablename__
+    pk_field = obtener_pk_field(modelo)
+    enviados = actualizados = errores = 0
+    
+    if not hasattr(modelo, 'sincronizado'):
+        return 0, 0, 0
+    
+    # Buscar no sincronizados (diario de cambios)
+    pendientes, _, hasta = leer_pendientes(modelo, engine_local, completo)
+    
+    if not pendientes:
+        return 0, 0, 0
+    
+    # Mensaje especial para Feligres
+    if tabla == "feligres":
+        st_display_func(f"📤 feligres (Modelo Base): {len(pendientes)} pendientes...")
+    else:
+        st_display_func(f"📤 {tabla}: {len(pendientes)} pendientes...")
+    
+    for i in range(0, len(pendientes), lote):
+        batch = pendientes[i:i+lote]
+        if i and ritmo:
+            ritmo.esperar_lote()
         
-        solo_local = curps_local - curps_remoto
-        solo_remoto = curps_remoto - curps_local
+        if insert_func:
+            try:
+                ya_remotos = sum(
+                    1 for r in batch
+                    if getattr(r, 'id_remoto', None) or cache.obtener_id_remoto(tabla, getattr(r, pk_field))
+                )
+                
+                with medir_remoto(ritmo), Session(engine_remoto) as session_remoto:
+                    mapeo = enviar_lote_upsert(modelo, batch, session_remoto, insert_func, cache)
+                    session_remoto.commit()
+                
+                with escritura_local(engine_local):
+                    marcar_sincronizados(modelo, mapeo, engine_local, cache, hasta)
+                actualizados += ya_remotos
+                enviados += len(mapeo) - ya_remotos
+                continue
+            except Exception as e:
+                st_display_func(f"⚠️ Lote de {tabla} rechazado, reintentando fila por fila: {e}", is_warning=True)
+        
+        try:
+            lote_enviados, lote_actualizados, lote_errores = enviar_lote_individual(
+                modelo, batch, engine_local, engine_remoto, cache, hasta, st_display_func
+            )
+            enviados += lote_enviados
+            actualizados += lote_actualizados
+            errores += lote_errores
+        except Exception as e:
+            errores += len(batch)
+            st_display_func(f"❌ Lote de {tabla} no enviado: {e}", is_error=True)
+            continue
+    
+    if errores:
+        st_display_func(f"❌ {tabla}: {errores} filas no enviadas (quedan pendientes)", is_error=True)
+    
+    return enviados, actualizados, errores
+
+def enviar_eliminaciones(
+    modelo: Type[SQLModel],
+    engine_local,
+    engine_remoto,
+    cache: SyncCache
+) -> int:
+    """
+    Replica en remoto las bajas locales registradas en el diario (lápidas).
+    Retorna cuántas filas remotas se eliminaron.
+    """
+    tabla = modelo.__tablename__
+    pk_col = getattr(modelo, obtener_pk_field(modelo))
+    
+    _, ids_borrar, hasta = leer_pendientes(modelo, engine_local)
+    if not ids_borrar:
+        return 0
+    
+    ids_remotos = [cache.obtener_id_remoto(tabla, id_local) for id_local in ids_borrar]
+    ids_remotos = [i for i in ids_remotos if i is not None]
+    
+    eliminados = 0
+    if ids_remotos:
+        with Session(engine_remoto) as session_remoto:
+            resultado = session_remoto.execute(delete(modelo).where(pk_col.in_(ids_remotos)))
+            session_remoto.commit()
+            eliminados = resultado.rowcount or 0
+    
+    # Las bajas de filas que nunca subieron solo se confirman
+    with escritura_local(engine_local), Session(engine_local, info=SIN_DIARIO) as session_local:
+        borrar_mapa_persistente(session_local, tabla, ids_borrar)
+        confirmar_diario(session_local, tabla, ids_borrar, hasta)
+        session_local.commit()
+    cache.eliminar_mapeos(tabla, ids_borrar)
+    
+    return eliminados
+
+def sincronizar_local_a_remoto(engine_local, engine_remoto, st_display_func,
+                               lote: int = 500, paralelo: bool = True,
+                               completo: bool = False,
+                               ritmo: Optional[RitmoAdaptativo] = None) -> bool:
+    """
+    Sincroniza Local → Remoto de forma segura.
+    ACTUALIZADO para usar modelo Feligres
+    
+    Lo pendiente sale del diario de cambios (database/diario.py); con
+    completo=True también se recorren las banderas sincronizado.
+    Envía en lotes de `lote` filas con INSERT ... ON CONFLICT ... RETURNING.
+    Si el dialecto no lo soporta, o un lote falla, ese lote se reenvía
+    fila por fila. Las tablas siguen el mismo planificador por dependencias
+    que la descarga; al final se replican las bajas, de hijos a padres.
+    
+    Retorna False si alguna fila o baja no se pudo enviar (se reporta
+    cada una y siguen pendientes en el diario).
+    """
+    
+    if not engine_local or not engine_remoto:
+        st_display_func("❌ Se requieren ambas conexiones", is_error=True)
+        return False
+    
+    st_display_func("🔄 Sincronizando Local → Remoto...")
+    st_display_func("📋 Modelo actualizado: Feligres (antes Persona)")
+    cache = SyncCache(engine_local)
+    insert_func = obtener_insert_upsert(engine_remoto)
+    max_workers = tamano_pool(engine_remoto) if paralelo else 1
+    totales = {'enviados': 0, 'actualizados': 0, 'errores': 0}
+    
+    def tarea(modelo):
+        mensajes = MensajesDiferidos() if max_workers > 1 else st_display_func
+        resultado = enviar_tabla(
+            modelo, engine_local, engine_remoto, cache, mensajes, insert_func, lote, completo, ritmo
+        )
+        return resultado, mensajes
+    
+    def al_terminar(modelo, resultado):
+        (enviados, actualizados, errores), mensajes = resultado
+        if isinstance(mensajes, MensajesDiferidos):
+            mensajes.volcar(st_display_func)
+        totales['enviados'] += enviados
+        totales['actualizados'] += actualizados
+        totales['errores'] += errores
+    
+    try:
+        modelos = descubrir_modelos()
+        ejecutar_por_dependencias(modelos, tarea, al_terminar, max_workers=max_workers)
         
-        if solo_local:
-            st_display_func(f"⚠️ {len(solo_local)} feligreses solo en Local", is_warning=True)
+        # Bajas: primero los hijos para no violar llaves foráneas remotas
+        eliminados = 0
+        for modelo in reversed(orden_topologico(modelos)):
+            try:
+                eliminados += enviar_eliminaciones(modelo, engine_local, engine_remoto, cache)
+            except Exception as e:
+                totales['errores'] += 1
+                st_display_func(f"❌ Bajas de {modelo.__tablename__} no enviadas: {e}", is_error=True)
         
-        if solo_remoto:
-            st_display_func(f"⚠️ {len(solo_remoto)} feligreses solo en Remoto", is_warning=True)
+        st_display_func(f"✅ Enviados: {totales['enviados']}, Actualizados: {totales['actualizados']}")
+        if eliminados:
+            st_display_func(f"🗑️ Eliminados en remoto: {eliminados}")
         
-        if not solo_local and not solo_remoto:
-            st_display_func("✅ Bases sincronizadas correctamente")
-            return True
+        if totales['errores']:
+            st_display_func(
+                f"❌ Local → Remoto con {totales['errores']} errores; lo no enviado queda pendiente",
+                is_error=True
+            )
+            return False
         
+        st_display_func("✅ Sincronización Local → Remoto completada")
+        return True
+    
+    except Exception as e:
+        st_display_func(f"❌ Error: {e}", is_error=True)
+        return False
+
+# ====================================================================
+# CARGA MASIVA INICIAL (COPY FROM STDIN)
+# ====================================================================
+# Para poblar un Supabase vacío (proyecto nuevo o recién recreado) sin el
+# envío fila a fila: cada tabla viaja en un solo COPY, conservando los ids
+# locales como ids remotos para no traducir llaves foráneas. Después se
+# ajustan las secuencias y se escriben en SQLite los id_remoto, el mapa de
+# ids, las marcas de agua y el diario ya confirmado.
+
+BLOQUE_COPY = 5000
+
+def _texto_copy(valor) -> str:
+    """Un valor en el formato de texto de COPY (\\N = NULL)."""
+    if valor is None:
+        return r'\N'
+    if isinstance(valor, bool):
+        texto = 't' if valor else 'f'
+    elif isinstance(valor, Enum):
+        texto = valor.name
+    elif isinstance(valor, (bytes, memoryview)):
+        texto = '\\x' + bytes(valor).hex()
+    elif isinstance(valor, (datetime, date)):
+        texto = valor.isoformat()
+    else:
+        texto = str(valor)
+    return (texto.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+class _FlujoCopy:
+    """Archivo de solo lectura sobre bloques de texto (para copy_expert de psycopg2)."""
+    
+    def __init__(self, bloques):
+        self._bloques = iter(bloques)
+        self._resto = ''
+    
+    def read(self, tamano: int = -1) -> str:
+        while tamano < 0 or len(self._resto) < tamano:
+            bloque = next(self._bloques, None)
+            if bloque is None:
+                break
+            self._resto += bloque
+        if tamano < 0:
+            tamano = len(self._resto)
+        texto, self._resto = self._resto[:tamano], self._resto[tamano:]
+        return texto
+
+def _copiar(cursor, sentencia: str, bloques):
+    """COPY ... FROM STDIN con la API del driver: psycopg 3 o psycopg2."""
+    if hasattr(cursor, 'copy'):
+        with cursor.copy(sentencia) as copia:
+            for bloque in bloques:
+                copia.write(bloque)
+    else:
+        cursor.copy_expert(sentencia, _FlujoCopy(bloques))
+
+def _bloques_copy(modelo: Type[SQLModel], conn_local, ahora: datetime, copiadas: Dict[str, Any]):
+    """
+    Filas locales como texto COPY, de BLOQUE_COPY en BLOQUE_COPY. En
+    `copiadas` deja cuántas filas salieron y el mayor id copiado.
+    """
+    tabla = modelo.__table__
+    pk_field = obtener_pk_field(modelo)
+    columnas = [c.name for c in tabla.columns]
+    
+    resultado = conn_local.execution_options(yield_per=BLOQUE_COPY).execute(
+        select(tabla).order_by(tabla.c[pk_field])
+    )
+    for particion in resultado.partitions():
+        lineas = []
+        for fila in particion:
+            valores = fila._mapping
+            campos = []
+            for columna in columnas:
+                if columna == 'id_local':
+                    valor = valores[pk_field]
+                elif columna == 'id_remoto':
+                    valor = None
+                elif columna == 'sincronizado':
+                    valor = False
+                elif columna == 'fecha_sync':
+                    valor = ahora
+                else:
+                    valor = valores[columna]
+                campos.append(_texto_copy(valor))
+            lineas.append('\t'.join(campos))
+        copiadas['filas'] += len(lineas)
+        copiadas['maximo'] = particion[-1]._mapping[pk_field]
+        yield '\n'.join(lineas) + '\n'
+
+def _marcar_sembrada(modelo: Type[SQLModel], engine_local, ahora: datetime,
+                     maximo: int, diario_hasta: Optional[int]):
+    """
+    En SQLite, para los ids copiados (hasta `maximo`): id_remoto = id, mapa
+    identidad y diario confirmado, en una transacción. Las altas hechas
+    durante la copia quedan pendientes para el envío normal.
+    """
+    tabla = modelo.__table__
+    nombre = modelo.__tablename__
+    pk = tabla.c[obtener_pk_field(modelo)]
+    mapa = MapaIdSincronizacion.__table__
+    diario = DiarioCambio.__table__
+    
+    with escritura_local(engine_local), Session(engine_local, info=SIN_DIARIO) as session:
+        session.execute(
+            update(tabla).where(pk <= maximo).values(id_remoto=pk, sincronizado=True, fecha_sync=ahora)
+        )
+        session.execute(delete(mapa).where(mapa.c.tabla == nombre))
+        session.execute(mapa.insert().from_select(
+            ['tabla', 'id_local', 'id_remoto'], select(literal(nombre), pk, pk).where(pk <= maximo)
+        ))
+        if diario_hasta is not None:
+            session.execute(delete(diario).where(
+                (diario.c.tabla == nombre) & (diario.c.secuencia <= diario_hasta)
+            ))
+        session.commit()
+
+def dependientes(grafo: Dict[Any, List[Any]], omitidos) -> set:
+    """
+    Nodos de `grafo` ({hijo: [padres]}) que dependen, directa o
+    indirectamente, de alguno de `omitidos` (sin incluir a estos).
+    """
+    bloqueados = set()
+    cambio = True
+    while cambio:
+        cambio = False
+        for nodo, padres in grafo.items():
+            if nodo in bloqueados or nodo in omitidos:
+                continue
+            if any(p in omitidos or p in bloqueados for p in padres):
+                bloqueados.add(nodo)
+                cambio = True
+    return bloqueados
+
+def sembrar_remoto(engine_local, engine_remoto, st_display_func,
+                   modelos: Optional[List[Type[SQLModel]]] = None,
+                   vaciar: bool = False) -> bool:
+    """
+    Copia todas las tablas locales a un Supabase vacío con COPY.
+    
+    Con vaciar=True primero hace TRUNCATE ... RESTART IDENTITY CASCADE de
+    esas tablas en Supabase; sin él, las tablas remotas con datos se omiten
+    (para esas queda el envío normal), y con ellas todas las que dependen
+    de alguna omitida: sus llaves foráneas llevan ids locales, que solo
+    valen si el padre también se copió con sus ids.
+    """
+    if engine_remoto.dialect.name != 'postgresql':
+        st_display_func("❌ La carga con COPY requiere PostgreSQL", is_error=True)
         return False
+    
+    modelos = orden_topologico(modelos or descubrir_modelos())
+    grafo = construir_grafo_dependencias(modelos)
+    omitidas = set()
+    preparador = engine_remoto.dialect.identifier_preparer
+    inicio_total = time.perf_counter()
+    total = 0
+    exito = True
+    
+    if vaciar:
+        with engine_remoto.begin() as conn:
+            nombres = ", ".join(preparador.format_table(m.__table__) for m in modelos)
+            conn.exec_driver_sql(f"TRUNCATE {nombres} RESTART IDENTITY CASCADE")
+        st_display_func(f"🧹 {len(modelos)} tablas vaciadas en Supabase")
+    
+    st_display_func(f"🚚 Carga masiva de {len(modelos)} tablas (COPY)...")
+    
+    for modelo in modelos:
+        tabla = modelo.__table__
+        nombre = modelo.__tablename__
+        pk_field = obtener_pk_field(modelo)
+        nombre_sql = preparador.format_table(tabla)
+        inicio = time.perf_counter()
+        ahora = datetime.now()
+        copiadas = {'filas': 0, 'maximo': None}
+        
+        if modelo in dependientes(grafo, omitidas):
+            omitidas.add(modelo)
+            padres = ", ".join(p.__tablename__ for p in grafo[modelo] if p in omitidas)
+            st_display_func(f"⚠️ {nombre}: depende de una tabla omitida ({padres}), se omite", is_warning=True)
+            continue
+        
+        conexion = engine_remoto.raw_connection()
+        try:
+            cursor = conexion.cursor()
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {nombre_sql})")
+            if cursor.fetchone()[0]:
+                conexion.rollback()
+                omitidas.add(modelo)
+                st_display_func(f"⚠️ {nombre}: ya tiene datos en Supabase, se omite", is_warning=True)
+                continue
+            
+            columnas = ", ".join(preparador.quote(c.name) for c in tabla.columns)
+            sentencia = f"COPY {nombre_sql} ({columnas}) FROM STDIN"
+            
+            # Una sola transacción de lectura: la copia es una foto consistente
+            with engine_local.connect() as conn_local:
+                diario_hasta = conn_local.execute(
+                    select(func.max(DiarioCambio.secuencia)).where(DiarioCambio.tabla == nombre)
+                ).scalar()
+                _copiar(cursor, sentencia, _bloques_copy(modelo, conn_local, ahora, copiadas))
+            
+            # Los próximos INSERT remotos deben seguir después de los ids copiados
+            pk_sql = preparador.quote(pk_field)
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE(MAX({pk_sql}), 1), "
+                f"MAX({pk_sql}) IS NOT NULL) FROM {nombre_sql}",
+                (nombre_sql, pk_field)
+            )
+            # El trigger selló fecha_sync con la hora del servidor: la marca
+            # de la próxima descarga sale de ahí, no del reloj local
+            if 'fecha_sync' in tabla.c:
+                cursor.execute(f"SELECT MAX(fecha_sync) FROM {nombre_sql}")
+                copiadas['marca_fecha'] = cursor.fetchone()[0]
+            conexion.commit()
+        except Exception as e:
+            conexion.rollback()
+            exito = False
+            omitidas.add(modelo)
+            st_display_func(f"❌ {nombre}: {e}", is_error=True)
+            continue
+        finally:
+            conexion.close()
+        
+        if copiadas['filas']:
+            _marcar_sembrada(modelo, engine_local, ahora, copiadas['maximo'], diario_hasta)
+            # La siguiente descarga empieza después de lo copiado
+            with escritura_local(engine_local):
+                guardar_cursor(engine_local, nombre, copiadas['maximo'], copiadas.get('marca_fecha'))
+        
+        total += copiadas['filas']
+        st_display_func(f"📤 {nombre}: {copiadas['filas']} filas en {time.perf_counter() - inicio:.1f}s")
+    
+    segundos = time.perf_counter() - inicio_total
+    st_display_func(
+        f"✅ Carga masiva: {total} filas en {segundos:.0f}s"
+        + (f" ({total / segundos:.0f} filas/s)" if segundos else "")
+    )
+    return exito
+
+# ====================================================================
+# CONCILIACIÓN POR RANGOS DE IDS (RESÚMENES POR CUBETA)
+# ====================================================================
+# Cada fila se reduce a un hash de 60 bits de sus columnas de contenido
+# (llaves foráneas en ids remotos). Por cubeta de ids remotos se compara
+# (filas, suma de hashes); solo las cubetas distintas se subdividen y, al
+# final, se comparan fila por fila. En PostgreSQL el hash se calcula en SQL.
+
+DIGITOS_HASH = 15  # 15 dígitos hex = 60 bits, cabe en BIGINT
+
+def _categoria_columna(columna) -> str:
+    try:
+        tipo = columna.type.python_type
+    except NotImplementedError:
+        return 'texto'
+    if tipo is bool:
+        return 'bool'
+    if tipo is int:
+        return 'entero'
+    if tipo in (float, Decimal):
+        return 'numero'
+    if tipo is datetime:
+        return 'fecha_hora'
+    if tipo is date:
+        return 'fecha'
+    return 'texto'
+
+def columnas_contenido(modelo: Type[SQLModel]) -> list:
+    """Columnas que se comparan: todas menos la llave primaria y las de control."""
+    pk_field = obtener_pk_field(modelo)
+    control = {'id_local', 'id_remoto', 'sincronizado', 'fecha_sync', pk_field}
+    return [c for c in modelo.__table__.columns if c.name not in control]
+
+def _texto_valor(valor, categoria: str) -> str:
+    """Forma canónica de un valor; debe coincidir con _texto_sql."""
+    if valor is None:
+        return '\\N'
+    if categoria == 'bool':
+        return '1' if valor else '0'
+    if categoria == 'numero':
+        return f"{float(valor):.6f}"
+    if categoria == 'fecha_hora':
+        return valor.strftime('%Y-%m-%d %H:%M:%S.%f')
+    if categoria == 'fecha':
+        return valor.strftime('%Y-%m-%d')
+    if isinstance(valor, Enum):
+        return valor.name
+    return str(valor)
+
+def _texto_sql(columna, categoria: str):
+    """Forma canónica de una columna en PostgreSQL."""
+    if categoria == 'bool':
+        expr = case((columna == True, '1'), (columna == False, '0'))
+    elif categoria == 'numero':
+        expr = cast(func.round(cast(columna, Numeric), 6), String)
+    elif categoria == 'fecha_hora':
+        expr = func.to_char(columna, 'YYYY-MM-DD HH24:MI:SS.US')
+    elif categoria == 'fecha':
+        expr = func.to_char(columna, 'YYYY-MM-DD')
+    else:
+        expr = cast(columna, String)
+    return func.coalesce(expr, '\\N')
+
+def hash_fila(valores: List[Any], categorias: List[str]) -> int:
+    texto = '|'.join(_texto_valor(v, c) for v, c in zip(valores, categorias))
+    return int(hashlib.md5(texto.encode('utf-8')).hexdigest()[:DIGITOS_HASH], 16)
+
+def _resumir(hashes: Dict[int, int], lo: int, hi: int, paso: int) -> Dict[int, Tuple[int, int]]:
+    """{cubeta: (filas, suma de hashes)} de los ids en [lo, hi)."""
+    cubetas: Dict[int, List[int]] = {}
+    for clave, valor in hashes.items():
+        if lo <= clave < hi:
+            cubeta = cubetas.setdefault((clave - lo) // paso, [0, 0])
+            cubeta[0] += 1
+            cubeta[1] += valor
+    return {b: (n, suma) for b, (n, suma) in cubetas.items()}
+
+class _LadoRemoto:
+    """Resúmenes del lado remoto: en SQL si es PostgreSQL, si no en Python."""
+    
+    def __init__(self, modelo: Type[SQLModel], engine_remoto):
+        self.modelo = modelo
+        self.engine = engine_remoto
+        self.pk = getattr(modelo, obtener_pk_field(modelo))
+        self.columnas = columnas_contenido(modelo)
+        self.categorias = [_categoria_columna(c) for c in self.columnas]
+        self.consultas = 0
+        self.hashes: Optional[Dict[int, int]] = None
+        
+        if engine_remoto.dialect.name == 'postgresql':
+            fila = func.concat_ws('|', *[_texto_sql(c, cat) for c, cat in zip(self.columnas, self.categorias)]) \
+                if self.columnas else literal('')
+            self.hash_sql = cast(
+                cast(func.concat('x', func.substr(func.md5(fila), 1, DIGITOS_HASH)), BIT(DIGITOS_HASH * 4)),
+                BigInteger
+            )
+        else:
+            self.hashes = self._hashes_en_python()
+    
+    def _hashes_en_python(self) -> Dict[int, int]:
+        self.consultas += 1
+        hashes = {}
+        with self.engine.connect() as conn:
+            filas = conn.execution_options(yield_per=2000).execute(
+                select(self.pk, *self.columnas)
+            )
+            for fila in filas:
+                hashes[fila[0]] = hash_fila(fila[1:], self.categorias)
+        return hashes
+    
+    def rango(self) -> Tuple[Optional[int], Optional[int], int]:
+        """(id mínimo, id máximo, filas)."""
+        if self.hashes is not None:
+            if not self.hashes:
+                return None, None, 0
+            return min(self.hashes), max(self.hashes), len(self.hashes)
+        self.consultas += 1
+        with self.engine.connect() as conn:
+            minimo, maximo, filas = conn.execute(
+                select(func.min(self.pk), func.max(self.pk), func.count())
+            ).one()
+        return minimo, maximo, filas
+    
+    def resumir(self, lo: int, hi: int, paso: int) -> Dict[int, Tuple[int, int]]:
+        if self.hashes is not None:
+            return _resumir(self.hashes, lo, hi, paso)
+        self.consultas += 1
+        cubeta = ((self.pk - lo) // paso).label('cubeta')
+        with self.engine.connect() as conn:
+            filas = conn.execute(
+                select(cubeta, func.count(), func.sum(self.hash_sql))
+                .where(self.pk >= lo, self.pk < hi)
+                .group_by(cubeta)
+            ).all()
+        return {int(b): (n, int(suma)) for b, n, suma in filas}
+    
+    def hashes_rango(self, lo: int, hi: int) -> Dict[int, int]:
+        if self.hashes is not None:
+            return {k: v for k, v in self.hashes.items() if lo <= k < hi}
+        self.consultas += 1
+        with self.engine.connect() as conn:
+            filas = conn.execute(
+                select(self.pk, self.hash_sql).where(self.pk >= lo, self.pk < hi)
+            ).all()
+        return {k: int(v) for k, v in filas}
+
+def _hashes_locales(modelo: Type[SQLModel], engine_local,
+                    cache: SyncCache) -> Tuple[Dict[int, int], Dict[int, int], List[int]]:
+    """
+    Lee la tabla local (sin red) y retorna ({id_remoto: hash},
+    {id_remoto: id_local}, ids locales que aún no tienen par remoto).
+    """
+    tabla = modelo.__tablename__
+    pk = getattr(modelo, obtener_pk_field(modelo))
+    columnas = columnas_contenido(modelo)
+    categorias = [_categoria_columna(c) for c in columnas]
+    padres = {
+        i: fk.column.table.name
+        for i, c in enumerate(columnas) for fk in c.foreign_keys
+    }
+    
+    hashes: Dict[int, int] = {}
+    locales: Dict[int, int] = {}
+    sin_enviar: List[int] = []
+    
+    with engine_local.connect() as conn:
+        filas = conn.execution_options(yield_per=2000).execute(select(pk, *columnas))
+        for fila in filas:
+            id_local = fila[0]
+            id_remoto = cache.obtener_id_remoto(tabla, id_local)
+            if id_remoto is None:
+                sin_enviar.append(id_local)
+                continue
+            
+            valores = list(fila[1:])
+            for i, tabla_padre in padres.items():
+                if valores[i] is not None:
+                    traducido = cache.obtener_id_remoto(tabla_padre, valores[i])
+                    valores[i] = traducido if traducido is not None else valores[i]
+            
+            hashes[id_remoto] = hash_fila(valores, categorias)
+            locales[id_remoto] = id_local
+    
+    return hashes, locales, sin_enviar
+
+def conciliar_tabla(
+    modelo: Type[SQLModel],
+    engine_local,
+    engine_remoto,
+    cache: Optional[SyncCache] = None,
+    tamano_cubeta: int = 1024,
+    division: int = 16
+) -> Dict[str, Any]:
+    """
+    Compara una tabla entre Local y Remoto por resúmenes de rangos de ids.
+    
+    Retorna un dict con:
+        sin_enviar: ids locales sin par remoto (pendientes de subir)
+        solo_local: ids locales cuyo par remoto ya no existe
+        solo_remoto: ids remotos que no están en local
+        divergentes: pares (id_local, id_remoto) con contenido distinto
+    más filas_local, filas_remoto, consultas_remotas y cubetas_distintas.
+    """
+    cache = cache or SyncCache(engine_local)
+    locales_hash, locales, sin_enviar = _hashes_locales(modelo, engine_local, cache)
+    remoto = _LadoRemoto(modelo, engine_remoto)
+    minimo, maximo, filas_remoto = remoto.rango()
+    
+    resultado = {
+        'tabla': modelo.__tablename__,
+        'filas_local': len(locales_hash) + len(sin_enviar),
+        'filas_remoto': filas_remoto,
+        'sin_enviar': sin_enviar,
+        'solo_local': [],
+        'solo_remoto': [],
+        'divergentes': [],
+        'cubetas_distintas': 0,
+    }
+    
+    claves = [c for c in (minimo, maximo) if c is not None]
+    if locales_hash:
+        claves += [min(locales_hash), max(locales_hash)]
+    if not claves:
+        resultado['consultas_remotas'] = remoto.consultas
+        return resultado
+    
+    hoja = max(1, tamano_cubeta // division)
+    pendientes = [(min(claves), max(claves) + 1, tamano_cubeta)]
+    
+    while pendientes:
+        lo, hi, paso = pendientes.pop()
+        
+        if paso <= hoja and hi - lo <= hoja:
+            # Cubeta pequeña: comparar fila por fila
+            remotos = remoto.hashes_rango(lo, hi)
+            for clave in set(remotos) | {k for k in locales_hash if lo <= k < hi}:
+                local_hash = locales_hash.get(clave)
+                if local_hash is None:
+                    resultado['solo_remoto'].append(clave)
+                elif clave not in remotos:
+                    resultado['solo_local'].append(locales[clave])
+                elif local_hash != remotos[clave]:
+                    resultado['divergentes'].append((locales[clave], clave))
+            continue
+        
+        remotas = remoto.resumir(lo, hi, paso)
+        propias = _resumir(locales_hash, lo, hi, paso)
+        for cubeta in set(remotas) | set(propias):
+            if remotas.get(cubeta) == propias.get(cubeta):
+                continue
+            resultado['cubetas_distintas'] += 1
+            inicio = lo + cubeta * paso
+            pendientes.append((inicio, min(hi, inicio + paso), max(hoja, paso // division)))
+    
+    for lista in ('solo_local', 'solo_remoto', 'divergentes'):
+        resultado[lista].sort()
+    resultado['consultas_remotas'] = remoto.consultas
+    return resultado
+
+# ====================================================================
+# VERIFICACIÓN DE INTEGRIDAD
+# ====================================================================
+
+def verificar_integridad_feligres(engine_local, engine_remoto, st_display_func) -> bool:
+    """
+    Verifica la integridad de los datos de Feligres entre ambas bases.
+    NUEVA FUNCIÓN: Específica para el modelo Feligres
+    
+    Usa conciliar_tabla: compara resúmenes por rango de ids en lugar de
+    traer todas las filas de ambos lados.
+    """
+    st_display_func("🔍 Verificando integridad de Feligres...")
+    
+    try:
+        resultado = conciliar_tabla(Feligres, engine_local, engine_remoto)
+        
+        st_display_func(f"📊 Local: {resultado['filas_local']} feligreses")
+        st_display_func(f"📊 Remoto: {resultado['filas_remoto']} feligreses")
+        
+        return mostrar_conciliacion(resultado, st_display_func)
         
     except Exception as e:
         st_display_func(f"❌ Error verificando integridad: {e}", is_error=True)
         return False
 
+def verificar_integridad(engine_local, engine_remoto, st_display_func,
+                         modelos: Optional[List[Type[SQLModel]]] = None) -> bool:
+    """Concilia todas las tablas sincronizables (o las indicadas)."""
+    st_display_func("🔍 Verificando integridad de todas las tablas...")
+    cache = SyncCache(engine_local)
+    correcto = True
+    
+    for modelo in orden_topologico(modelos or descubrir_modelos()):
+        try:
+            resultado = conciliar_tabla(modelo, engine_local, engine_remoto, cache)
+        except Exception as e:
+            st_display_func(f"❌ {modelo.__tablename__}: {e}", is_error=True)
+            correcto = False
+            continue
+        correcto = mostrar_conciliacion(resultado, st_display_func, silencioso=True) and correcto
+    
+    if correcto:
+        st_display_func("✅ Bases sincronizadas correctamente")
+    return correcto
+
+def mostrar_conciliacion(resultado: Dict[str, Any], st_display_func,
+                         silencioso: bool = False) -> bool:
+    """Muestra las diferencias de conciliar_tabla; True si no hay ninguna."""
+    tabla = resultado['tabla']
+    diferencias = {
+        'sin enviar': len(resultado['sin_enviar']),
+        'solo en Local': len(resultado['solo_local']),
+        'solo en Remoto': len(resultado['solo_remoto']),
+        'con contenido distinto': len(resultado['divergentes']),
+    }
+    
+    for descripcion, cantidad in diferencias.items():
+        if cantidad:
+            st_display_func(f"⚠️ {tabla}: {cantidad} registros {descripcion}", is_warning=True)
+    
+    if any(diferencias.values()):
+        return False
+    if not silencioso:
+        st_display_func("✅ Bases sincronizadas correctamente")
+    return True
+
+# ====================================================================
+# SINCRONIZADOR EN SEGUNDO PLANO (python -m sync_manager --watch)
+# ====================================================================
+
+def mostrar_en_consola(mensaje, is_error=False, is_warning=False):
+    """st_display_func para correr sin Streamlit."""
+    nivel = "ERROR " if is_error else "AVISO " if is_warning else ""
+    print(f"[{datetime.now():%H:%M:%S}] {nivel}{mensaje}", flush=True)
+
+def guardar_estado_sincronizador(engine_local, **campos):
+    """Actualiza la fila de sync_estado y su latido."""
+    with escritura_local(engine_local), Session(engine_local) as session:
+        estado = session.get(EstadoSincronizador, 1) or EstadoSincronizador(id=1)
+        for campo, valor in campos.items():
+            setattr(estado, campo, valor)
+        estado.latido = datetime.now()
+        session.add(estado)
+        session.commit()
+
+def leer_estado_sincronizador(engine_local) -> Optional[EstadoSincronizador]:
+    """Estado para la barra lateral; None si el sincronizador nunca ha corrido."""
+    try:
+        with Session(engine_local) as session:
+            return session.get(EstadoSincronizador, 1)
+    except Exception:
+        return None
+
+def sincronizador_activo(estado: Optional[EstadoSincronizador], tolerancia: float = 120) -> bool:
+    """True si el proceso sigue vivo (latido reciente y no detenido)."""
+    if not estado or estado.estado == "detenido":
+        return False
+    return (datetime.now() - estado.latido).total_seconds() < tolerancia
+
+def ejecutar_sincronizador(engine_local, engine_remoto, intervalo: float = 60.0,
+                           sondeo: float = 2.0, una_vez: bool = False,
+                           detener: Optional[threading.Event] = None,
+                           st_display_func=mostrar_en_consola,
+                           aviso: Optional[threading.Event] = None) -> bool:
+    """
+    Bucle sin interfaz. Envía Local → Remoto mientras el diario de cambios
+    tenga pendientes y descarga Remoto → Local cada `intervalo` segundos; el
+    RitmoAdaptativo alarga ese intervalo si Supabase va lento o falla. Un
+    envío fallido se reintenta después de esa misma espera, aunque el
+    diario no haya cambiado.
+    El estado queda en sync_estado para que la app lo muestre.
+    
+    Con `aviso`, la espera entre sondeos termina en cuanto alguien lo marca
+    (p. ej. un commit local), sin esperar los `sondeo` segundos.
+    """
+    detener = detener or threading.Event()
+    ritmo = RitmoAdaptativo(intervalo=intervalo)
+    ahora = time.monotonic()
+    proxima_descarga = ahora
+    proximo_envio = ahora
+    ultimo_latido = ahora
+    ciclos = 0
+    exito = True
+    
+    guardar_estado_sincronizador(engine_local, estado="esperando", pid=os.getpid(), ultimo_error=None)
+    st_display_func(f"🛰️ Sincronizador iniciado (descarga cada {intervalo:.0f}s)")
+    
+    try:
+        while not detener.is_set():
+            ahora = time.monotonic()
+            pendientes = contar_diario(engine_local)
+            # Mientras haya pendientes se envía; tras un envío fallido, al
+            # vencer la espera del ritmo aunque el conteo no haya cambiado
+            toca_envio = pendientes > 0 and ahora >= proximo_envio
+            toca_descarga = ahora >= proxima_descarga
+            
+            if toca_envio or toca_descarga or una_vez:
+                guardar_estado_sincronizador(engine_local, estado="sincronizando", pendientes=pendientes)
+                error = None
+                envio_ok = descarga_ok = True
+                try:
+                    if pendientes and (toca_envio or una_vez):
+                        envio_ok = sincronizar_local_a_remoto(
+                            engine_local, engine_remoto, st_display_func, ritmo=ritmo
+                        )
+                    if toca_descarga or una_vez:
+                        descarga_ok = sincronizar_bases_de_datos(
+                            engine_local, engine_remoto, st_display_func, ritmo=ritmo
+                        )
+                except Exception as e:
+                    envio_ok = descarga_ok = False
+                    error = str(e)
+                    st_display_func(f"❌ Ciclo fallido: {e}", is_error=True)
+                
+                exito = envio_ok and descarga_ok
+                ritmo.fin_ciclo(exito)
+                ciclos += 1
+                espera = ritmo.intervalo_ciclo()
+                if toca_descarga or not descarga_ok:
+                    proxima_descarga = time.monotonic() + espera
+                if not envio_ok:
+                    proximo_envio = time.monotonic() + espera
+                
+                campos = dict(
+                    estado="esperando" if exito else "error",
+                    ciclos=ciclos,
+                    pendientes=contar_diario(engine_local),
+                    latencia_ms=ritmo.latencia * 1000 if ritmo.latencia is not None else None,
+                    tasa_error=ritmo.tasa_error,
+                    proxima_descarga=datetime.now() + timedelta(seconds=proxima_descarga - time.monotonic()),
+                )
+                if exito:
+                    campos['ultimo_exito'] = datetime.now()
+                    campos['ultimo_error'] = None
+                elif error:
+                    campos['ultimo_error'] = error
+                guardar_estado_sincronizador(engine_local, **campos)
+                ultimo_latido = time.monotonic()
+                
+                if una_vez:
+                    break
+            
+            elif time.monotonic() - ultimo_latido >= 30:
+                guardar_estado_sincronizador(engine_local, pendientes=pendientes)
+                ultimo_latido = time.monotonic()
+            
+            if aviso is not None:
+                if aviso.wait(sondeo):
+                    aviso.clear()
+            else:
+                detener.wait(sondeo)
+    finally:
+        guardar_estado_sincronizador(engine_local, estado="detenido")
+        st_display_func("🛑 Sincronizador detenido")
+    
+    return exito
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m sync_manager",
+        description="Sincronización SQLite ↔ Supabase sin interfaz (por defecto, un solo ciclo)."
+    )
+    parser.add_argument("--watch", action="store_true",
+                        help="quedarse corriendo: envía al detectar cambios y descarga periódicamente")
+    parser.add_argument("--intervalo", type=float, default=60.0,
+                        help="segundos base entre descargas (default: 60)")
+    parser.add_argument("--sondeo", type=float, default=2.0,
+                        help="segundos entre revisiones del diario local (default: 2)")
+    parser.add_argument("--sembrar", action="store_true",
+                        help="carga inicial: copiar todas las tablas locales a un Supabase vacío con COPY")
+    parser.add_argument("--vaciar", action="store_true",
+                        help="con --sembrar: vaciar antes las tablas remotas (TRUNCATE ... CASCADE)")
+    args = parser.parse_args(argv)
+    
+    from database import local as database_local
+    from database import remote as database_remote
+    
+    engine_local = database_local.get_engine()
+    engine_remoto = database_remote.get_engine()
+    if not engine_local or not engine_remoto:
+        mostrar_en_consola("❌ Se requieren ambas conexiones", is_error=True)
+        return 1
+    
+    if args.sembrar:
+        return 0 if sembrar_remoto(engine_local, engine_remoto, mostrar_en_consola, vaciar=args.vaciar) else 1
+    
+    detener = threading.Event()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(senal, lambda *_: detener.set())
+    
+    exito = ejecutar_sincronizador(
+        engine_local, engine_remoto, intervalo=args.intervalo, sondeo=args.sondeo,
+        una_vez=not args.watch, detener=detener
+    )
+    return 0 if exito else 1
+
+# ====================================================================
+# REPLICACIÓN EN SEGUNDO PLANO (LOCAL PRIMERO)
+# ====================================================================
+# En modo remoto la app lee y escribe en SQLite (latencia de disco) y este
+# hilo copia los cambios a Supabase: el mismo bucle que --watch, dentro del
+# proceso de Streamlit. Si ya corre un sincronizador aparte, no se duplica.
+
+_replicador: Optional[threading.Thread] = None
+_aviso_replicador = threading.Event()
+_detener_replicador = threading.Event()
+_lock_replicador = threading.Lock()
+
+def _avisar_replicador(conn):
+    _aviso_replicador.set()
+
+def replicador_activo() -> bool:
+    return _replicador is not None and _replicador.is_alive()
+
+def iniciar_replicador(engine_local, engine_remoto, intervalo: float = 60.0,
+                       sondeo: float = 5.0, st_display_func=mostrar_en_consola) -> bool:
+    """
+    Arranca (una vez por proceso) el hilo que envía el diario local a
+    Supabase al confirmar cada escritura y descarga cada `intervalo` s.
+    Retorna True si hay replicación en marcha (este hilo u otro proceso).
+    """
+    global _replicador
+    if not engine_local or not engine_remoto:
+        return False
+    
+    with _lock_replicador:
+        if replicador_activo():
+            return True
+        estado = leer_estado_sincronizador(engine_local)
+        if sincronizador_activo(estado) and estado.pid != os.getpid():
+            return True
+        
+        # Cada commit local despierta al hilo; el sondeo queda de respaldo
+        if not event.contains(engine_local, "commit", _avisar_replicador):
+            event.listen(engine_local, "commit", _avisar_replicador)
+        
+        _detener_replicador.clear()
+        _replicador = threading.Thread(
+            target=ejecutar_sincronizador,
+            args=(engine_local, engine_remoto),
+            kwargs=dict(intervalo=intervalo, sondeo=sondeo, detener=_detener_replicador,
+                        st_display_func=st_display_func, aviso=_aviso_replicador),
+            name="replicador-supabase",
+            daemon=True,
+        )
+        _replicador.start()
+        return True
+
+def detener_replicador(espera: float = 10.0):
+    """Pide al hilo que termine su ciclo y lo espera."""
+    _detener_replicador.set()
+    _aviso_replicador.set()
+    if _replicador is not None:
+        _replicador.join(espera)
+
 # ====================================================================
 # EXPORTACIÓN
 # ====================================================================
@@ -595,7 +2347,22 @@ def verificar_integridad_feligres(engine_local, engine_remoto, st_display_func)
 __all__ = [
     'SYNC_ORDER',
     'SyncCache',
+    'reiniciar_cursores',
+    'RitmoAdaptativo',
+    'ejecutar_sincronizador',
+    'leer_estado_sincronizador',
+    'sincronizador_activo',
+    'iniciar_replicador',
+    'detener_replicador',
+    'replicador_activo',
     'sincronizar_bases_de_datos',
     'sincronizar_local_a_remoto',
+    'sembrar_remoto',
     'verificar_integridad_feligres',
-]
\ No newline at end of file
+    'verificar_integridad',
+    'conciliar_tabla',
+]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
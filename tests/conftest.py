@@ -0,0 +1,85 @@
+# tests/conftest.py - Bases de prueba para la sincronización
+"""
+Dos bases SQLite en una carpeta temporal: 'local' con el perfil de la app
+(PRAGMAs, transacciones, tablas de control y diario de cambios) y
+'remoto' como las tablas de Supabase (sin diario ni tablas de control).
+
+Solo se crean las tablas que sync_manager sincroniza con el models.py
+cargado (descubrir_modelos); con el models.py abreviado son feligres,
+telefono, direccion, presbitero y usuario.
+"""
+
+import os
+import sys
+
+import pytest
+from sqlmodel import SQLModel, Session, create_engine
+
+# Añadir ruta del proyecto
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import sync_manager
+from database.local import configurar_transacciones, aplicar_pragmas, perfil_sqlite
+from database.diario import activar_diario
+from models_sync import crear_tablas_control
+
+
+def _crear_engine(ruta):
+    engine = create_engine(f"sqlite:///{ruta}", connect_args={"check_same_thread": False})
+    configurar_transacciones(engine)
+    return engine
+
+
+@pytest.fixture
+def modelos():
+    return sync_manager.descubrir_modelos()
+
+
+@pytest.fixture
+def engine_local(tmp_path, modelos):
+    engine = _crear_engine(tmp_path / "local.db")
+    aplicar_pragmas(engine, perfil_sqlite())
+    SQLModel.metadata.create_all(engine, tables=[m.__table__ for m in modelos])
+    crear_tablas_control(engine)
+    activar_diario(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def engine_remoto(tmp_path, modelos):
+    engine = _crear_engine(tmp_path / "remoto.db")
+    SQLModel.metadata.create_all(engine, tables=[m.__table__ for m in modelos])
+    yield engine
+    engine.dispose()
+
+
+class Mensajes(list):
+    """st_display_func que guarda (mensaje, nivel) para revisarlos después."""
+
+    def __call__(self, mensaje, is_error=False, is_warning=False):
+        self.append((mensaje, 'error' if is_error else 'aviso' if is_warning else 'info'))
+
+    def errores(self):
+        return [m for m, nivel in self if nivel == 'error']
+
+
+@pytest.fixture
+def mensajes():
+    return Mensajes()
+
+
+def _guardar(engine, *registros):
+    """Guarda los registros en una sesión normal (en local pasan por el diario)."""
+    with Session(engine) as session:
+        for registro in registros:
+            session.add(registro)
+        session.commit()
+        for registro in registros:
+            session.refresh(registro)
+    return registros[0] if len(registros) == 1 else registros
+
+
+@pytest.fixture
+def guardar():
+    return _guardar
@@ -0,0 +1,100 @@
+# tests/test_busqueda.py - Búsqueda de feligreses (FTS5 y LIKE)
+"""
+buscar_feligres con el índice FTS5 de la migración v005 sobre la base
+'local' y, sin índice, con el respaldo LIKE sobre la base 'remoto'.
+"""
+
+import pytest
+from sqlmodel import Session
+
+from database.busqueda import buscar_feligres, crear_indice_busqueda, fts5_disponible, terminos_busqueda
+from models import Feligres
+
+PERSONAS = [
+    ("José Luis", "García", "Pérez", "GAPJ800101HOCRRS01"),
+    ("María", "García", "López", "GALM850505MOCRPR02"),
+    ("Josefina", "Martínez", None, "MAXJ900909MOCRSS03"),
+    ("Pedro", "Ramírez", "Gómez", None),
+]
+
+
+def _cargar(engine, guardar):
+    return guardar(engine, *[
+        Feligres(nombres=n, apellido_paterno=p, apellido_materno=m, curp=c) for n, p, m, c in PERSONAS
+    ])
+
+
+def _nombres(resultado):
+    return sorted(f.nombres for f in resultado)
+
+
+@pytest.fixture
+def engine_fts(engine_local):
+    with engine_local.connect() as conn:
+        if not fts5_disponible(conn):
+            pytest.skip("SQLite sin FTS5")
+    with engine_local.begin() as conn:
+        crear_indice_busqueda(conn)
+    return engine_local
+
+# ====================================================================
+# FTS5
+# ====================================================================
+
+def test_fts_prefijos_sin_acentos_ni_mayusculas(engine_fts, guardar):
+    _cargar(engine_fts, guardar)
+
+    assert _nombres(buscar_feligres("jose garc", engine_fts)) == ["José Luis"]
+    assert _nombres(buscar_feligres("GARCIA", engine_fts)) == ["José Luis", "María"]
+    assert _nombres(buscar_feligres("jos", engine_fts)) == ["Josefina", "José Luis"]
+
+
+def test_fts_por_curp_y_todas_las_palabras(engine_fts, guardar):
+    _cargar(engine_fts, guardar)
+
+    assert _nombres(buscar_feligres("galm850505", engine_fts)) == ["María"]
+    assert buscar_feligres("maría ramírez", engine_fts) == []
+
+
+def test_fts_sigue_las_escrituras_de_la_tabla(engine_fts, guardar):
+    jose, maria, *_ = _cargar(engine_fts, guardar)
+
+    with Session(engine_fts) as session:
+        registro = session.get(Feligres, jose.id_feligres)
+        registro.apellido_paterno = "Hernández"
+        session.add(registro)
+        session.delete(session.get(Feligres, maria.id_feligres))
+        session.commit()
+
+    assert buscar_feligres("garcia", engine_fts) == []
+    assert _nombres(buscar_feligres("hernandez", engine_fts)) == ["José Luis"]
+
+
+def test_fts_ignora_la_sintaxis_de_consulta(engine_fts, guardar):
+    _cargar(engine_fts, guardar)
+
+    assert terminos_busqueda('garcía" OR *') == ["garcía", "OR"]
+    assert buscar_feligres('"garcía" -(', engine_fts) != []
+
+
+def test_fts_respeta_el_limite(engine_fts, guardar):
+    guardar(engine_fts, *[Feligres(nombres=f"Ana{n}", apellido_paterno="Soto") for n in range(30)])
+    assert len(buscar_feligres("soto", engine_fts, limite=7)) == 7
+
+# ====================================================================
+# RESPALDO LIKE (SIN ÍNDICE)
+# ====================================================================
+
+def test_like_sin_indice(engine_remoto, guardar):
+    _cargar(engine_remoto, guardar)
+
+    assert _nombres(buscar_feligres("garc jos", engine_remoto)) == ["José Luis"]
+    assert _nombres(buscar_feligres("martínez", engine_remoto)) == ["Josefina"]
+    assert _nombres(buscar_feligres("ramirez", engine_remoto)) == []  # LIKE sí distingue acentos
+    assert [f.nombres for f in buscar_feligres("a", engine_remoto, limite=2)] == ["José Luis", "María"]
+
+
+def test_texto_vacio_no_busca(engine_remoto, guardar):
+    _cargar(engine_remoto, guardar)
+    assert buscar_feligres("", engine_remoto) == []
+    assert buscar_feligres("  ¿? ", engine_remoto) == []
@@ -0,0 +1,187 @@
+# tests/test_local.py - Base local (SQLite): transacciones y CRUD
+"""
+Pruebas sobre la base 'local' de conftest: mismo perfil de PRAGMAs (WAL,
+busy_timeout), transacciones y diario de cambios que la app.
+"""
+
+import pytest
+from sqlmodel import Session, select
+
+from database import local as database_local
+from database.diario import SIN_DIARIO, leer_diario, contar_diario
+from models_sync import DiarioCambio
+from models import Feligres
+
+
+def _feligres(n, **campos):
+    return Feligres(nombres=f"Nombre{n}", apellido_paterno="Pérez", curp=f"CURP{n:014d}", **campos)
+
+# ====================================================================
+# TRANSACCIONES
+# ====================================================================
+
+def test_leer_y_luego_escribir_no_choca_con_otro_commit(engine_local, guardar):
+    feligres = guardar(engine_local, _feligres(1))
+
+    with Session(engine_local) as sesion_a:
+        registro = sesion_a.get(Feligres, feligres.id_feligres)
+
+        # Otra conexión escribe y confirma entre la lectura y la escritura de A
+        with Session(engine_local) as sesion_b:
+            sesion_b.add(_feligres(2))
+            sesion_b.commit()
+
+        registro.nombres = "Cambiado"
+        sesion_a.add(registro)
+        sesion_a.commit()
+
+    with Session(engine_local) as session:
+        nombres = session.exec(select(Feligres.nombres).order_by(Feligres.id_feligres)).all()
+    assert nombres == ["Cambiado", "Nombre2"]
+
+
+def test_savepoint_se_deshace_con_la_transaccion(engine_local):
+    with Session(engine_local) as session:
+        with session.begin_nested():
+            session.add(_feligres(1))
+        session.rollback()
+
+    with Session(engine_local) as session:
+        assert session.exec(select(Feligres)).all() == []
+
+# ====================================================================
+# PENDIENTES DE SINCRONIZAR
+# ====================================================================
+
+def test_tablas_con_pendientes_no_exige_resolver_llaves_foraneas():
+    # models.py tiene llaves foráneas hacia tablas que no están cargadas
+    nombres = {t.name for t in database_local.tablas_con_pendientes()}
+    assert {'feligres', 'telefono'} <= nombres
+
+
+def test_contar_pendientes_por_tabla(engine_local, modelos, guardar, monkeypatch):
+    creadas = [m.__table__ for m in modelos]
+    monkeypatch.setattr(database_local, 'tablas_con_pendientes', lambda: creadas)
+    guardar(engine_local, _feligres(1), _feligres(2))
+
+    assert database_local.contar_pendientes_por_tabla(engine_local) == {'feligres': 2}
+    assert database_local.contar_pendientes_sincronizacion(engine_local) == 2
+
+
+def test_contar_pendientes_no_falla_si_la_consulta_no_se_puede_armar(engine_local, monkeypatch):
+    def falla():
+        raise RuntimeError("llave foránea sin resolver")
+
+    monkeypatch.setattr(database_local, 'tablas_con_pendientes', falla)
+    assert database_local.contar_pendientes_por_tabla(engine_local) == {}
+
+# ====================================================================
+# LECTURA PAGINADA (KEYSET)
+# ====================================================================
+
+def _todas_las_paginas(engine, tamano, **opciones):
+    paginas, cursor = [], None
+    while True:
+        registros, cursor = database_local.leer_pagina(Feligres, engine, cursor, tamano, **opciones)
+        paginas.append([r.id_feligres for r in registros])
+        if cursor is None:
+            return paginas
+
+
+def test_leer_pagina_por_llave_primaria(engine_local, guardar):
+    ids = [f.id_feligres for f in guardar(engine_local, *[_feligres(n) for n in range(1, 8)])]
+
+    assert _todas_las_paginas(engine_local, 3) == [ids[0:3], ids[3:6], ids[6:7]]
+    assert _todas_las_paginas(engine_local, 7) == [ids]
+
+
+def test_leer_pagina_con_orden_empates_y_nulos(engine_local, guardar):
+    maternos = [None, "López", "Díaz", None, "López", "Zárate", "Díaz", "López", None]
+    registros = guardar(engine_local, *[_feligres(n, apellido_materno=m) for n, m in enumerate(maternos, 1)])
+
+    # Ascendente: los NULL primero; descendente: al final. La llave desempata
+    ascendente = sorted(registros, key=lambda r: (r.apellido_materno is not None,
+                                                  r.apellido_materno or "", r.id_feligres))
+    descendente = sorted(registros, key=lambda r: (r.apellido_materno is None,
+                                                   [-ord(c) for c in r.apellido_materno or ""],
+                                                   -r.id_feligres))
+
+    for orden_esperado, descendente_ in ((ascendente, False), (descendente, True)):
+        paginas = _todas_las_paginas(engine_local, 2, orden='apellido_materno', descendente=descendente_)
+        assert [i for pagina in paginas for i in pagina] == [r.id_feligres for r in orden_esperado]
+        assert all(len(p) == 2 for p in paginas[:-1])
+
+
+def test_leer_pagina_con_filtros(engine_local, guardar):
+    guardar(engine_local, *[_feligres(n, estado_canonico="casado" if n % 2 else "soltero")
+                            for n in range(1, 11)])
+
+    paginas = _todas_las_paginas(engine_local, 2, filtros=[Feligres.estado_canonico == "casado"])
+    assert sum(len(p) for p in paginas) == 5
+
+
+def test_leer_pagina_rechaza_un_cursor_de_otro_orden(engine_local, guardar):
+    guardar(engine_local, *[_feligres(n) for n in range(1, 5)])
+    _, cursor = database_local.leer_pagina(Feligres, engine_local, tamano=2, orden='nombres')
+
+    with pytest.raises(ValueError):
+        database_local.leer_pagina(Feligres, engine_local, cursor, tamano=2)
+
+
+def test_iterar_registros_recorre_toda_la_tabla_en_orden(engine_local, guardar):
+    registros = guardar(engine_local, *[_feligres(n) for n in range(1, 26)])
+
+    ids = [r.id_feligres for r in database_local.iterar_registros(Feligres, engine_local, tamano_lote=4,
+                                                                   descendente=True)]
+    assert ids == sorted((r.id_feligres for r in registros), reverse=True)
+
+# ====================================================================
+# ESCRITURA POR LOTES Y DIARIO DE CAMBIOS
+# ====================================================================
+
+def test_crear_registros_lote_asigna_ids_y_anota_altas(engine_local, mensajes):
+    registros = [_feligres(n) for n in range(1, 4)]
+    ids = database_local.crear_registros_lote(registros, engine_local, mensajes, nombre_tabla="Feligreses")
+
+    assert ids == [r.id_feligres for r in registros] and None not in ids
+    assert {i: e['operacion'] for i, e in leer_diario(engine_local, 'feligres').items()} == dict.fromkeys(ids, 'I')
+    with Session(engine_local) as session:
+        assert all(not f.sincronizado and f.id_remoto is None for f in session.exec(select(Feligres)))
+    assert mensajes.errores() == []
+
+
+def test_crear_registros_lote_es_todo_o_nada(engine_local, mensajes):
+    registros = [_feligres(1), _feligres(2), _feligres(1)]  # CURP repetida
+
+    assert database_local.crear_registros_lote(registros, engine_local, mensajes) == []
+    assert len(mensajes.errores()) == 1
+    with Session(engine_local) as session:
+        assert session.exec(select(Feligres)).all() == []
+    assert contar_diario(engine_local) == 0
+
+
+def test_actualizar_registros_lote_marca_pendientes_y_anota_cambios(engine_local, mensajes, guardar):
+    registros = guardar(engine_local, *[_feligres(n, sincronizado=True) for n in range(1, 4)])
+    ids = [r.id_feligres for r in registros]
+    with Session(engine_local, info=SIN_DIARIO) as session:
+        # Como si ya se hubieran enviado: diario vacío
+        session.exec(DiarioCambio.__table__.delete())
+        session.commit()
+
+    cambios = {ids[0]: {'nombres': "Uno"}, ids[2]: {'apellido_materno': "Ruiz"}, 999: {'nombres': "No existe"}}
+    assert database_local.actualizar_registros_lote(Feligres, cambios, engine_local, mensajes) == [ids[0], ids[2]]
+
+    with Session(engine_local) as session:
+        por_id = {f.id_feligres: f for f in session.exec(select(Feligres))}
+    assert (por_id[ids[0]].nombres, por_id[ids[2]].apellido_materno) == ("Uno", "Ruiz")
+    assert [por_id[i].sincronizado for i in ids] == [False, True, False]
+    assert {i: e['operacion'] for i, e in leer_diario(engine_local, 'feligres').items()} == {ids[0]: 'U', ids[2]: 'U'}
+
+
+def test_eliminar_registros_lote_anota_bajas(engine_local, mensajes, guardar):
+    ids = [r.id_feligres for r in guardar(engine_local, *[_feligres(n) for n in range(1, 4)])]
+
+    assert database_local.eliminar_registros_lote(Feligres, [ids[1], 999], engine_local, mensajes) == [ids[1]]
+    with Session(engine_local) as session:
+        assert [f.id_feligres for f in session.exec(select(Feligres))] == [ids[0], ids[2]]
+    assert leer_diario(engine_local, 'feligres')[ids[1]]['operacion'] == 'D'
@@ -0,0 +1,56 @@
+# tests/test_remote.py - Escritura por lotes directa en Supabase
+"""
+Las pantallas reciben db_module = database.remote cuando trabajan sobre
+Supabase: las funciones por lotes deben existir con las mismas firmas que
+en database.local. Se prueban sobre la base 'remoto' de SQLite.
+"""
+
+from sqlmodel import Session, select
+
+from database import local as database_local
+from database import remote as database_remote
+from models import Feligres
+
+
+def _feligres(n):
+    return Feligres(nombres=f"Nombre{n}", apellido_paterno="Pérez", curp=f"CURP{n:014d}")
+
+
+def test_remote_tiene_las_funciones_por_lotes_de_local():
+    for nombre in ('crear_registros_lote', 'actualizar_registros_lote'):
+        assert hasattr(database_remote, nombre) and hasattr(database_local, nombre)
+
+
+def test_crear_y_actualizar_por_lotes(engine_remoto, mensajes):
+    registros = [_feligres(n) for n in range(1, 4)]
+    ids = database_remote.crear_registros_lote(registros, engine_remoto, mensajes, nombre_tabla="Feligreses")
+    assert ids == [r.id_feligres for r in registros] and len(set(ids)) == 3
+
+    cambios = {ids[0]: {'nombres': "Uno"}, ids[2]: {'nombres': "Tres"}, 999: {'nombres': "No existe"}}
+    assert database_remote.actualizar_registros_lote(Feligres, cambios, engine_remoto, mensajes) == [ids[0], ids[2]]
+
+    with Session(engine_remoto) as session:
+        nombres = session.exec(select(Feligres.nombres).order_by(Feligres.id_feligres)).all()
+    assert nombres == ["Uno", "Nombre2", "Tres"]
+    assert mensajes.errores() == []
+
+
+def test_ambos_pools_salen_del_mismo_tope(monkeypatch):
+    import importlib
+    from database import remote_async
+
+    capturado = {}
+    monkeypatch.setenv("SGP_CONEXIONES_SUPABASE", "9")
+    try:
+        remote = importlib.reload(database_remote)
+        asincrono = importlib.reload(remote_async)
+        monkeypatch.setattr(remote, 'create_engine', lambda url, **opciones: capturado.update(opciones))
+        remote._crear_engine()
+
+        sincronas = capturado['pool_size'] + capturado['max_overflow']
+        assert asincrono.LIMITE_CONCURRENCIA == 3
+        assert sincronas + asincrono.LIMITE_CONCURRENCIA == 9
+    finally:
+        monkeypatch.undo()
+        importlib.reload(database_remote)
+        importlib.reload(remote_async)
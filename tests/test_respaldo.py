@@ -0,0 +1,115 @@
+# tests/test_respaldo.py - Respaldo en caliente, verificación y restauración
+"""
+database.respaldo sobre la base 'local' de conftest (archivo SQLite en
+WAL), con la carpeta de respaldos en el directorio temporal de la prueba.
+"""
+
+import gzip
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from database import respaldo
+from models import Feligres
+
+
+def _feligres(n):
+    return Feligres(nombres=f"Nombre{n}", apellido_paterno="Pérez", curp=f"CURP{n:014d}")
+
+
+def _curps(engine):
+    with Session(engine) as session:
+        return sorted(session.exec(select(Feligres.curp)).all())
+
+
+@pytest.fixture
+def carpeta(tmp_path):
+    return str(tmp_path / "respaldos")
+
+
+@pytest.fixture
+def ruta_base(engine_local):
+    return engine_local.url.database
+
+
+def test_crear_respaldo_comprime_y_verifica(engine_local, ruta_base, carpeta, guardar, mensajes):
+    guardar(engine_local, *[_feligres(n) for n in range(1, 4)])
+
+    archivo = respaldo.crear_respaldo(ruta_base, carpeta, st_display_func=mensajes)
+
+    assert archivo and archivo.endswith(respaldo.EXTENSION)
+    assert [r[0] for r in respaldo.listar_respaldos(carpeta)] == [archivo]
+    assert respaldo.verificar_respaldo(archivo)[0]
+    assert sorted(os.listdir(carpeta)) == [os.path.basename(archivo)]  # sin temporales
+    assert mensajes.errores() == []
+
+
+def test_el_respaldo_incluye_lo_que_sigue_en_el_wal(engine_local, ruta_base, carpeta, guardar, tmp_path):
+    guardar(engine_local, _feligres(1))
+    # Con una conexión abierta el commit queda en el -wal, no en el archivo principal
+    with engine_local.connect():
+        archivo = respaldo.crear_respaldo(ruta_base, carpeta)
+
+    copia = tmp_path / "copia.db"
+    with gzip.open(archivo, "rb") as entrada:
+        copia.write_bytes(entrada.read())
+    assert respaldo.verificar_base(str(copia))[0]
+    import sqlite3
+    conn = sqlite3.connect(copia)
+    assert conn.execute("SELECT curp FROM feligres").fetchall() == [(_feligres(1).curp,)]
+    conn.close()
+
+
+def test_restaurar_vuelve_al_contenido_respaldado(engine_local, ruta_base, carpeta, guardar, mensajes):
+    guardar(engine_local, *[_feligres(n) for n in range(1, 4)])
+    archivo = respaldo.crear_respaldo(ruta_base, carpeta)
+    antes = _curps(engine_local)
+
+    guardar(engine_local, _feligres(99))
+    assert _curps(engine_local) != antes
+
+    assert respaldo.restaurar_respaldo(archivo, ruta_base, respaldar_actual=False, st_display_func=mensajes)
+    # Las conexiones del pool ven los datos restaurados
+    assert _curps(engine_local) == antes
+    assert mensajes.errores() == []
+
+
+def test_restaurar_respalda_antes_la_base_actual(engine_local, ruta_base, carpeta, guardar, monkeypatch):
+    guardar(engine_local, _feligres(1))
+    archivo = respaldo.crear_respaldo(ruta_base, carpeta)
+    os.rename(archivo, os.path.join(carpeta, respaldo._nombre_respaldo(datetime.now() - timedelta(days=1))))
+    [(archivo, _, _)] = respaldo.listar_respaldos(carpeta)
+
+    crear = respaldo.crear_respaldo
+    monkeypatch.setattr(respaldo, 'crear_respaldo', lambda base, **k: crear(base, carpeta, **k))
+    assert respaldo.restaurar_respaldo(archivo, ruta_base)
+    assert len(respaldo.listar_respaldos(carpeta)) == 2
+
+
+def test_un_respaldo_danado_no_se_restaura(engine_local, ruta_base, carpeta, guardar, mensajes):
+    guardar(engine_local, _feligres(1))
+    archivo = respaldo.crear_respaldo(ruta_base, carpeta)
+    with open(archivo, "r+b") as f:
+        f.seek(os.path.getsize(archivo) // 2)
+        f.write(b"\x00" * 64)
+
+    assert not respaldo.verificar_respaldo(archivo)[0]
+    assert not respaldo.restaurar_respaldo(archivo, ruta_base, respaldar_actual=False, st_display_func=mensajes)
+    assert len(mensajes.errores()) == 1
+    assert _curps(engine_local) == [_feligres(1).curp]
+    assert not os.path.exists(ruta_base + ".restaurando")
+
+
+def test_rotar_conserva_los_mas_recientes(carpeta):
+    os.makedirs(carpeta)
+    hoy = datetime(2026, 1, 10, 2, 0, 0)
+    for dias in range(5):
+        with open(os.path.join(carpeta, respaldo._nombre_respaldo(hoy - timedelta(days=dias))), "wb"):
+            pass
+    open(os.path.join(carpeta, "otro-archivo.txt"), "wb").close()
+
+    assert respaldo.rotar_respaldos(carpeta, conservar=2) == 3
+    assert [fecha for _, fecha, _ in respaldo.listar_respaldos(carpeta)] == [hoy, hoy - timedelta(days=1)]
+    assert os.path.exists(os.path.join(carpeta, "otro-archivo.txt"))
@@ -0,0 +1,382 @@
+# tests/test_sync_manager.py - Ida y vuelta Local ↔ Remoto y conciliación
+"""
+Sincronización completa entre dos bases SQLite: envío (upsert por lotes,
+diario de cambios, lápidas), descarga (cursor incremental) y traducción de
+llaves foráneas entre los espacios de ids de cada lado.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+import sync_manager
+from database.diario import contar_diario
+from models import Feligres, Telefono
+from models_sync import EjecucionSincronizacion
+from conftest import Mensajes
+
+
+def _feligres(n, **campos):
+    return Feligres(nombres=f"Nombre{n}", apellido_paterno="Pérez", curp=f"CURP{n:014d}", **campos)
+
+
+def _telefono(id_feligres, numero="9510000000"):
+    return Telefono(id_feligres=id_feligres, numero_telefono=numero)
+
+
+def _todos(engine, modelo):
+    with Session(engine) as session:
+        return session.exec(select(modelo)).all()
+
+
+def _subir(engine_local, engine_remoto, mensajes):
+    return sync_manager.sincronizar_local_a_remoto(engine_local, engine_remoto, mensajes, paralelo=False)
+
+
+def _bajar(engine_local, engine_remoto, mensajes, **opciones):
+    opciones.setdefault('paralelo', False)
+    return sync_manager.sincronizar_bases_de_datos(engine_local, engine_remoto, mensajes, **opciones)
+
+# ====================================================================
+# LOCAL → REMOTO
+# ====================================================================
+
+def test_envio_sube_altas_y_traduce_llaves_foraneas(engine_local, engine_remoto, mensajes, guardar):
+    # Un feligrés que solo existe en remoto desfasa los ids de ambos lados
+    guardar(engine_remoto, _feligres(900, sincronizado=True))
+    feligres = guardar(engine_local, _feligres(1))
+    guardar(engine_local, _telefono(feligres.id_feligres))
+
+    assert _subir(engine_local, engine_remoto, mensajes)
+
+    remoto = {f.curp: f for f in _todos(engine_remoto, Feligres)}[feligres.curp]
+    assert remoto.id_feligres != feligres.id_feligres
+    assert remoto.id_local == feligres.id_feligres
+    [telefono] = _todos(engine_remoto, Telefono)
+    assert telefono.id_feligres == remoto.id_feligres
+
+    [local] = _todos(engine_local, Feligres)
+    assert local.id_remoto == remoto.id_feligres
+    assert local.sincronizado
+    assert contar_diario(engine_local) == 0
+
+
+def test_envio_de_un_cambio_actualiza_la_misma_fila(engine_local, engine_remoto, mensajes, guardar):
+    feligres = guardar(engine_local, _feligres(1))
+    assert _subir(engine_local, engine_remoto, mensajes)
+
+    with Session(engine_local) as session:
+        registro = session.get(Feligres, feligres.id_feligres)
+        registro.nombres = "Cambiado"
+        session.add(registro)
+        session.commit()
+    assert contar_diario(engine_local) == 1
+
+    assert _subir(engine_local, engine_remoto, mensajes)
+    [remoto] = _todos(engine_remoto, Feligres)
+    assert remoto.nombres == "Cambiado"
+    assert contar_diario(engine_local) == 0
+
+
+def test_baja_local_elimina_la_fila_remota(engine_local, engine_remoto, mensajes, guardar):
+    feligres = guardar(engine_local, _feligres(1))
+    telefono = guardar(engine_local, _telefono(feligres.id_feligres))
+    assert _subir(engine_local, engine_remoto, mensajes)
+    assert len(_todos(engine_remoto, Telefono)) == 1
+
+    with Session(engine_local) as session:
+        session.delete(session.get(Telefono, telefono.id_telefono))
+        session.commit()
+
+    assert _subir(engine_local, engine_remoto, mensajes)
+    assert _todos(engine_remoto, Telefono) == []
+    assert len(_todos(engine_remoto, Feligres)) == 1
+    assert contar_diario(engine_local) == 0
+
+def test_envio_reporta_las_filas_rechazadas_y_las_deja_pendientes(engine_local, engine_remoto,
+                                                                   mensajes, guardar):
+    with engine_remoto.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TRIGGER rechazar BEFORE INSERT ON telefono WHEN NEW.numero_telefono = '0000000000' "
+            "BEGIN SELECT RAISE(ABORT, 'numero rechazado'); END"
+        )
+    feligres = guardar(engine_local, _feligres(1))
+    guardar(engine_local, _telefono(feligres.id_feligres), _telefono(feligres.id_feligres, "0000000000"))
+
+    assert not _subir(engine_local, engine_remoto, mensajes)
+    assert any("numero rechazado" in m for m in mensajes.errores())
+    assert any("reintentando fila por fila" in m for m, nivel in mensajes if nivel == 'aviso')
+    assert [t.numero_telefono for t in _todos(engine_remoto, Telefono)] == ["9510000000"]
+    assert contar_diario(engine_local) == 1
+
+    with engine_remoto.begin() as conn:
+        conn.exec_driver_sql("DROP TRIGGER rechazar")
+    mensajes.clear()
+    assert _subir(engine_local, engine_remoto, mensajes)
+    assert mensajes.errores() == []
+    assert contar_diario(engine_local) == 0
+
+# ====================================================================
+# REMOTO → LOCAL
+# ====================================================================
+
+def test_descarga_trae_altas_y_traduce_llaves_foraneas(engine_local, engine_remoto, mensajes, guardar):
+    # Un feligrés que solo existe en local desfasa los ids de ambos lados
+    guardar(engine_local, _feligres(900))
+    feligres = guardar(engine_remoto, _feligres(1, fecha_sync=datetime.now()))
+    guardar(engine_remoto, _feligres(2, fecha_sync=datetime.now()))
+    guardar(engine_remoto, _telefono(feligres.id_feligres))
+
+    assert _bajar(engine_local, engine_remoto, mensajes)
+
+    local = {f.curp: f for f in _todos(engine_local, Feligres)}[feligres.curp]
+    assert local.id_remoto == feligres.id_feligres
+    assert local.id_feligres != feligres.id_feligres
+    [telefono] = _todos(engine_local, Telefono)
+    assert telefono.id_feligres == local.id_feligres
+
+    # Lo descargado no vuelve a subir
+    assert contar_diario(engine_local) == 1  # solo el feligrés 900, creado en local
+
+
+def test_descarga_incremental_solo_trae_lo_nuevo(engine_local, engine_remoto, mensajes, guardar):
+    guardar(engine_remoto, _feligres(1, fecha_sync=datetime.now()))
+    assert _bajar(engine_local, engine_remoto, mensajes)
+
+    leidas = []
+    original = sync_manager.sincronizar_tabla_simple
+
+    def contar(modelo, *args, **kwargs):
+        resultado = original(modelo, *args, **kwargs)
+        if modelo is Feligres:
+            leidas.append(resultado)
+        return resultado
+
+    sync_manager.sincronizar_tabla_simple = contar
+    try:
+        guardar(engine_remoto, _feligres(2, fecha_sync=datetime.now()))
+        assert _bajar(engine_local, engine_remoto, mensajes)
+    finally:
+        sync_manager.sincronizar_tabla_simple = original
+
+    # El feligrés 1 se relee por la ventana, pero no cambió: no cuenta
+    assert leidas == [(1, 0, 0)]
+    assert len(_todos(engine_local, Feligres)) == 2
+
+
+def test_descarga_trae_cambios_sellados_antes_de_la_marca(engine_local, engine_remoto, mensajes, guardar):
+    ahora = datetime.now()
+    feligres = guardar(engine_remoto, _feligres(1, fecha_sync=ahora))
+    assert _bajar(engine_local, engine_remoto, mensajes)
+
+    # Un cambio sellado por un reloj 5 minutos atrasado queda detrás de la marca
+    with Session(engine_remoto) as session:
+        registro = session.get(Feligres, feligres.id_feligres)
+        registro.nombres = "Reloj atrasado"
+        registro.fecha_sync = ahora - timedelta(minutes=5)
+        session.add(registro)
+        session.commit()
+
+    assert _bajar(engine_local, engine_remoto, mensajes)
+    [local] = _todos(engine_local, Feligres)
+    assert local.nombres == "Reloj atrasado"
+    assert contar_diario(engine_local) == 0
+
+
+def test_descarga_lee_por_paginas_de_llave_primaria(engine_local, engine_remoto, mensajes, guardar):
+    guardar(engine_remoto, *[_feligres(n, fecha_sync=datetime.now()) for n in range(1, 121)])
+    eventos = []
+
+    def anotar(conn, cursor, sentencia, parametros, contexto, executemany):
+        if 'FROM feligres' in sentencia and 'LIMIT' in sentencia:
+            eventos.append('pagina')
+
+    def devuelta(*args):
+        eventos.append('devuelta')
+
+    event.listen(engine_remoto, 'before_cursor_execute', anotar)
+    event.listen(engine_remoto.pool, 'checkin', devuelta)
+    try:
+        assert _bajar(engine_local, engine_remoto, mensajes)
+    finally:
+        event.remove(engine_remoto, 'before_cursor_execute', anotar)
+        event.remove(engine_remoto.pool, 'checkin', devuelta)
+
+    # 120 filas en lotes de 50: tres páginas, la última incompleta, y la
+    # conexión remota vuelve al pool después de cada una
+    paginas = [i for i, e in enumerate(eventos) if e == 'pagina']
+    assert len(paginas) == 3
+    assert all(eventos[i + 1] == 'devuelta' for i in paginas)
+    assert len(_todos(engine_local, Feligres)) == 120
+
+
+def test_ida_y_vuelta_deja_ambas_bases_iguales(engine_local, engine_remoto, mensajes, guardar):
+    for n in range(1, 6):
+        feligres = guardar(engine_local, _feligres(n))
+        guardar(engine_local, _telefono(feligres.id_feligres, numero=f"95100000{n:02d}"))
+    guardar(engine_remoto, _feligres(50, fecha_sync=datetime.now()))
+
+    assert _subir(engine_local, engine_remoto, mensajes)
+    assert _bajar(engine_local, engine_remoto, mensajes)
+
+    assert sync_manager.verificar_integridad(engine_local, engine_remoto, mensajes)
+    assert mensajes.errores() == []
+
+# ====================================================================
+# CONCILIACIÓN
+# ====================================================================
+
+def test_conciliar_tabla_sin_diferencias(engine_local, engine_remoto, mensajes, guardar):
+    for n in range(1, 30):
+        guardar(engine_local, _feligres(n))
+    assert _subir(engine_local, engine_remoto, mensajes)
+
+    resultado = sync_manager.conciliar_tabla(Feligres, engine_local, engine_remoto, tamano_cubeta=8, division=2)
+
+    assert resultado['filas_local'] == resultado['filas_remoto'] == 29
+    for lista in ('sin_enviar', 'solo_local', 'solo_remoto', 'divergentes'):
+        assert resultado[lista] == []
+
+
+def test_conciliar_tabla_encuentra_cada_tipo_de_diferencia(engine_local, engine_remoto, mensajes, guardar):
+    for n in range(1, 30):
+        guardar(engine_local, _feligres(n))
+    assert _subir(engine_local, engine_remoto, mensajes)
+    pares = {f.id_feligres: f.id_remoto for f in _todos(engine_local, Feligres)}
+
+    with Session(engine_remoto) as session:
+        cambiado = session.get(Feligres, pares[5])
+        cambiado.nombres = "Editado en Supabase"
+        session.add(cambiado)
+        session.delete(session.get(Feligres, pares[12]))
+        session.commit()
+    solo_remoto = guardar(engine_remoto, _feligres(500))
+    sin_enviar = guardar(engine_local, _feligres(600))
+
+    resultado = sync_manager.conciliar_tabla(Feligres, engine_local, engine_remoto, tamano_cubeta=8, division=2)
+
+    assert resultado['divergentes'] == [(5, pares[5])]
+    assert resultado['solo_local'] == [12]
+    assert resultado['solo_remoto'] == [solo_remoto.id_feligres]
+    assert resultado['sin_enviar'] == [sin_enviar.id_feligres]
+
+# ====================================================================
+# CARGA MASIVA (COPY)
+# ====================================================================
+# El COPY y el setval requieren PostgreSQL; aquí solo se prueba qué tablas
+# se omiten cuando una ya tiene datos en Supabase.
+
+def test_dependientes_de_una_tabla_omitida_son_transitivos():
+    grafo = {'pais': [], 'diocesis': ['pais'], 'parroquia': ['diocesis'], 'feligres': [],
+             'telefono': ['feligres'], 'bautismo': ['feligres', 'parroquia']}
+
+    assert sync_manager.dependientes(grafo, {'pais'}) == {'diocesis', 'parroquia', 'bautismo'}
+    assert sync_manager.dependientes(grafo, {'feligres'}) == {'telefono', 'bautismo'}
+    assert sync_manager.dependientes(grafo, {'telefono'}) == set()
+
+
+def test_dependientes_con_los_modelos_sincronizados(modelos):
+    grafo = sync_manager.construir_grafo_dependencias(modelos)
+    hijos = {m.__tablename__ for m in sync_manager.dependientes(grafo, {Feligres})}
+    assert hijos == {'telefono', 'direccion', 'presbitero', 'usuario'}
+
+# ====================================================================
+# REANUDACIÓN
+# ====================================================================
+
+def _ejecuciones(engine_local):
+    with Session(engine_local) as session:
+        return session.exec(select(EjecucionSincronizacion)).all()
+
+
+def test_descarga_interrumpida_se_reanuda_desde_el_ultimo_lote(engine_local, engine_remoto, mensajes,
+                                                                guardar, monkeypatch):
+    guardar(engine_remoto, *[_feligres(n, fecha_sync=datetime.now()) for n in range(1, 201)])
+
+    # La conexión se cae al resolver el 4.º lote de feligres (lotes de 50)
+    original = sync_manager.resolver_existentes
+    llamadas = []
+
+    def caida(modelo, *args, **kwargs):
+        if modelo is Feligres:
+            llamadas.append(modelo)
+            if len(llamadas) == 4:
+                raise ConnectionError("server closed the connection unexpectedly")
+        return original(modelo, *args, **kwargs)
+
+    monkeypatch.setattr(sync_manager, 'resolver_existentes', caida)
+    assert not _bajar(engine_local, engine_remoto, mensajes)
+
+    [ejecucion] = _ejecuciones(engine_local)
+    assert ejecucion.estado == "en_curso"
+    avance = sync_manager.leer_avance(engine_local, ejecucion.id_ejecucion)['feligres']
+    assert (avance.ultima_clave, avance.completada) == (150, False)
+    assert len(_todos(engine_local, Feligres)) == 150
+
+    monkeypatch.setattr(sync_manager, 'resolver_existentes', original)
+    desde = []
+    tabla_simple = sync_manager.sincronizar_tabla_simple
+
+    def espiar(modelo, *args, **kwargs):
+        desde.append((modelo.__tablename__, kwargs.get('desde_clave')))
+        return tabla_simple(modelo, *args, **kwargs)
+
+    monkeypatch.setattr(sync_manager, 'sincronizar_tabla_simple', espiar)
+    assert _bajar(engine_local, engine_remoto, mensajes)
+
+    # Solo se retoma feligres, desde la clave 150; las demás ya terminaron
+    assert desde == [('feligres', 150)]
+    [ejecucion] = _ejecuciones(engine_local)
+    assert ejecucion.estado == "completada"
+    assert len(_todos(engine_local, Feligres)) == 200
+
+
+def test_reanudacion_fallida_cierra_la_ejecucion(engine_local, engine_remoto, mensajes, guardar, monkeypatch):
+    guardar(engine_remoto, _feligres(1, fecha_sync=datetime.now()))
+
+    def caida(*args, **kwargs):
+        raise ConnectionError("server closed the connection unexpectedly")
+
+    monkeypatch.setattr(sync_manager, 'resolver_existentes', caida)
+    assert not _bajar(engine_local, engine_remoto, mensajes)
+    assert not _bajar(engine_local, engine_remoto, mensajes)
+    assert [e.estado for e in _ejecuciones(engine_local)] == ["con_errores"]
+
+    # La siguiente corrida empieza de nuevo y, sin cursor avanzado, trae la fila
+    monkeypatch.undo()
+    assert _bajar(engine_local, engine_remoto, mensajes)
+    assert [e.estado for e in _ejecuciones(engine_local)] == ["con_errores", "completada"]
+    assert len(_todos(engine_local, Feligres)) == 1
+
+# ====================================================================
+# SINCRONIZADOR
+# ====================================================================
+
+def test_sincronizador_reintenta_un_envio_fallido(engine_local, engine_remoto, guardar, monkeypatch):
+    guardar(engine_local, _feligres(1))
+    detener = threading.Event()
+    envios = []
+    subir = sync_manager.sincronizar_local_a_remoto
+
+    def envio(engine_local, *args, **kwargs):
+        # El primero falla sin tocar el diario; el segundo ya sube
+        envios.append(contar_diario(engine_local))
+        if len(envios) == 1:
+            return False
+        detener.set()
+        return subir(engine_local, engine_remoto, Mensajes(), paralelo=False)
+
+    monkeypatch.setattr(sync_manager, 'sincronizar_local_a_remoto', envio)
+    monkeypatch.setattr(sync_manager, 'sincronizar_bases_de_datos', lambda *a, **k: True)
+
+    hilo = threading.Thread(target=sync_manager.ejecutar_sincronizador, args=(engine_local, engine_remoto),
+                            kwargs=dict(intervalo=0.05, sondeo=0.01, detener=detener,
+                                        st_display_func=lambda *a, **k: None))
+    hilo.start()
+    hilo.join(timeout=10)
+    detener.set()
+
+    assert envios == [1, 1]
+    assert contar_diario(engine_local) == 0